@@ -0,0 +1,138 @@
+# -------------------------------------------------------------------
+# Formato canônico dos documentos de stats_access
+#
+#   {
+#     ip: str | None,
+#     path?: str,
+#     timestamp: datetime (UTC),
+#     location?: {country, city, latitude: float, longitude: float},
+#     geohash?: str,                 # só com location (geohash.py)
+#     schema: SCHEMA_VERSION,
+#   }
+#
+# O beacon já grava nesse formato (build). Documentos antigos (chaves
+# lat/lng, coordenadas em string, timestamp em string ou com fuso) são
+# reescritos por `python -m backend.manage backfill stats-normalize`,
+# que só seleciona o que ainda não tem `schema` atual e por isso pode
+# ser interrompido e retomado. Localizações sem coordenadas válidas saem
+# de `location` e ficam guardadas em `legacy_location`; timestamps que não
+# são datas, em `legacy_timestamp`.
+#
+# Com tudo canônico, as leituras são projeções executadas no próprio
+# MongoDB (LIST_PROJECTION, EXPORT_PROJECTION), sem trabalho por linha
+# em Python.
+# -------------------------------------------------------------------
+from datetime import datetime, timezone
+
+from . import geohash
+
+SCHEMA_VERSION = 2
+
+# ISO 8601 em UTC, como o frontend espera. O $convert tolera documentos
+# antigos ainda não migrados (timestamp em string; inválido vira null)
+_ISO_UTC = {"$dateToString": {
+    "date": {"$convert": {"input": "$timestamp", "to": "date", "onError": None, "onNull": None}},
+    "format": "%Y-%m-%dT%H:%M:%S.%LZ",
+}}
+
+
+def _coordinate(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().replace(",", "."))
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def normalize_location(loc):
+    """Localização canônica, ou None se não houver coordenadas válidas."""
+    if not isinstance(loc, dict):
+        return None
+    lat = _coordinate(loc["latitude"] if "latitude" in loc else loc.get("lat"))
+    lon = _coordinate(loc["longitude"] if "longitude" in loc else loc.get("lng"))
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return {"country": loc.get("country"), "city": loc.get("city"), "latitude": lat, "longitude": lon}
+
+
+def normalize_timestamp(value):
+    """datetime UTC sem fuso (como o pymongo devolve), ou None."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def build(ip, path=None, location=None, timestamp=None):
+    """Documento novo, já no formato canônico."""
+    doc = {"ip": ip, "timestamp": timestamp or datetime.utcnow(), "schema": SCHEMA_VERSION}
+    if path:
+        doc["path"] = path
+    location = normalize_location(location)
+    if location:
+        doc["location"] = location
+        doc["geohash"] = geohash.from_location(location)
+    return doc
+
+
+def migration_update(doc):
+    """Update ($set/$unset) que leva um documento antigo ao formato canônico."""
+    update = {"$set": {"schema": SCHEMA_VERSION}}
+    unset = {}
+    if "timestamp" in doc:
+        timestamp = normalize_timestamp(doc["timestamp"])
+        if timestamp is not None:
+            update["$set"]["timestamp"] = timestamp
+        else:
+            unset["timestamp"] = ""
+            if doc["timestamp"] is not None:
+                update["$set"]["legacy_timestamp"] = doc["timestamp"]
+    if "location" in doc:
+        location = normalize_location(doc["location"])
+        if location:
+            update["$set"]["location"] = location
+            update["$set"]["geohash"] = geohash.from_location(location)
+        else:
+            unset["location"] = ""
+            unset["geohash"] = ""
+            if doc["location"]:
+                update["$set"]["legacy_location"] = doc["location"]
+    if unset:
+        update["$unset"] = unset
+    return update
+
+
+# -------------------------------------------------------------------
+# Projeções de leitura (aggregate)
+# -------------------------------------------------------------------
+LIST_PROJECTION = {
+    "_id": 0,
+    "ip": 1,
+    "path": 1,
+    "location": {"$ifNull": ["$location", None]},
+    "timestamp": _ISO_UTC,
+}
+
+EXPORT_FIELDS = ["timestamp", "ip", "path", "country", "city", "latitude", "longitude"]
+
+EXPORT_PROJECTION = {
+    "_id": 0,
+    "timestamp": _ISO_UTC,
+    "ip": 1,
+    "path": 1,
+    "country": "$location.country",
+    "city": "$location.city",
+    "latitude": "$location.latitude",
+    "longitude": "$location.longitude",
+}
@@ -0,0 +1,208 @@
+# -------------------------------------------------------------------
+# Partições mensais de stats_access
+#
+# Os acessos ficam numa coleção por mês (stats_access_2026_10, ...):
+#   - escrita: cada documento vai para a partição do mês do seu
+#     timestamp (insert_many por partição; índices criados na primeira
+#     escrita de cada partição no processo)
+#   - leitura: as rotas consultam só as partições do intervalo pedido
+#     (collections) e juntam os resultados
+#   - retenção: apagar um mês é um drop da coleção, sem delete_many nem
+#     oplog proporcional ao volume; a tarefa de fundo (start/stop) remove
+#     as partições além de STATS_ACCESS_RETENTION_MONTHS
+#
+# A coleção antiga (stats_access, sem sufixo) continua sendo lida como
+# mais uma partição até ser esvaziada por
+# `python -m backend.manage backfill stats-partition`.
+# -------------------------------------------------------------------
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta
+
+from bson.errors import InvalidDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+from .indexes import PARTITION_INDEXES
+from .settings import STATS_ACCESS_RETENTION_MONTHS, STATS_RETENTION_CHECK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LEGACY = "stats_access"
+_NAME_RE = re.compile(r"^stats_access_(\d{4})_(\d{2})$")
+
+# Partições com índices garantidos neste processo
+_indexed = set()
+_task = None
+
+
+def name_for(timestamp):
+    return f"{LEGACY}_{timestamp.year:04d}_{timestamp.month:02d}"
+
+
+def _month(name):
+    """(ano, mês) de uma partição, ou None para outras coleções."""
+    match = _NAME_RE.match(name)
+    return (int(match[1]), int(match[2])) if match else None
+
+
+def is_partition(name):
+    """True para as partições mensais (stats_access_AAAA_MM)."""
+    return _month(name) is not None
+
+
+def _month_of(dt):
+    return (dt.year, dt.month)
+
+
+async def partition_names(database):
+    """Partições existentes, da mais antiga para a mais nova."""
+    names = await database.list_collection_names()
+    return sorted((n for n in names if _month(n)), key=_month)
+
+
+async def collections(database, start=None, end=None, newest_first=False):
+    """Coleções a consultar para acessos em [start, end), incluindo a
+    coleção antiga enquanto ela existir (tratada como a mais antiga)."""
+    names = await database.list_collection_names()
+    selected = []
+    for name in sorted((n for n in names if _month(n)), key=_month):
+        month = _month(name)
+        if start and month < _month_of(start):
+            continue
+        if end and month > _month_of(end - timedelta(microseconds=1)):
+            continue
+        selected.append(name)
+    if LEGACY in names:
+        selected.insert(0, LEGACY)
+    if newest_first:
+        selected.reverse()
+    return [database[name] for name in selected]
+
+
+async def oldest_timestamp(database):
+    """Início do período ainda coberto pelos acessos brutos (antes dele a
+    retenção já removeu tudo e só restam os rollups), ou None sem acessos."""
+    candidates = []
+    partitions = await partition_names(database)
+    if partitions:
+        # A retenção remove meses inteiros: a partição mais antiga está completa
+        year, month = _month(partitions[0])
+        candidates.append(datetime(year, month, 1))
+    doc = await database[LEGACY].find_one(
+        {"timestamp": {"$type": "date"}}, {"timestamp": 1}, sort=[("timestamp", 1)],
+    )
+    if doc:
+        candidates.append(doc["timestamp"].replace(hour=0, minute=0, second=0, microsecond=0))
+    return min(candidates, default=None)
+
+
+# -------------------------------------------------------------------
+# Escrita
+# -------------------------------------------------------------------
+def split(items, doc=lambda item: item):
+    """Agrupa por partição: {nome: [itens]} (na ordem de chegada)."""
+    groups = {}
+    for item in items:
+        groups.setdefault(name_for(doc(item)["timestamp"]), []).append(item)
+    return groups
+
+
+async def ensure_indexes(collection):
+    if collection.name in _indexed:
+        return
+    try:
+        await collection.create_indexes(PARTITION_INDEXES)
+    except Exception:
+        # A escrita segue; tenta de novo na próxima partição nova
+        logger.exception("Falha ao criar índices da partição", extra={"partition": collection.name})
+        return
+    _indexed.add(collection.name)
+
+
+async def insert_many(database, name, docs):
+    """Grava os documentos na partição; devolve os índices (em `docs`) dos
+    recusados pelo banco (erro permanente: documento inválido ou grande
+    demais, validação). Chave duplicada conta como gravado: o documento
+    já está na partição (ack perdido numa tentativa anterior). Erros
+    transitórios (rede, timeout) sobem para quem chamou."""
+    collection = database[name]
+    await ensure_indexes(collection)
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        return sorted({error["index"] for error in errors if error.get("code") != 11000})
+    except InvalidDocument:
+        # Levantado pelo driver antes de enviar o lote (inclui
+        # DocumentTooLarge): grava um a um para separar os inválidos
+        return await _insert_each(collection, docs)
+    return []
+
+
+async def _insert_each(collection, docs):
+    rejected = []
+    for index, doc in enumerate(docs):
+        try:
+            await collection.insert_one(doc)
+        except DuplicateKeyError:
+            pass
+        except (InvalidDocument, WriteError):
+            rejected.append(index)
+    return rejected
+
+
+# -------------------------------------------------------------------
+# Retenção
+# -------------------------------------------------------------------
+def _months_back(now, months):
+    index = now.year * 12 + (now.month - 1) - months
+    return (index // 12, index % 12 + 1)
+
+
+async def apply_retention(database, months=STATS_ACCESS_RETENTION_MONTHS, now=None):
+    """Remove as partições com mais de `months` meses (o atual conta como
+    o primeiro); 0 desliga a retenção. Devolve os nomes removidos."""
+    if months <= 0:
+        return []
+    oldest_kept = _months_back(now or datetime.utcnow(), months - 1)
+    dropped = []
+    for name in await partition_names(database):
+        if _month(name) < oldest_kept:
+            await database.drop_collection(name)
+            _indexed.discard(name)
+            dropped.append(name)
+    if dropped:
+        logger.info("Partições de acesso removidas pela retenção", extra={"partitions": dropped})
+    return dropped
+
+
+async def drop_all(database):
+    """Apaga todos os acessos (partições e coleção antiga)."""
+    names = await partition_names(database) + [LEGACY]
+    for name in names:
+        await database.drop_collection(name)
+        _indexed.discard(name)
+    return names
+
+
+async def _retention_loop(database, interval):
+    while True:
+        try:
+            await apply_retention(database)
+        except Exception:
+            logger.exception("Falha ao aplicar a retenção de acessos")
+        await asyncio.sleep(interval)
+
+
+def start(database, interval=STATS_RETENTION_CHECK_SECONDS):
+    global _task
+    if _task is None:
+        _task = asyncio.get_running_loop().create_task(_retention_loop(database, interval))
+
+
+def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
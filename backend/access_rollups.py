@@ -0,0 +1,245 @@
+# -------------------------------------------------------------------
+# Rollups das estatísticas de acesso (stats_access)
+#
+# Cada acesso gravado pelo beacons.py também incrementa contadores
+# agregados por período, país, cidade e caminho:
+#   stats_access_daily  -> {day: "2026-10-19", country, city, path, hits}
+#   stats_access_hourly -> {hour: "2026-10-19T14", country, city, path, hits}
+#
+# Os contadores ficam em memória e são gravados junto com cada lote de
+# acessos, com um bulk_write de upserts ($inc) por coleção, como o
+# metering.py. O resumo (GET /admin/stats/access/summary) lê só os
+# rollups: meses de acesso cabem em algumas centenas de documentos, em
+# vez de varrer os acessos brutos.
+#
+# O caminho vem do cliente: cada dia aceita no máximo
+# STATS_MAX_PATHS_PER_DAY caminhos distintos e conta os demais em
+# OTHER_PATH. Os aceitos ficam num registro compartilhado no MongoDB
+#   stats_access_paths -> {_id: "2026-10-19", paths: [...]}
+# preenchido com $addToSet enquanto houver vaga, então todos os workers e
+# backfills classificam cada caminho do mesmo jeito. Os contadores guardam
+# o caminho normalizado; o flush consulta o registro (register_paths) e só
+# então agrupa pelo caminho final (bucket_path, usado também pelo
+# access_uniques.py).
+#
+# Para dados antigos: python -m backend.manage backfill stats-rollups
+# -------------------------------------------------------------------
+import asyncio
+import logging
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from .settings import STATS_MAX_PATHS_PER_DAY
+
+logger = logging.getLogger(__name__)
+
+# granularidade -> (coleção, formato do período)
+ROLLUPS = {
+    "day": ("stats_access_daily", "%Y-%m-%d"),
+    "hour": ("stats_access_hourly", "%Y-%m-%dT%H"),
+}
+MAX_PATH_LENGTH = 200
+OTHER_PATH = "(outros)"
+PATHS_COLLECTION = "stats_access_paths"
+# Dias recentes do registro de caminhos guardados em memória
+_PATH_DAYS = 32
+
+# (granularidade, período, país, cidade, caminho normalizado) -> acessos
+_counters = {}
+# dia -> (caminhos aceitos no registro, registro cheio)
+_day_paths = {}
+
+
+def normalize_path(value):
+    # Sem query string/fragmento, para não explodir a cardinalidade
+    if not value:
+        return None
+    return value.split("?", 1)[0].split("#", 1)[0][:MAX_PATH_LENGTH]
+
+
+def bucket_path(day, value):
+    """Caminho normalizado, ou OTHER_PATH se não está entre os aceitos do
+    dia. Vale o que register_paths trouxe do registro compartilhado."""
+    path = normalize_path(value)
+    if path is None:
+        return None
+    accepted, _ = _day_paths.get(day, ((), False))
+    return path if path in accepted else OTHER_PATH
+
+
+async def _register(collection, day, path, limit):
+    """Inclui o caminho no registro do dia se houver vaga; False se cheio."""
+    for _ in range(2):
+        try:
+            await collection.update_one(
+                {"_id": day, f"paths.{limit - 1}": {"$exists": False}},
+                {"$addToSet": {"paths": path}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # O dia está cheio (o upsert colide com o documento existente)
+            # ou outro worker criou o documento no meio tempo: tenta de novo
+            continue
+    return False
+
+
+async def register_paths(database, pairs, limit=STATS_MAX_PATHS_PER_DAY):
+    """Consulta o registro compartilhado para os (dia, caminho normalizado)
+    ainda desconhecidos neste processo, incluindo-os enquanto houver vaga."""
+    wanted = {}
+    days = set()
+    for day, path in pairs:
+        days.add(day)
+        if path is None or path == OTHER_PATH:
+            continue
+        accepted, full = _day_paths.get(day, ((), False))
+        if path not in accepted and not full:
+            wanted.setdefault(day, set()).add(path)
+    collection = database[PATHS_COLLECTION]
+    for day, paths in wanted.items():
+        for path in sorted(paths):
+            if not await _register(collection, day, path, limit):
+                break
+        doc = await collection.find_one({"_id": day}, {"paths": 1})
+        accepted = (doc or {}).get("paths", [])
+        _day_paths[day] = (set(accepted), len(accepted) >= limit)
+    # Esquece os dias mais antigos, menos os deste lote (usados em seguida)
+    older = sorted(d for d in _day_paths if d not in days)
+    for day in older[:max(0, len(_day_paths) - _PATH_DAYS)]:
+        del _day_paths[day]
+
+
+def add(docs):
+    """Acumula os acessos de um lote já gravado. Chamado no event loop."""
+    for doc in docs:
+        ts = doc.get("timestamp")
+        if not isinstance(ts, datetime):
+            continue
+        loc = doc.get("location") or {}
+        country, city = loc.get("country"), loc.get("city")
+        path = normalize_path(doc.get("path"))
+        for granularity, (_, fmt) in ROLLUPS.items():
+            key = (granularity, ts.strftime(fmt), country, city, path)
+            _counters[key] = _counters.get(key, 0) + 1
+
+
+def _merge_back(pending):
+    for key, hits in pending.items():
+        _counters[key] = _counters.get(key, 0) + hits
+
+
+def _bucketed(pending):
+    # Agrupa os contadores pelo caminho final (aceito ou OTHER_PATH)
+    bucketed = {}
+    for (granularity, period, country, city, path), hits in pending.items():
+        key = (granularity, period, country, city, bucket_path(period[:10], path))
+        bucketed[key] = bucketed.get(key, 0) + hits
+    return bucketed
+
+
+async def flush(database):
+    """Grava os contadores acumulados; devolve quantos documentos tocou."""
+    global _counters
+    if not _counters:
+        return 0
+    pending, _counters = _counters, {}
+    try:
+        await register_paths(database, {(key[1][:10], key[4]) for key in pending})
+    except asyncio.CancelledError:
+        _merge_back(pending)
+        raise
+    except Exception:
+        _merge_back(pending)
+        logger.exception("Falha ao consultar o registro de caminhos")
+        return 0
+    pending = _bucketed(pending)
+    now = datetime.utcnow()
+    keys = {}
+    for key in pending:
+        keys.setdefault(key[0], []).append(key)
+    written = 0
+    groups = list(keys.items())
+    for i, (granularity, group) in enumerate(groups):
+        requests = []
+        for key in group:
+            _, period, country, city, path = key
+            requests.append(UpdateOne(
+                {granularity: period, "country": country, "city": city, "path": path},
+                {"$inc": {"hits": pending[key]}, "$set": {"updated_at": now}},
+                upsert=True,
+            ))
+        try:
+            await database[ROLLUPS[granularity][0]].bulk_write(requests, ordered=False)
+        except asyncio.CancelledError:
+            # Shutdown: esta granularidade e as que faltam voltam para o flush final
+            _merge_back({key: pending[key] for _, rest in groups[i:] for key in rest})
+            raise
+        except BulkWriteError as exc:
+            # ordered=False: as demais operações já foram aplicadas; só as que
+            # falharam voltam, senão seriam contadas duas vezes
+            failed = {error["index"] for error in exc.details.get("writeErrors", [])}
+            _merge_back({group[j]: pending[group[j]] for j in failed})
+            logger.exception("Falha ao gravar parte dos rollups de acesso",
+                             extra={"granularity": granularity, "failed": len(failed)})
+            written += len(requests) - len(failed)
+            continue
+        except Exception:
+            # Devolve os contadores desta granularidade para a próxima tentativa
+            _merge_back({key: pending[key] for key in group})
+            logger.exception("Falha ao gravar rollups de acesso", extra={"granularity": granularity})
+            continue
+        written += len(requests)
+    return written
+
+
+# -------------------------------------------------------------------
+# Consulta
+# -------------------------------------------------------------------
+def collection_name(granularity):
+    return ROLLUPS[granularity][0]
+
+
+def period_bounds(granularity, start=None, end=None):
+    """Filtro do campo de período para datas yyyy-mm-dd (end inclusivo)."""
+    query = {}
+    if start:
+        query["$gte"] = start if granularity == "day" else f"{start}T00"
+    if end:
+        query["$lte"] = end if granularity == "day" else f"{end}T23"
+    return {granularity: query} if query else {}
+
+
+async def summary(collection, granularity="day", start=None, end=None, top=10):
+    """Totais por período e os países, cidades e caminhos com mais acessos."""
+    match = {"$match": period_bounds(granularity, start, end)}
+
+    async def ranking(group_id):
+        pipeline = [
+            match,
+            {"$group": {"_id": group_id, "hits": {"$sum": "$hits"}}},
+            {"$sort": {"hits": -1}},
+            {"$limit": top},
+        ]
+        return await collection.aggregate(pipeline).to_list(None)
+
+    series = await collection.aggregate([
+        match,
+        {"$group": {"_id": f"${granularity}", "hits": {"$sum": "$hits"}}},
+        {"$sort": {"_id": 1}},
+    ]).to_list(None)
+    countries = await ranking("$country")
+    cities = await ranking({"country": "$country", "city": "$city"})
+    paths = await ranking("$path")
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "total": sum(row["hits"] for row in series),
+        "series": [{"period": row["_id"], "hits": row["hits"]} for row in series],
+        "countries": [{"country": row["_id"], "hits": row["hits"]} for row in countries],
+        "cities": [{**row["_id"], "hits": row["hits"]} for row in cities],
+        "paths": [{"path": row["_id"], "hits": row["hits"]} for row in paths],
+    }
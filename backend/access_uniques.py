@@ -0,0 +1,176 @@
+# -------------------------------------------------------------------
+# Visitantes únicos (IPs distintos) por dia e por caminho
+#
+# Cada acesso gravado pelo beacons.py entra em dois esboços HyperLogLog
+# (hyperloglog.py) do seu dia: o do site todo (path None) e o do caminho.
+# Os esboços ficam em memória e são juntados aos do MongoDB a cada lote:
+#   stats_access_uniques -> {day: "2026-10-19", path, sketch: bytes, version}
+#
+# A gravação lê de uma vez os esboços do lote, junta e regrava cada um
+# (em paralelo) condicionado à `version` lida (controle otimista): vários
+# workers podem gravar o mesmo dia sem perder registradores. Antes de
+# gravar, os caminhos passam pelo registro compartilhado de caminhos do
+# dia (access_rollups.register_paths/bucket_path), que limita quantos
+# existem por dia. O GET /admin/stats/access/uniques junta os esboços dos dias
+# pedidos, sem `distinct` sobre os acessos brutos.
+#
+# Para dados antigos: python -m backend.manage backfill stats-uniques
+# -------------------------------------------------------------------
+import asyncio
+import logging
+from datetime import datetime
+
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+
+from . import hyperloglog
+from .access_rollups import bucket_path, normalize_path, register_paths
+from .settings import STATS_UNIQUES_PRECISION
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "stats_access_uniques"
+DAY_FORMAT = "%Y-%m-%d"
+# Tentativas de regravar um esboço alterado por outro worker no meio tempo
+MAX_RETRIES = 5
+
+# (dia, caminho normalizado) -> registradores
+_sketches = {}
+# _merge_into: esboço gravado ainda não lido
+_FETCH = object()
+
+
+def add(docs, precision=STATS_UNIQUES_PRECISION):
+    """Acumula os acessos de um lote já gravado. Chamado no event loop."""
+    for doc in docs:
+        ts, ip = doc.get("timestamp"), doc.get("ip")
+        if not isinstance(ts, datetime) or not ip:
+            continue
+        day = ts.strftime(DAY_FORMAT)
+        for path in {None, normalize_path(doc.get("path"))}:
+            key = (day, path)
+            sketch = _sketches.get(key)
+            if sketch is None:
+                sketch = _sketches[key] = hyperloglog.new(precision)
+            hyperloglog.add(sketch, ip)
+
+
+def _merge_back(pending):
+    # Devolve os esboços para a próxima tentativa (junção é idempotente)
+    for key, sketch in pending.items():
+        _sketches[key] = hyperloglog.merge(_sketches[key], sketch) if key in _sketches else sketch
+
+
+def _bucketed(pending):
+    # Junta os esboços pelo caminho final (aceito ou OTHER_PATH)
+    bucketed = {}
+    for (day, path), sketch in pending.items():
+        key = (day, path if path is None else bucket_path(day, path))
+        bucketed[key] = hyperloglog.merge(bucketed[key], sketch) if key in bucketed else sketch
+    return bucketed
+
+
+async def _merge_into(collection, day, path, sketch, now, doc=_FETCH):
+    """Junta `sketch` ao esboço gravado de (dia, caminho). `doc` é o
+    documento já lido (None se não existia); nas novas tentativas relê."""
+    for attempt in range(MAX_RETRIES):
+        if attempt or doc is _FETCH:
+            doc = await collection.find_one({"day": day, "path": path}, {"sketch": 1, "version": 1})
+        if doc is None:
+            try:
+                result = await collection.update_one(
+                    {"day": day, "path": path},
+                    {"$setOnInsert": {"sketch": Binary(hyperloglog.dumps(sketch)), "version": 1, "updated_at": now}},
+                    upsert=True,
+                )
+            except DuplicateKeyError:
+                continue
+            if result.upserted_id is not None:
+                return
+            continue
+        merged = hyperloglog.merge(hyperloglog.loads(doc["sketch"]), sketch)
+        result = await collection.update_one(
+            {"_id": doc["_id"], "version": doc["version"]},
+            {"$set": {"sketch": Binary(hyperloglog.dumps(merged)), "updated_at": now}, "$inc": {"version": 1}},
+        )
+        if result.matched_count:
+            return
+    raise RuntimeError(f"Esboço de {day}/{path} alterado concorrentemente {MAX_RETRIES} vezes")
+
+
+async def flush(database):
+    """Grava os esboços acumulados; devolve quantos documentos tocou."""
+    global _sketches
+    if not _sketches:
+        return 0
+    pending, _sketches = _sketches, {}
+    try:
+        await register_paths(database, pending)
+    except asyncio.CancelledError:
+        _merge_back(pending)
+        raise
+    except Exception:
+        _merge_back(pending)
+        logger.exception("Falha ao consultar o registro de caminhos")
+        return 0
+    pending = _bucketed(pending)
+    collection = database[COLLECTION]
+    now = datetime.utcnow()
+    keys = list(pending)
+    try:
+        # Uma leitura para todos os esboços do lote
+        stored = {}
+        query = {"$or": [{"day": day, "path": path} for day, path in keys]}
+        async for doc in collection.find(query, {"day": 1, "path": 1, "sketch": 1, "version": 1}):
+            stored[(doc["day"], doc["path"])] = doc
+        results = await asyncio.gather(
+            *(_merge_into(collection, day, path, pending[(day, path)], now, stored.get((day, path)))
+              for day, path in keys),
+            return_exceptions=True,
+        )
+    except asyncio.CancelledError:
+        # Shutdown: regravar um esboço já gravado não muda nada (máximo)
+        _merge_back(pending)
+        raise
+    except Exception:
+        _merge_back(pending)
+        logger.exception("Falha ao ler esboços de visitantes únicos", extra={"sketches": len(keys)})
+        return 0
+    written = 0
+    for key, result in zip(keys, results):
+        if isinstance(result, BaseException):
+            _merge_back({key: pending[key]})
+            logger.error("Falha ao gravar visitantes únicos", exc_info=result, extra={"day": key[0], "path": key[1]})
+            continue
+        written += 1
+    return written
+
+
+# -------------------------------------------------------------------
+# Consulta
+# -------------------------------------------------------------------
+async def unique_visitors(collection, start=None, end=None, path=None):
+    """Visitantes únicos estimados em [start, end] (yyyy-mm-dd, inclusivos),
+    no total e por dia, do site todo ou de um caminho."""
+    query = {"path": normalize_path(path)}
+    if start or end:
+        query["day"] = {}
+        if start:
+            query["day"]["$gte"] = start
+        if end:
+            query["day"]["$lte"] = end
+    total = None
+    days = []
+    async for doc in collection.find(query, {"_id": 0, "day": 1, "sketch": 1}).sort("day", 1):
+        sketch = hyperloglog.loads(doc["sketch"])
+        total = sketch if total is None else hyperloglog.merge(total, sketch)
+        days.append({"day": doc["day"], "uniques": round(hyperloglog.estimate(sketch))})
+    precision = hyperloglog.precision_of(total) if total is not None else STATS_UNIQUES_PRECISION
+    return {
+        "start": start,
+        "end": end,
+        "path": query["path"],
+        "uniques": round(hyperloglog.estimate(total)) if total is not None else 0,
+        "relative_error": round(hyperloglog.relative_error(precision), 4),
+        "days": days,
+    }
@@ -0,0 +1,232 @@
+# -------------------------------------------------------------------
+# Controle de admissão adaptativo (load shedding)
+#
+# Quando o MongoDB fica lento as requisições se acumulam sem limite e a
+# latência de todo mundo explode. O AdmissionMiddleware limita o trabalho
+# em andamento e, sob sobrecarga, recusa cedo (503 + Retry-After) o que é
+# menos importante, para que as escritas clínicas do GPAC mantenham
+# latência limitada.
+#
+# Classes de rota (CLASSES), da mais para a menos prioritária:
+#   critical   -> escritas do GPAC, checkout e webhook de pagamento
+#   default    -> o resto
+#   storefront -> leituras das lojas (pneus, serviços, produtos)
+#   beacon     -> POST /admin/stats/access (estatística de acesso)
+#
+# Cada classe só ocupa uma fração (share) do limite de concorrência e
+# espera por uma vaga no máximo max_wait segundos. O limite se adapta
+# como no CoDel: se durante uma janela (ADMISSION_INTERVAL_SECONDS) toda
+# requisição de alguma classe que entrou na fila esperou mais que
+# ADMISSION_TARGET_DELAY_MS, há fila permanente -> o limite cai 10% e o
+# worker entra em sobrecarga (classes com queue_when_overloaded=False
+# deixam de esperar). Sem fila e com o limite quase todo em uso, o limite
+# volta a subir.
+# -------------------------------------------------------------------
+import asyncio
+import math
+import time
+from collections import deque
+
+from starlette.routing import get_route_path
+
+from .settings import (
+    ADMISSION_ENABLED,
+    ADMISSION_INTERVAL_SECONDS,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MIN_CONCURRENCY,
+    ADMISSION_TARGET_DELAY_MS,
+)
+
+CLASSES = {
+    "critical": {"priority": 0, "share": 1.0, "max_wait": 5.0, "retry_after": 1, "queue_when_overloaded": True},
+    "default": {"priority": 1, "share": 0.9, "max_wait": 2.0, "retry_after": 2, "queue_when_overloaded": True},
+    "storefront": {"priority": 2, "share": 0.8, "max_wait": 1.0, "retry_after": 2, "queue_when_overloaded": False},
+    "beacon": {"priority": 3, "share": 0.5, "max_wait": 0.0, "retry_after": 30, "queue_when_overloaded": False},
+}
+
+CRITICAL_PREFIXES = (
+    "/patients", "/colaboradores", "/agendamentos", "/comorbidities", "/equipes", "/2fa",
+    "/bkautocenter/checkout", "/bkautocenter/webhook",
+)
+STOREFRONT_PREFIXES = ("/bkautocenter/tires", "/bkautocenter/services", "/Produtos")
+# Sondas do balanceador nunca passam pelo controle
+EXEMPT_PATHS = ("/healthz", "/readyz")
+
+
+def classify(method: str, path: str) -> str:
+    if method == "POST" and path.rstrip("/") == "/admin/stats/access":
+        return "beacon"
+    if path.startswith(CRITICAL_PREFIXES):
+        # Leituras do GPAC ficam na classe padrão; só escritas são críticas
+        if method in ("POST", "PUT", "PATCH", "DELETE") or path.startswith("/bkautocenter"):
+            return "critical"
+        return "default"
+    if method == "GET" and path.startswith(STOREFRONT_PREFIXES):
+        return "storefront"
+    return "default"
+
+
+# -------------------------------------------------------------------
+# Controlador
+# -------------------------------------------------------------------
+class AdmissionController:
+    def __init__(self, max_limit=ADMISSION_MAX_CONCURRENCY, min_limit=ADMISSION_MIN_CONCURRENCY,
+                 target_delay=ADMISSION_TARGET_DELAY_MS / 1000, interval=ADMISSION_INTERVAL_SECONDS):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.target_delay = target_delay
+        self.interval = interval
+        self.limit = float(max_limit)
+        self.inflight = 0
+        self.overloaded = False
+        # prioridade -> fila de (future, classe)
+        self._waiters = {spec["priority"]: deque() for spec in CLASSES.values()}
+        self._window_start = time.monotonic()
+        # classe -> menor espera na fila durante a janela
+        self._window_min_delay = {}
+        self._window_peak = 0
+        self.stats = {name: {"admitted": 0, "queued": 0, "shed": 0, "inflight": 0} for name in CLASSES}
+
+    # ---- janela adaptativa ----
+    def _observe(self, name=None, delay=None):
+        # Menor espera por classe: as classes prioritárias furam a fila,
+        # então a fila permanente aparece na espera das outras
+        if delay is not None:
+            current = self._window_min_delay.get(name)
+            if current is None or delay < current:
+                self._window_min_delay[name] = delay
+        now = time.monotonic()
+        if now - self._window_start < self.interval:
+            return
+        if any(delay > self.target_delay for delay in self._window_min_delay.values()):
+            # Fila permanente: reduz a concorrência e corta o que é supérfluo
+            self.overloaded = True
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        else:
+            self.overloaded = False
+            if self._window_peak >= self.limit * 0.8:
+                self.limit = min(self.max_limit, self.limit + max(1.0, self.limit * 0.05))
+        self._window_start = now
+        self._window_min_delay = {}
+        self._window_peak = self.inflight
+
+    def _capacity(self, name):
+        return max(1, math.floor(self.limit * CLASSES[name]["share"]))
+
+    def _has_priority_waiters(self, priority):
+        return any(self._waiters[p] for p in self._waiters if p <= priority)
+
+    def _admit(self, name):
+        self.inflight += 1
+        self._window_peak = max(self._window_peak, self.inflight)
+        stats = self.stats[name]
+        stats["admitted"] += 1
+        stats["inflight"] += 1
+        self._observe()
+
+    def retry_after(self, name):
+        return CLASSES[name]["retry_after"]
+
+    async def acquire(self, name) -> bool:
+        """True se a requisição pode seguir; False se deve ser recusada."""
+        spec = CLASSES[name]
+        if self.inflight < self._capacity(name) and not self._has_priority_waiters(spec["priority"]):
+            self._admit(name)
+            return True
+        if spec["max_wait"] <= 0 or (self.overloaded and not spec["queue_when_overloaded"]):
+            self.stats[name]["shed"] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, name)
+        self._waiters[spec["priority"]].append(waiter)
+        self.stats[name]["queued"] += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait({future}, timeout=spec["max_wait"])
+        finally:
+            if not future.done():
+                # Timeout ou requisição cancelada enquanto esperava
+                future.cancel()
+                self._waiters[spec["priority"]].remove(waiter)
+            elif asyncio.current_task().cancelling():
+                # Vaga recebida, mas a requisição foi cancelada
+                self._release(name)
+        if future.cancelled():
+            self.stats[name]["shed"] += 1
+            # Esperar o tempo todo também conta como fila
+            self._observe(name, time.monotonic() - start)
+            return False
+        self._observe(name, time.monotonic() - start)
+        return True
+
+    def _release(self, name):
+        self.inflight -= 1
+        self.stats[name]["inflight"] -= 1
+        self._wake()
+
+    def release(self, name):
+        self._release(name)
+
+    def _wake(self):
+        # Passa as vagas livres para quem espera, por prioridade
+        for priority in sorted(self._waiters):
+            queue = self._waiters[priority]
+            while queue:
+                future, name = queue[0]
+                if self.inflight >= self._capacity(name):
+                    return
+                queue.popleft()
+                self.inflight += 1
+                self._window_peak = max(self._window_peak, self.inflight)
+                self.stats[name]["admitted"] += 1
+                self.stats[name]["inflight"] += 1
+                future.set_result(True)
+
+    def snapshot(self):
+        return {
+            "limit": round(self.limit, 1),
+            "inflight": self.inflight,
+            "overloaded": self.overloaded,
+            "waiting": {name: len(self._waiters[spec["priority"]]) for name, spec in CLASSES.items()},
+            "classes": {name: dict(stats) for name, stats in self.stats.items()},
+        }
+
+
+controller = AdmissionController()
+
+
+# -------------------------------------------------------------------
+# Middleware
+# -------------------------------------------------------------------
+class AdmissionMiddleware:
+    def __init__(self, app, controller=controller, enabled=ADMISSION_ENABLED):
+        self.app = app
+        self.controller = controller
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # Caminho da rota, sem o root_path (/api) quando o proxy não o remove
+        path = get_route_path(scope)
+        if path in EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+
+        name = classify(scope["method"], path)
+        if not await self.controller.acquire(name):
+            retry_after = str(self.controller.retry_after(name)).encode("ascii")
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", retry_after)],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": b'{"detail":"Servidor sobrecarregado, tente novamente"}',
+            })
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
@@ -1,5 +1,8 @@
 import mercadopago
 import time
+import logging
+
+logger = logging.getLogger(__name__)
 
 def create_payment_preference(items, payer_info=None):
     """
@@ -66,8 +69,8 @@ def create_payment_preference(items, payer_info=None):
         preference_response = sdk.preference().create(request)
         preference = preference_response["response"]
         return preference['init_point']
-    except Exception as e:
-        print(f"Erro ao criar preferência: {e}")
+    except Exception:
+        logger.exception("Erro ao criar preferência")
         return None
 
 # Exemplo de uso:
@@ -0,0 +1,172 @@
+# -------------------------------------------------------------------
+# Ingestão write-behind do beacon de acesso (POST /admin/stats/access)
+#
+# O beacon é a escrita mais frequente da API. Em vez de um insert_one
+# antes de responder, o endpoint só enfileira o documento (submit) e
+# responde na hora; uma tarefa de fundo grava a fila com insert_many em
+# lotes de BEACON_BATCH_SIZE, quando o lote enche ou a cada
+# BEACON_FLUSH_SECONDS, o que vier primeiro, na partição mensal de cada
+# acesso (access_partitions.py).
+#
+# - A fila é limitada (BEACON_QUEUE_SIZE): cheia, o acesso é descartado
+#   e contado; o beacon nunca espera pelo banco.
+# - Erro transitório no insert_many (rede, timeout): o lote volta para o
+#   início da fila (no limite da capacidade) e é regravado no próximo
+#   ciclo, até BEACON_MAX_ATTEMPTS tentativas por acesso.
+# - Erro permanente (documento inválido ou grande demais, validação): o
+#   acesso é descartado e contado em `rejected`, sem travar a fila.
+# - No shutdown a fila é esvaziada antes de fechar o cliente Mongo.
+# - Cada lote gravado alimenta os rollups por hora/dia (access_rollups.py)
+#   e os visitantes únicos por dia (access_uniques.py).
+# - snapshot() informa pendentes, descartados e o atraso do documento
+#   mais antigo ainda não gravado (GET /admin/health).
+#
+# Tudo roda no event loop (sem locks), como o metering.py.
+# -------------------------------------------------------------------
+import asyncio
+import logging
+import time
+from collections import deque
+
+from . import access_partitions, access_rollups, access_uniques
+from .settings import BEACON_BATCH_SIZE, BEACON_FLUSH_SECONDS, BEACON_MAX_ATTEMPTS, BEACON_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# (instante do enfileiramento, documento, tentativas de gravação)
+_pending = deque()
+_wakeup = None
+_task = None
+stats = {"accepted": 0, "written": 0, "dropped": 0, "rejected": 0, "abandoned": 0, "failed_flushes": 0, "last_flush": None}
+
+
+def _notify():
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def submit(doc, max_pending=BEACON_QUEUE_SIZE, batch_size=BEACON_BATCH_SIZE):
+    """Enfileira um acesso; False se a fila estava cheia (descartado)."""
+    if len(_pending) >= max_pending:
+        stats["dropped"] += 1
+        return False
+    _pending.append((time.monotonic(), doc, 0))
+    stats["accepted"] += 1
+    if len(_pending) >= batch_size:
+        _notify()
+    return True
+
+
+def lag_seconds():
+    """Idade do acesso mais antigo ainda não gravado."""
+    if not _pending:
+        return 0.0
+    return time.monotonic() - _pending[0][0]
+
+
+# -------------------------------------------------------------------
+# Gravação
+# -------------------------------------------------------------------
+def _requeue(failed, max_pending, max_attempts):
+    """Devolve o que falhou para o início da fila, sem passar da capacidade
+    nem de `max_attempts` tentativas por acesso."""
+    retry = []
+    for queued_at, doc, attempts in failed:
+        if attempts + 1 >= max_attempts:
+            stats["abandoned"] += 1
+        else:
+            retry.append((queued_at, doc, attempts + 1))
+    if len(retry) < len(failed):
+        logger.error("Acessos descartados após %s tentativas", max_attempts, extra={"abandoned": len(failed) - len(retry)})
+    room = max(0, max_pending - len(_pending))
+    keep = retry[:room]
+    stats["dropped"] += len(retry) - len(keep)
+    _pending.extendleft(reversed(keep))
+
+
+async def flush(database, batch_size=BEACON_BATCH_SIZE, max_pending=BEACON_QUEUE_SIZE, max_attempts=BEACON_MAX_ATTEMPTS):
+    """Grava tudo o que está na fila em lotes; devolve quantos gravou."""
+    written = 0
+    while _pending:
+        batch = [_pending.popleft() for _ in range(min(batch_size, len(_pending)))]
+        # Um insert_many por partição mensal (só mais de um na virada do mês)
+        groups = list(access_partitions.split(batch, lambda item: item[1]).items())
+        failed = []
+        for i, (name, items) in enumerate(groups):
+            try:
+                rejected = await access_partitions.insert_many(database, name, [item[1] for item in items])
+            except asyncio.CancelledError:
+                # Shutdown no meio do insert: o que falta volta para o flush final
+                _pending.extendleft(reversed(failed + [item for _, rest in groups[i:] for item in rest]))
+                raise
+            except Exception:
+                # Transitório (rede, timeout). Os documentos já têm _id: se o
+                # insert chegou a gravar, a nova tentativa os recebe como
+                # duplicados, tratados como gravados
+                failed.extend(items)
+                logger.exception("Falha ao gravar acessos", extra={"partition": name, "batch": len(items)})
+                continue
+            if rejected:
+                # Recusados pelo banco: regravar daria o mesmo erro
+                stats["rejected"] += len(rejected)
+                logger.error("Acessos recusados pelo banco", extra={"partition": name, "rejected": len(rejected)})
+                rejected = set(rejected)
+                items = [item for j, item in enumerate(items) if j not in rejected]
+            written += len(items)
+            stats["written"] += len(items)
+            access_rollups.add(item[1] for item in items)
+            access_uniques.add(item[1] for item in items)
+        if failed:
+            stats["failed_flushes"] += 1
+            _requeue(failed, max_pending, max_attempts)
+            break
+    if written:
+        stats["last_flush"] = time.time()
+        await access_rollups.flush(database)
+        await access_uniques.flush(database)
+    return written
+
+
+async def _flush_loop(database, interval):
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        failures = stats["failed_flushes"]
+        await flush(database)
+        if stats["failed_flushes"] != failures:
+            # Banco com problema: não insiste a cada lote cheio
+            await asyncio.sleep(interval)
+
+
+def start(database, interval=BEACON_FLUSH_SECONDS):
+    global _task, _wakeup
+    if _task is None:
+        _wakeup = asyncio.Event()
+        _task = asyncio.get_running_loop().create_task(_flush_loop(database, interval))
+
+
+async def stop(database):
+    """Para a tarefa de fundo e grava o que restou na fila (shutdown)."""
+    global _task, _wakeup
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    _wakeup = None
+    await flush(database)
+    if _pending:
+        logger.warning("Acessos não gravados no shutdown", extra={"pending": len(_pending)})
+
+
+def snapshot():
+    return {
+        "pending": len(_pending),
+        "lag_s": round(lag_seconds(), 3),
+        **stats,
+    }
@@ -0,0 +1,127 @@
+# -------------------------------------------------------------------
+# Cache local por worker com coerência via registro de versões
+#
+# Cada coleção cacheada tem um documento em equora.cache_versions
+# ({_id: "banco.coleção", version: n}). As rotas de escrita chamam
+# bump(coleção), que incrementa a versão no MongoDB e invalida o cache
+# local. Os outros workers acompanham o registro (uma consulta pequena
+# por segundo, ou um change stream quando há replica set) e descartam as
+# entradas cuja versão mudou.
+#
+# Enquanto o registro não foi lido pela primeira vez (ou se o watcher
+# cair), nada é cacheado: a leitura vai direto ao banco.
+# -------------------------------------------------------------------
+import asyncio
+import logging
+from datetime import datetime
+
+from .db import db_equora
+from .settings import CACHE_COHERENCE, CACHE_POLL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# "banco.coleção" -> última versão conhecida
+_versions = {}
+# ("banco.coleção", chave) -> (versão, valor)
+_entries = {}
+_synced = False
+_task = None
+
+
+def _invalidate(name, version=None):
+    if version is None:
+        version = _versions.get(name, 0) + 1
+    _versions[name] = version
+    for key in [k for k in _entries if k[0] == name]:
+        del _entries[key]
+
+
+def _apply(docs):
+    for doc in docs:
+        if _versions.get(doc["_id"]) != doc["version"]:
+            _invalidate(doc["_id"], doc["version"])
+
+
+async def get_or_load(collection, key, loader):
+    """Valor cacheado de `key` para a coleção, ou `await loader()`."""
+    if not _synced:
+        return await loader()
+    name = collection.full_name
+    version = _versions.get(name, 0)
+    entry = _entries.get((name, key))
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    value = await loader()
+    # Se a versão mudou durante o loader, a entrada já nasce inválida
+    _entries[(name, key)] = (version, value)
+    return value
+
+
+async def bump(collection):
+    """Marca a coleção como alterada para todos os workers."""
+    name = collection.full_name
+    _invalidate(name)
+    await db_equora.cache_versions.update_one(
+        {"_id": name},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+# -------------------------------------------------------------------
+# Watchers do registro
+# -------------------------------------------------------------------
+async def _sync(registry):
+    global _synced
+    _apply(await registry.find({}, {"version": 1}).to_list(None))
+    _synced = True
+
+
+async def _poll(registry, interval):
+    global _synced
+    while True:
+        try:
+            await _sync(registry)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Sem registro não há como saber se o cache está velho
+            _synced = False
+            _entries.clear()
+            logger.exception("Falha ao ler cache_versions")
+        await asyncio.sleep(interval)
+
+
+async def _watch(registry, interval):
+    global _synced
+    try:
+        async with registry.watch(full_document="updateLookup") as stream:
+            await _sync(registry)
+            async for change in stream:
+                doc = change.get("fullDocument")
+                if doc:
+                    _apply([doc])
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Change stream de cache_versions indisponível; usando polling")
+    _synced = False
+    _entries.clear()
+    await _poll(registry, interval)
+
+
+def start(mode=CACHE_COHERENCE, interval=CACHE_POLL_SECONDS):
+    global _task
+    if mode == "off" or _task is not None:
+        return
+    watcher = _watch if mode == "changestream" else _poll
+    _task = asyncio.get_running_loop().create_task(watcher(db_equora.cache_versions, interval))
+
+
+def stop():
+    global _task, _synced
+    if _task is not None:
+        _task.cancel()
+        _task = None
+    _synced = False
+    _entries.clear()
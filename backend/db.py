@@ -1,14 +1,16 @@
-# db.py
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from pathlib import Path
+from .settings import DB_BACKEND, MONGO_URL
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(dotenv_path=ROOT_DIR / ".env")
-
-mongo_url = os.environ["MONGO_URL"]
-client = AsyncIOMotorClient(mongo_url)
+# Backend selecionado por configuração (DB_BACKEND):
+#   mongo  -> MongoDB real via Motor (padrão)
+#   memory -> backend em memória (db_memory.py), para testes e benchmarks
+if DB_BACKEND == "memory":
+    from .db_memory import MemoryClient
+    client = MemoryClient()
+else:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from .health import pool_stats
+    from .metering import UsageCommandListener
+    client = AsyncIOMotorClient(MONGO_URL, event_listeners=[UsageCommandListener(), pool_stats])
 
 # Múltiplos bancos
 db_gpac = client["gpac"]
@@ -0,0 +1,925 @@
+# -------------------------------------------------------------------
+# Backend MongoDB em memória (DB_BACKEND=memory)
+#
+# Implementa o subconjunto da API do Motor usado pelas rotas, para rodar
+# testes e micro-benchmarks sem nenhum serviço externo:
+#   - find (filtro, projeção, sort, skip, limit) / to_list / async for
+#   - find_one, insert_one, insert_many
+#   - update_one / update_many / replace_one ($set, $unset, $inc,
+#     $setOnInsert, $min, $max, upsert)
+#   - delete_one / delete_many, count_documents, distinct
+#   - bulk_write e aggregate ($match, $sort, $skip, $limit, $project,
+#     $group, $count, $sample, $collStats, $indexStats; expressões
+#     com $substrCP, $ifNull e $dateToString)
+# Os dados vivem apenas no processo; cada cliente tem seus próprios bancos.
+# -------------------------------------------------------------------
+import re
+import random
+from datetime import datetime, timezone
+
+from bson import BSON, ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+
+# -------------------------------------------------------------------
+# Resultados (mesmos atributos dos objetos de pymongo.results)
+# -------------------------------------------------------------------
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+        self.acknowledged = True
+
+
+class BulkWriteResult:
+    def __init__(self):
+        self.inserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.deleted_count = 0
+        self.upserted_count = 0
+        self.upserted_ids = {}
+        self.acknowledged = True
+
+
+# -------------------------------------------------------------------
+# Helpers de documentos
+# -------------------------------------------------------------------
+_MISSING = object()
+
+
+def _copy(value):
+    """Cópia profunda apenas de dicts/listas (bem mais rápida que deepcopy)."""
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _get_path(doc, path):
+    """Valor em um caminho com pontos ('location.city') ou _MISSING."""
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _candidates(doc, path):
+    """Valores candidatos para comparação: como no MongoDB, um campo que é
+    lista também casa elemento a elemento (inclusive em subdocumentos)."""
+    parts = path.split(".")
+    values = [doc]
+    for part in parts:
+        next_values = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    next_values.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    next_values.append(value[int(part)])
+                else:
+                    next_values.extend(v[part] for v in value if isinstance(v, dict) and part in v)
+        values = next_values
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _id_key(value):
+    """Chave hashable para o índice único de _id."""
+    return repr(value) if isinstance(value, (dict, list)) else value
+
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+    target[parts[-1]] = value
+
+
+def _unset_path(doc, path):
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        target = target.get(part)
+        if not isinstance(target, dict):
+            return
+    target.pop(parts[-1], None)
+
+
+# Ordem de comparação entre tipos do BSON (simplificada)
+def _type_rank(value):
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _sort_key(value):
+    if value is _MISSING:
+        value = None
+    rank = _type_rank(value)
+    if rank in (1,):
+        return (rank, 0)
+    if rank in (4, 5):
+        return (rank, repr(value))
+    return (rank, value)
+
+
+def _compare(a, b):
+    ka, kb = _sort_key(a), _sort_key(b)
+    if ka[0] != kb[0]:
+        return None
+    try:
+        return (ka > kb) - (ka < kb)
+    except TypeError:
+        return None
+
+
+_TYPE_ALIASES = {
+    "string": str, 2: str,
+    "double": float, 1: float,
+    "int": int, 16: int, "long": int, 18: int,
+    "bool": bool, 8: bool,
+    "object": dict, 3: dict,
+    "array": list, 4: list,
+    "date": datetime, 9: datetime,
+    "objectId": ObjectId, 7: ObjectId,
+    "null": type(None), 10: type(None),
+}
+
+
+def _matches_type(value, type_spec):
+    specs = type_spec if isinstance(type_spec, list) else [type_spec]
+    for spec in specs:
+        if spec == "number" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return True
+        py_type = _TYPE_ALIASES.get(spec)
+        if py_type is int and isinstance(value, bool):
+            continue
+        if py_type is not None and isinstance(value, py_type):
+            return True
+    return False
+
+
+def _regex(pattern, options=""):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = 0
+    if "i" in options:
+        flags |= re.IGNORECASE
+    if "m" in options:
+        flags |= re.MULTILINE
+    if "s" in options:
+        flags |= re.DOTALL
+    if "x" in options:
+        flags |= re.VERBOSE
+    return re.compile(pattern, flags)
+
+
+def _equals(values, expected):
+    if isinstance(expected, re.Pattern):
+        return any(isinstance(v, str) and expected.search(v) for v in values)
+    return any(v == expected for v in values)
+
+
+def _match_condition(doc, path, condition):
+    values = _candidates(doc, path)
+    if not (isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition)):
+        if condition is None:
+            return not values or any(v is None for v in values)
+        return _equals(values, condition)
+
+    for op, arg in condition.items():
+        if op == "$eq":
+            ok = _equals(values, arg) if arg is not None else (not values or None in values)
+        elif op == "$ne":
+            ok = not (_equals(values, arg) if arg is not None else (not values or None in values))
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            ok = False
+            for v in values:
+                c = _compare(v, arg)
+                if c is None:
+                    continue
+                if (op == "$gt" and c > 0) or (op == "$gte" and c >= 0) \
+                        or (op == "$lt" and c < 0) or (op == "$lte" and c <= 0):
+                    ok = True
+                    break
+        elif op == "$in":
+            ok = any(_equals(values, a) if a is not None else (not values or None in values) for a in arg)
+        elif op == "$nin":
+            ok = not any(_equals(values, a) if a is not None else (not values or None in values) for a in arg)
+        elif op == "$exists":
+            ok = bool(values) == bool(arg)
+        elif op == "$regex":
+            pattern = _regex(arg, condition.get("$options", ""))
+            ok = any(isinstance(v, str) and pattern.search(v) for v in values)
+        elif op == "$options":
+            continue
+        elif op == "$type":
+            ok = any(_matches_type(v, arg) for v in values)
+        elif op == "$not":
+            ok = not _match_condition(doc, path, arg)
+        elif op == "$size":
+            value = _get_path(doc, path)
+            ok = isinstance(value, list) and len(value) == arg
+        elif op == "$all":
+            ok = all(_equals(values, a) for a in arg)
+        elif op == "$elemMatch":
+            value = _get_path(doc, path)
+            ok = isinstance(value, list) and any(
+                _match(v, arg) if isinstance(v, dict) else _match_condition({"v": v}, "v", arg)
+                for v in value
+            )
+        else:
+            raise NotImplementedError(f"Operador de consulta não suportado: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def _match(doc, filter):
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(_match(doc, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(_match(doc, f) for f in condition):
+                return False
+        elif key == "$nor":
+            if any(_match(doc, f) for f in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Operador de consulta não suportado: {key}")
+        elif not _match_condition(doc, key, condition):
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return _copy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    inclusive = any(v for v in fields.values())
+
+    if inclusive:
+        result = {}
+        if include_id and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for path, flag in fields.items():
+            if not flag:
+                continue
+            value = _get_path(doc, path)
+            if value is not _MISSING:
+                _set_path(result, path, _copy(value))
+        return result
+
+    result = _copy(doc)
+    for path in fields:
+        _unset_path(result, path)
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+
+def _normalize_sort(key_or_list, direction=None):
+    if key_or_list is None:
+        return []
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(k, d) for k, d in key_or_list]
+
+
+def _sorted(docs, sort_spec):
+    docs = list(docs)
+    for key, direction in reversed(sort_spec):
+        docs.sort(key=lambda d: _sort_key(_get_path(d, key)), reverse=direction in (-1, "desc", "descending"))
+    return docs
+
+
+def _apply_update(doc, update, inserting=False):
+    """Aplica um documento de update; retorna True se algo mudou."""
+    before = _copy(doc)
+    if not any(k.startswith("$") for k in update):
+        # Substituição completa (replace_one)
+        _id = doc.get("_id")
+        doc.clear()
+        doc.update(_copy(update))
+        if _id is not None:
+            doc["_id"] = _id
+        return doc != before
+
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set_path(doc, path, _copy(value))
+        elif op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(doc, path, _copy(value))
+        elif op == "$unset":
+            for path in fields:
+                _unset_path(doc, path)
+        elif op == "$inc":
+            for path, amount in fields.items():
+                current = _get_path(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING or current is None else current) + amount)
+        elif op in ("$min", "$max"):
+            for path, value in fields.items():
+                current = _get_path(doc, path)
+                c = None if current is _MISSING else _compare(value, current)
+                if current is _MISSING or (c is not None and ((op == "$min" and c < 0) or (op == "$max" and c > 0))):
+                    _set_path(doc, path, _copy(value))
+        elif op == "$addToSet":
+            for path, value in fields.items():
+                current = _get_path(doc, path)
+                items = [] if current is _MISSING or current is None else current
+                values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                for item in values:
+                    if item not in items:
+                        items.append(_copy(item))
+                _set_path(doc, path, items)
+        else:
+            raise NotImplementedError(f"Operador de update não suportado: {op}")
+    return doc != before
+
+
+def _upsert_seed(filter):
+    """Campos de igualdade do filtro usados como base do documento inserido."""
+    seed = {}
+    for key, value in (filter or {}).items():
+        if key == "$and":
+            for sub in value:
+                seed.update(_upsert_seed(sub))
+        elif key.startswith("$"):
+            continue
+        elif isinstance(value, dict) and value and all(k.startswith("$") for k in value):
+            if "$eq" in value:
+                _set_path(seed, key, _copy(value["$eq"]))
+        else:
+            _set_path(seed, key, _copy(value))
+    return seed
+
+
+# -------------------------------------------------------------------
+# Expressões e pipeline de agregação
+# -------------------------------------------------------------------
+def _substr(args):
+    value, start, length = args
+    return "" if value is None else str(value)[start:start + length]
+
+
+def _if_null(args):
+    for value in args:
+        if value is not None:
+            return value
+    return None
+
+
+def _date_to_string(args):
+    date = args.get("date")
+    if date is None:
+        return None
+    if not isinstance(date, datetime):
+        # Como o MongoDB: só aceita datas (ou null)
+        raise OperationFailure(f"$dateToString requer uma data, recebeu {type(date).__name__}")
+    fmt = args.get("format", "%Y-%m-%dT%H:%M:%S.%LZ").replace("%L", f"{date.microsecond // 1000:03d}")
+    return date.strftime(fmt)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    raise ValueError(value)
+
+
+def _convert(args):
+    """$convert, só para "date" (o que as rotas usam)."""
+    if args.get("to") != "date":
+        raise NotImplementedError(f"$convert para {args.get('to')!r} não suportado")
+    value = args.get("input")
+    if value is None:
+        return args.get("onNull")
+    try:
+        return _to_date(value)
+    except (ValueError, OverflowError, OSError):
+        if "onError" not in args:
+            raise OperationFailure(f"$convert: não foi possível converter {value!r} para data")
+        return args["onError"]
+
+
+# Operadores de expressão suportados
+_OPERATORS = {
+    "$convert": _convert,
+    "$substrCP": _substr,
+    "$ifNull": _if_null,
+    "$dateToString": _date_to_string,
+}
+
+
+def _eval(expr, doc):
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = _get_path(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict):
+        if len(expr) == 1 and next(iter(expr)) in _OPERATORS:
+            (op, args), = expr.items()
+            return _OPERATORS[op](_eval(args, doc))
+        return {k: _eval(v, doc) for k, v in expr.items()}
+    if isinstance(expr, list):
+        return [_eval(v, doc) for v in expr]
+    return expr
+
+
+def _group(docs, spec):
+    groups = {}
+    order = []
+    for doc in docs:
+        key = _eval(spec["_id"], doc)
+        hashable = repr(key)
+        if hashable not in groups:
+            groups[hashable] = {"_id": key, "__state": {}}
+            order.append(hashable)
+        group = groups[hashable]
+        for field, acc in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = acc.items()
+            value = _eval(arg, doc)
+            state = group["__state"]
+            if op == "$sum":
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    group[field] = group.get(field, 0) + value
+                else:
+                    group.setdefault(field, 0)
+            elif op == "$avg":
+                total, count = state.get(field, (0, 0))
+                if isinstance(value, (int, float)):
+                    total, count = total + value, count + 1
+                state[field] = (total, count)
+                group[field] = total / count if count else None
+            elif op in ("$min", "$max"):
+                current = group.get(field, _MISSING)
+                if value is not None and (current is _MISSING or current is None or
+                                          (_compare(value, current) or 0) * (1 if op == "$max" else -1) > 0):
+                    group[field] = value
+                else:
+                    group.setdefault(field, None)
+            elif op == "$first":
+                group.setdefault(field, value)
+            elif op == "$last":
+                group[field] = value
+            elif op == "$push":
+                group.setdefault(field, []).append(value)
+            elif op == "$addToSet":
+                items = group.setdefault(field, [])
+                if value not in items:
+                    items.append(value)
+            else:
+                raise NotImplementedError(f"Acumulador não suportado: {op}")
+    results = []
+    for hashable in order:
+        group = groups[hashable]
+        group.pop("__state")
+        results.append(group)
+    return results
+
+
+def _aggregate(docs, pipeline):
+    docs = [_copy(d) for d in docs]
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [d for d in docs if _match(d, spec)]
+        elif name == "$sort":
+            docs = _sorted(docs, _normalize_sort(spec))
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$project":
+            computed = {k: v for k, v in spec.items() if not isinstance(v, (int, bool))}
+            plain = {k: v for k, v in spec.items() if isinstance(v, (int, bool))}
+            if computed or any(v for k, v in plain.items() if k != "_id"):
+                # Projeção de inclusão (com ou sem campos calculados)
+                include_id = plain.get("_id", 1)
+                included = [k for k, v in plain.items() if k != "_id" and v]
+                projected = []
+                for d in docs:
+                    out = {"_id": d["_id"]} if include_id and "_id" in d else {}
+                    for path in included:
+                        value = _get_path(d, path)
+                        if value is not _MISSING:
+                            _set_path(out, path, value)
+                    for k, v in computed.items():
+                        _set_path(out, k, _eval(v, d))
+                    projected.append(out)
+                docs = projected
+            else:
+                docs = [_project(d, plain) for d in docs]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        elif name == "$count":
+            docs = [{spec: len(docs)}]
+        elif name == "$sample":
+            docs = random.sample(docs, min(spec.get("size", 0), len(docs)))
+        else:
+            raise NotImplementedError(f"Estágio de agregação não suportado: {name}")
+    return docs
+
+
+# -------------------------------------------------------------------
+# Cursor
+# -------------------------------------------------------------------
+class MemoryCursor:
+    def __init__(self, loader):
+        self._loader = loader
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+        self._index = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, skip):
+        self._skip = skip
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size):
+        return self
+
+    def _evaluate(self):
+        if self._results is None:
+            self._results = self._loader(self._sort, self._skip, self._limit)
+        return self._results
+
+    async def to_list(self, length=None):
+        results = self._evaluate()[self._index:]
+        if length:
+            results = results[:length]
+        self._index += len(results)
+        return results
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        results = self._evaluate()
+        if self._index >= len(results):
+            raise StopAsyncIteration
+        doc = results[self._index]
+        self._index += 1
+        return doc
+
+    async def close(self):
+        self._results = []
+
+
+# -------------------------------------------------------------------
+# Coleção / Banco / Cliente
+# -------------------------------------------------------------------
+class MemoryCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.full_name = f"{database.name}.{name}"
+        self._docs = []
+        self._ids = set()
+        self._indexes = {"_id_": [("_id", 1)]}
+        self._index_options = {}
+
+    def __getitem__(self, name):
+        return self.database[f"{self.name}.{name}"]
+
+    def with_options(self, **kwargs):
+        return self
+
+    # ---- leitura ----
+    def find(self, filter=None, projection=None, skip=0, limit=0, sort=None, **kwargs):
+        def loader(sort_spec, skip, limit):
+            docs = [d for d in self._docs if _match(d, filter)]
+            if sort_spec:
+                docs = _sorted(docs, sort_spec)
+            # Recorta antes de projetar/copiar (a cópia é a parte cara)
+            docs = docs[skip:skip + limit] if limit else docs[skip:]
+            return [_project(d, projection) for d in docs]
+
+        cursor = MemoryCursor(loader).skip(skip).limit(limit)
+        if sort:
+            cursor.sort(sort)
+        return cursor
+
+    async def find_one(self, filter=None, projection=None, *args, sort=None, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        docs = await self.find(filter, projection, sort=sort).limit(1).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter=None, **kwargs):
+        docs = [d for d in self._docs if _match(d, filter)]
+        skip, limit = kwargs.get("skip", 0), kwargs.get("limit", 0)
+        docs = docs[skip:]
+        return len(docs[:limit] if limit else docs)
+
+    async def estimated_document_count(self, **kwargs):
+        return len(self._docs)
+
+    async def distinct(self, key, filter=None, **kwargs):
+        values = []
+        for doc in self._docs:
+            if not _match(doc, filter):
+                continue
+            value = _get_path(doc, key)
+            if value is _MISSING:
+                continue
+            for v in (value if isinstance(value, list) else [value]):
+                if v not in values:
+                    values.append(_copy(v))
+        return values
+
+    def aggregate(self, pipeline, **kwargs):
+        if pipeline and next(iter(pipeline[0])) in ("$collStats", "$indexStats"):
+            # Estágios de diagnóstico: geram os documentos a partir da coleção
+            source = self._coll_stats() if "$collStats" in pipeline[0] else self._index_stats()
+            return MemoryCursor(lambda _sort, _skip, _limit: _aggregate(source, pipeline[1:]))
+        return MemoryCursor(lambda _sort, _skip, _limit: _aggregate(self._docs, pipeline))
+
+    def _coll_stats(self):
+        size = sum(len(BSON.encode(d)) for d in self._docs)
+        count = len(self._docs)
+        return [{
+            "ns": self.full_name,
+            "storageStats": {
+                "count": count,
+                "size": size,
+                "avgObjSize": size // count if count else 0,
+                "storageSize": size,
+                "totalIndexSize": 0,
+                "indexSizes": {name: 0 for name in self._indexes},
+            },
+        }]
+
+    def _index_stats(self):
+        since = datetime.utcnow()
+        return [
+            {"name": name, "key": dict(keys), "accesses": {"ops": 0, "since": since}}
+            for name, keys in self._indexes.items()
+        ]
+
+    # ---- escrita ----
+    async def insert_one(self, document, **kwargs):
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        key = _id_key(document["_id"])
+        if key in self._ids:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.full_name} _id: {document['_id']!r}", 11000,
+            )
+        self._ids.add(key)
+        self._docs.append(_copy(document))
+        return InsertOneResult(document["_id"])
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        # Como o pymongo: erros por documento viram um BulkWriteError; com
+        # ordered=False os demais documentos são gravados mesmo assim
+        ids = []
+        errors = []
+        for index, document in enumerate(documents):
+            try:
+                ids.append((await self.insert_one(document)).inserted_id)
+            except DuplicateKeyError as exc:
+                errors.append({"index": index, "code": exc.code, "errmsg": str(exc), "op": document})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(ids), "writeConcernErrors": []})
+        return InsertManyResult(ids)
+
+    async def _update(self, filter, update, upsert, many):
+        matched = modified = 0
+        for doc in self._docs:
+            if not _match(doc, filter):
+                continue
+            matched += 1
+            if _apply_update(doc, update):
+                modified += 1
+            if not many:
+                break
+        if matched or not upsert:
+            return UpdateResult(matched, modified)
+        doc = _upsert_seed(filter)
+        _apply_update(doc, update, inserting=True)
+        result = await self.insert_one(doc)
+        return UpdateResult(0, 0, result.inserted_id)
+
+    async def update_one(self, filter, update, upsert=False, **kwargs):
+        return await self._update(filter, update, upsert, many=False)
+
+    async def update_many(self, filter, update, upsert=False, **kwargs):
+        return await self._update(filter, update, upsert, many=True)
+
+    async def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        if any(k.startswith("$") for k in replacement):
+            raise ValueError("replace_one não aceita operadores de update")
+        return await self._update(filter, replacement, upsert, many=False)
+
+    async def _delete(self, filter, many):
+        kept, deleted = [], 0
+        for doc in self._docs:
+            if (many or not deleted) and _match(doc, filter):
+                deleted += 1
+                self._ids.discard(_id_key(doc["_id"]))
+            else:
+                kept.append(doc)
+        self._docs = kept
+        return DeleteResult(deleted)
+
+    async def delete_one(self, filter, **kwargs):
+        return await self._delete(filter, many=False)
+
+    async def delete_many(self, filter, **kwargs):
+        return await self._delete(filter, many=True)
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        """Aceita as operações de pymongo (InsertOne, UpdateOne, ...)."""
+        result = BulkWriteResult()
+        for index, op in enumerate(requests):
+            kind = type(op).__name__
+            if kind == "InsertOne":
+                await self.insert_one(op._doc)
+                result.inserted_count += 1
+                continue
+            if kind in ("DeleteOne", "DeleteMany"):
+                res = await self._delete(op._filter, many=kind == "DeleteMany")
+                result.deleted_count += res.deleted_count
+                continue
+            if kind in ("UpdateOne", "UpdateMany", "ReplaceOne"):
+                res = await self._update(op._filter, op._doc, op._upsert, many=kind == "UpdateMany")
+            else:
+                raise NotImplementedError(f"Operação de bulk_write não suportada: {kind}")
+            result.matched_count += res.matched_count
+            result.modified_count += res.modified_count
+            if res.upserted_id is not None:
+                result.upserted_count += 1
+                result.upserted_ids[index] = res.upserted_id
+        return result
+
+    # ---- administração ----
+    async def create_index(self, keys, **kwargs):
+        keys = _normalize_sort(keys, 1)
+        name = kwargs.get("name") or "_".join(f"{k}_{d}" for k, d in keys)
+        self._indexes[name] = keys
+        self._index_options[name] = {k: v for k, v in kwargs.items() if k != "name"}
+        return name
+
+    async def create_indexes(self, indexes, **kwargs):
+        names = []
+        for model in indexes:
+            document = model.document
+            options = {k: v for k, v in document.items() if k != "key"}
+            names.append(await self.create_index(list(document["key"].items()), **options))
+        return names
+
+    async def index_information(self):
+        return {name: {"key": keys, **self._index_options.get(name, {})} for name, keys in self._indexes.items()}
+
+    async def drop(self):
+        await self.database.drop_collection(self.name)
+
+
+class MemoryDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name, **kwargs):
+        return self[name]
+
+    def with_options(self, **kwargs):
+        return self
+
+    async def list_collection_names(self, **kwargs):
+        return [name for name, coll in self._collections.items() if coll._docs]
+
+    async def drop_collection(self, name):
+        collection = self._collections.get(getattr(name, "name", name))
+        if collection is not None:
+            # Esvazia o mesmo objeto: referências guardadas (readpref.reads)
+            # não podem continuar vendo os documentos removidos
+            collection.__init__(self, collection.name)
+
+    async def command(self, command, *args, **kwargs):
+        name = command if isinstance(command, str) else next(iter(command))
+        if name in ("ping", "ismaster", "isMaster", "hello"):
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Comando não suportado pelo backend em memória: {name}")
+
+
+class MemoryClient:
+    """Substituto de AsyncIOMotorClient para DB_BACKEND=memory."""
+
+    def __init__(self, *args, **kwargs):
+        self._databases = {}
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(self, name)
+        return self._databases[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_database(self, name, **kwargs):
+        return self[name]
+
+    async def list_database_names(self):
+        return list(self._databases)
+
+    async def drop_database(self, name):
+        self._databases.pop(getattr(name, "name", name), None)
+
+    def close(self):
+        pass
@@ -0,0 +1,179 @@
+# -------------------------------------------------------------------
+# Relatório de coleções e uso de índices
+#
+# Para cada coleção dos quatro bancos reúne $collStats (tamanho, tamanho
+# médio dos documentos, tamanho dos índices), a contagem estimada e
+# $indexStats, e aponta:
+#   - índices sem uso desde o último restart do mongod
+#   - índices recomendados (indexes.py) que não existem
+#   - documentos grandes, com os campos que mais pesam (amostra)
+#   - coleções que crescem sem política de retenção (TTL)
+#
+# Usado por `manage.py report` e por GET /admin/db/report.
+# -------------------------------------------------------------------
+from datetime import datetime, timedelta
+
+from bson import BSON
+
+from . import access_partitions
+from .db import db_gpac, db_bkautocenter, db_agua_na_boca, db_equora
+from .indexes import INDEXES, PARTITION_INDEXES
+from .settings import REPORT_LARGE_DOC_BYTES, REPORT_SAMPLE_SIZE, STATS_ACCESS_RETENTION_MONTHS
+
+DATABASES = {
+    "gpac": db_gpac,
+    "bkautocenter": db_bkautocenter,
+    "aguanaboca": db_agua_na_boca,
+    "equora": db_equora,
+}
+
+# Coleções append-only e o campo de data usado para medir o crescimento
+GROWTH_FIELDS = {
+    ("equora", "stats_access"): "timestamp",
+    ("bkautocenter", "orders"): "created_at",
+    ("gpac", "agendamentos"): "createdAt",
+}
+
+
+# -------------------------------------------------------------------
+# Coleta
+# -------------------------------------------------------------------
+async def _coll_stats(collection):
+    try:
+        docs = await collection.aggregate([{"$collStats": {"storageStats": {}}}]).to_list(None)
+    except Exception:
+        return {}
+    return docs[0].get("storageStats", {}) if docs else {}
+
+
+async def _index_stats(collection):
+    try:
+        docs = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+    except Exception:
+        return {}
+    return {d["name"]: d for d in docs}
+
+
+async def _sample_sizes(collection, sample_size):
+    """Tamanho BSON dos documentos amostrados e peso médio por campo."""
+    docs = await collection.aggregate([{"$sample": {"size": sample_size}}]).to_list(None)
+    if not docs:
+        return {"sampled": 0, "max_doc_size": 0, "large_docs": 0, "heaviest_fields": []}
+    sizes = [len(BSON.encode(d)) for d in docs]
+    fields = {}
+    for doc in docs:
+        for key, value in doc.items():
+            fields[key] = fields.get(key, 0) + len(BSON.encode({key: value}))
+    heaviest = sorted(fields.items(), key=lambda kv: kv[1], reverse=True)[:3]
+    return {
+        "sampled": len(docs),
+        "max_doc_size": max(sizes),
+        "large_docs": sum(1 for s in sizes if s >= REPORT_LARGE_DOC_BYTES),
+        "heaviest_fields": [
+            {"field": k, "avg_bytes": total // len(docs), "share": round(total / sum(sizes), 3)}
+            for k, total in heaviest
+        ],
+    }
+
+
+async def _growth(collection, field):
+    now = datetime.utcnow()
+    last_day = await collection.count_documents({field: {"$gte": now - timedelta(days=1)}})
+    last_week = await collection.count_documents({field: {"$gte": now - timedelta(days=7)}})
+    return {"field": field, "last_24h": last_day, "last_7d": last_week, "per_day": round(last_week / 7, 1)}
+
+
+def _base_name(db_name, coll_name):
+    """Partições mensais (stats_access_AAAA_MM) seguem a definição de stats_access."""
+    if db_name == "equora" and access_partitions.is_partition(coll_name):
+        return access_partitions.LEGACY
+    return coll_name
+
+
+def _recommended(db_name, coll_name):
+    if _base_name(db_name, coll_name) != coll_name:
+        return [m.document for m in PARTITION_INDEXES]
+    return [m.document for m in INDEXES.get(db_name, {}).get(coll_name, [])]
+
+
+# -------------------------------------------------------------------
+# Relatório
+# -------------------------------------------------------------------
+async def collection_report(db_name, coll_name, sample_size=REPORT_SAMPLE_SIZE):
+    collection = DATABASES[db_name][coll_name]
+    stats = await _coll_stats(collection)
+    index_info = await collection.index_information()
+    usage = await _index_stats(collection)
+    sample = await _sample_sizes(collection, sample_size)
+    field = GROWTH_FIELDS.get((db_name, _base_name(db_name, coll_name)))
+    growth = await _growth(collection, field) if field else None
+
+    indexes = []
+    for name, info in index_info.items():
+        accesses = usage.get(name, {}).get("accesses", {})
+        indexes.append({
+            "name": name,
+            "key": dict(info["key"]),
+            "size": stats.get("indexSizes", {}).get(name),
+            "ops": accesses.get("ops"),
+            "since": accesses.get("since"),
+            "ttl": "expireAfterSeconds" in info,
+        })
+
+    flags = []
+    for index in indexes:
+        # _id_ e TTL não aparecem como "usados" pelas consultas, mas são necessários
+        if index["ops"] == 0 and index["name"] != "_id_" and not index["ttl"]:
+            flags.append(f"índice sem uso: {index['name']} (desde {index['since']})")
+    existing_keys = [[tuple(k) for k in info["key"]] for info in index_info.values()]
+    for doc in _recommended(db_name, coll_name):
+        if list(doc["key"].items()) not in existing_keys:
+            flags.append(f"índice recomendado ausente: {doc['name']}")
+    if sample["large_docs"]:
+        top = sample["heaviest_fields"][0]
+        flags.append(
+            f"{sample['large_docs']}/{sample['sampled']} documentos amostrados >= {REPORT_LARGE_DOC_BYTES} bytes"
+            f" (maior: {sample['max_doc_size']}; campo '{top['field']}' = {top['share']:.0%} do volume)"
+        )
+    # Partições mensais têm retenção por drop (access_partitions.py), sem TTL
+    retained = any(index["ttl"] for index in indexes) or (
+        _base_name(db_name, coll_name) != coll_name and STATS_ACCESS_RETENTION_MONTHS > 0
+    )
+    if growth and growth["per_day"] and not retained:
+        projected = growth["per_day"] * 30 * stats.get("avgObjSize", 0)
+        flags.append(
+            f"crescimento sem retenção: ~{growth['per_day']:.0f} docs/dia"
+            f" (~{projected / 1024 / 1024:.1f} MiB/mês)"
+        )
+
+    return {
+        "database": db_name,
+        "collection": coll_name,
+        "estimated_count": await collection.estimated_document_count(),
+        "size": stats.get("size"),
+        "avg_obj_size": stats.get("avgObjSize"),
+        "storage_size": stats.get("storageSize"),
+        "total_index_size": stats.get("totalIndexSize"),
+        "indexes": indexes,
+        "sample": sample,
+        "growth": growth,
+        "flags": flags,
+    }
+
+
+async def build_report(databases=None, sample_size=REPORT_SAMPLE_SIZE):
+    """Relatório de todas as coleções (ou só dos bancos em `databases`)."""
+    collections = []
+    for db_name, database in DATABASES.items():
+        if databases and db_name not in databases:
+            continue
+        names = set(await database.list_collection_names()) | set(INDEXES.get(db_name, {}))
+        for coll_name in sorted(names):
+            if coll_name.startswith("system."):
+                continue
+            collections.append(await collection_report(db_name, coll_name, sample_size))
+    return {
+        "generated_at": datetime.utcnow(),
+        "collections": collections,
+        "flags": [f"{c['database']}.{c['collection']}: {f}" for c in collections for f in c["flags"]],
+    }
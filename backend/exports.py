@@ -0,0 +1,81 @@
+# -------------------------------------------------------------------
+# Exportação em streaming (NDJSON ou CSV, gzip opcional)
+#
+# As linhas são geradas conforme o cursor entrega cada lote e enviadas
+# em pedaços de ~EXPORT_CHUNK_BYTES: a memória usada não depende do
+# tamanho da exportação. Com gzip, cada pedaço passa por um compressor
+# incremental (zlib com cabeçalho gzip) antes de sair.
+#
+#   body = stream_rows(cursor, to_row, FIELDS, "csv", compress=True)
+#   return StreamingResponse(body, media_type=media_type("csv"), headers=...)
+# -------------------------------------------------------------------
+import csv
+import io
+import json
+import zlib
+
+from .settings import EXPORT_CHUNK_BYTES
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+
+def media_type(fmt, compress=False):
+    return "application/gzip" if compress else FORMATS[fmt][0]
+
+
+def filename(base, fmt, compress=False):
+    return f"{base}.{FORMATS[fmt][1]}" + (".gz" if compress else "")
+
+
+class _CsvLine:
+    """Formata uma linha CSV por vez (csv.writer num buffer reaproveitado)."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def __call__(self, values):
+        self._writer.writerow(["" if v is None else v for v in values])
+        line = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return line
+
+
+async def _lines(cursor, to_row, fields, fmt):
+    if fmt == "csv":
+        line = _CsvLine()
+        yield line(fields)
+        async for doc in cursor:
+            row = to_row(doc)
+            yield line([row.get(f) for f in fields])
+    else:
+        async for doc in cursor:
+            yield json.dumps(to_row(doc), ensure_ascii=False, default=str) + "\n"
+
+
+async def stream_rows(cursor, to_row, fields, fmt="ndjson", compress=False, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Pedaços (bytes) da exportação dos documentos do cursor."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending = []
+    size = 0
+    async for text in _lines(cursor, to_row, fields, fmt):
+        data = text.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
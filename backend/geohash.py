@@ -0,0 +1,155 @@
+# -------------------------------------------------------------------
+# Geohash (base32) para o agrupamento do mapa de acessos
+#
+# Cada acesso com coordenadas guarda o geohash de GEOHASH_PRECISION
+# caracteres (campo `geohash`). Prefixos do geohash são células da
+# grade: quanto menor o prefixo, maior a célula. O mapa agrupa os
+# acessos pelo prefixo cujo tamanho vem do zoom (precision_for_zoom) e
+# o filtro da área visível vira poucos intervalos de prefixo
+# (covering_ranges), que o índice {geohash: 1} resolve.
+# -------------------------------------------------------------------
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+# Precisão gravada em cada acesso (~5 m)
+GEOHASH_PRECISION = 9
+# Zoom do Leaflet -> tamanho do prefixo usado para agrupar
+_ZOOM_PRECISION = [1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7, 8, 8, 8]
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # bits pares refinam a longitude
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def bounds(geohash):
+    """(sul, oeste, norte, leste) da célula."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if value >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def center(geohash):
+    south, west, north, east = bounds(geohash)
+    return (south + north) / 2, (west + east) / 2
+
+
+def cell_size(precision):
+    """(altura, largura) em graus de uma célula com `precision` caracteres."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** math.ceil(bits / 2)
+
+
+def from_location(location):
+    """Geohash de um documento de localização; None sem coordenadas numéricas."""
+    if not isinstance(location, dict):
+        return None
+    lat, lon = location.get("latitude"), location.get("longitude")
+    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return encode(lat, lon)
+
+
+def precision_for_zoom(zoom):
+    return _ZOOM_PRECISION[max(0, min(int(zoom), len(_ZOOM_PRECISION) - 1))]
+
+
+def split_bbox(south, west, north, east):
+    """A caixa como lista de caixas sem cruzar o antimeridiano."""
+    if west <= east:
+        return [(south, west, north, east)]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def _estimate(box, precision):
+    south, west, north, east = box
+    height, width = cell_size(precision)
+    return (math.floor((north - south) / height) + 2) * (math.floor((east - west) / width) + 2)
+
+
+def _cells(box, precision):
+    south, west, north, east = box
+    height, width = cell_size(precision)
+    cells = set()
+    lat = south
+    while True:
+        lon = west
+        while True:
+            cells.add(encode(min(lat, 90.0), min(lon, 180.0 - 1e-9), precision))
+            if lon >= east:
+                break
+            lon = min(lon + width, east)
+        if lat >= north:
+            break
+        lat = min(lat + height, north)
+    return cells
+
+
+def covering_ranges(south, west, north, east, precision, max_ranges=32):
+    """Intervalos [início, fim) de geohash que cobrem a caixa.
+
+    Usa o maior prefixo (até `precision`) que cubra a caixa com no máximo
+    `max_ranges` células; prefixos vizinhos viram um intervalo só.
+    """
+    boxes = split_bbox(south, west, north, east)
+    for p in range(precision, 0, -1):
+        # Estimativa barata antes de enumerar (a caixa pode ser o mundo todo)
+        if p > 1 and sum(_estimate(box, p) for box in boxes) > 4 * max_ranges:
+            continue
+        cells = set()
+        for box in boxes:
+            cells |= _cells(box, p)
+            if len(cells) > max_ranges:
+                break
+        if len(cells) <= max_ranges or p == 1:
+            break
+    ranges = []
+    for cell in sorted(cells):
+        start, end = cell, _next_prefix(cell)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def _next_prefix(prefix):
+    """Menor string maior que todas as que começam com `prefix`."""
+    while prefix:
+        last = prefix[-1]
+        if last != BASE32[-1]:
+            return prefix[:-1] + BASE32[_DECODE[last] + 1]
+        prefix = prefix[:-1]
+    # "zzz...": tudo até o fim do alfabeto
+    return "~"
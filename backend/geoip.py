@@ -0,0 +1,161 @@
+# -------------------------------------------------------------------
+# Localização de IPs (GeoLite2-City) compartilhada pelo processo
+#
+# O arquivo .mmdb é aberto uma única vez, em modo mmap (as páginas ficam
+# no page cache do SO e são compartilhadas entre os workers), e os
+# resultados recentes ficam num LRU: a maior parte do tráfego vem de
+# visitantes que voltam. IPs privados, inválidos ou ausentes da base
+# também entram no cache (resultado None), para não repetir a busca.
+#
+# Recarga a quente: no máximo a cada GEOIP_RELOAD_CHECK_SECONDS o
+# arquivo é verificado (mtime/inode/tamanho); se mudou, um leitor novo é
+# aberto, o cache é limpo e o leitor antigo fechado. Para trocar a base
+# sem risco, grave o arquivo novo ao lado e faça `mv` por cima (rename
+# atômico) em vez de sobrescrever o arquivo mapeado.
+#
+# Usado pelo beacon de acesso (admin_equora) e pelo backfill do manage.py:
+#   geoip.lookup("200.1.2.3") -> {"country", "city", "latitude", "longitude"} | None
+# -------------------------------------------------------------------
+import ipaddress
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .settings import GEOIP_CACHE_SIZE, GEOIP_DB_PATH, GEOIP_RELOAD_CHECK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _is_public(ip):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return address.is_global
+
+
+class GeoIPLocator:
+    def __init__(self, path=GEOIP_DB_PATH, cache_size=GEOIP_CACHE_SIZE, check_every=GEOIP_RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.cache_size = cache_size
+        self.check_every = check_every
+        self._reader = None
+        self._signature = None
+        self._checked_at = None
+        # ip -> localização (ou None)
+        self._cache = OrderedDict()
+        # O backfill do manage.py e o executor padrão podem chamar de threads
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "negative": 0, "reloads": 0}
+
+    # ---- leitor ----
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_every:
+            return
+        self._checked_at = now
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        reader = None
+        if signature is not None:
+            import geoip2.database
+            import maxminddb
+            try:
+                reader = geoip2.database.Reader(self.path, mode=maxminddb.MODE_MMAP)
+            except Exception:
+                # Arquivo ainda sendo copiado ou corrompido: tenta de novo no próximo intervalo
+                logger.exception("Falha ao abrir a base GeoIP", extra={"path": self.path})
+                return
+        old, self._reader = self._reader, reader
+        if self._signature is not None:
+            self.stats["reloads"] += 1
+        self._signature = signature
+        self._cache.clear()
+        if old is not None:
+            old.close()
+        if reader is None:
+            logger.warning("Base GeoIP não encontrada", extra={"path": self.path})
+        else:
+            logger.info("Base GeoIP carregada", extra={
+                "path": self.path,
+                "build_epoch": reader.metadata().build_epoch,
+            })
+
+    def available(self):
+        with self._lock:
+            self._maybe_reload()
+            return self._reader is not None
+
+    # ---- consulta ----
+    def _resolve(self, ip):
+        if self._reader is None or not _is_public(ip):
+            return None
+        try:
+            res = self._reader.city(ip)
+        except Exception:
+            # AddressNotFoundError e afins
+            return None
+        if res.location.latitude is None or res.location.longitude is None:
+            return None
+        return {
+            "country": res.country.name,
+            "city": res.city.name,
+            "latitude": float(res.location.latitude),
+            "longitude": float(res.location.longitude),
+        }
+
+    def lookup(self, ip):
+        """Localização de um IP; None para IP privado, inválido ou não encontrado."""
+        if not ip:
+            return None
+        with self._lock:
+            self._maybe_reload()
+            cached = self._cache.get(ip, _MISSING)
+            if cached is not _MISSING:
+                self._cache.move_to_end(ip)
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
+            location = self._resolve(ip)
+            if location is None:
+                self.stats["negative"] += 1
+            self._cache[ip] = location
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return location
+
+    def snapshot(self):
+        return {
+            "path": self.path,
+            "loaded": self._reader is not None,
+            "cached": len(self._cache),
+            **self.stats,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+            self._reader = None
+            self._signature = None
+            self._checked_at = None
+            self._cache.clear()
+
+
+locator = GeoIPLocator()
+
+
+def lookup(ip):
+    return locator.lookup(ip)
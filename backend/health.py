@@ -0,0 +1,222 @@
+# -------------------------------------------------------------------
+# Saúde do worker: liveness, readiness e visão detalhada
+#
+#   GET /healthz -> o processo responde (não toca no banco)
+#   GET /readyz  -> 200 só se o worker pode receber tráfego:
+#                   - ping no MongoDB abaixo de HEALTH_PING_TIMEOUT_MS
+#                   - pool de conexões abaixo de HEALTH_MAX_POOL_SATURATION
+#                   - lag do event loop abaixo de HEALTH_MAX_LOOP_LAG_MS
+#                   - warm-up do startup concluído
+#                   senão 503 com o motivo, para o balanceador desviar
+#   GET /admin/health -> tudo acima e mais detalhes (sessão de admin)
+#
+# O pool é acompanhado por um ConnectionPoolListener do pymongo (chamado
+# nas threads do driver, por isso o lock) e o lag por uma tarefa que
+# dorme um intervalo fixo e mede o atraso ao acordar.
+# -------------------------------------------------------------------
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from pymongo import monitoring
+
+from .settings import (
+    DB_BACKEND,
+    HEALTH_LAG_INTERVAL_SECONDS,
+    HEALTH_MAX_LOOP_LAG_MS,
+    HEALTH_MAX_POOL_SATURATION,
+    HEALTH_PING_TIMEOUT_MS,
+)
+
+_started_at = time.monotonic()
+_warm = False
+_lag_task = None
+# Atrasos recentes do event loop, em segundos
+_lags = deque(maxlen=120)
+
+
+def mark_warm():
+    """Chamado ao fim do startup (caches, snapshot e tarefas de fundo)."""
+    global _warm
+    _warm = True
+
+
+# -------------------------------------------------------------------
+# Pool de conexões
+# -------------------------------------------------------------------
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Conexões em uso e requisições esperando por uma conexão. Cada
+    servidor do replica set tem o seu pool (com max_pool_size próprio), por
+    isso as conexões em uso também são contadas por endereço."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.checked_out_by_server = {}
+        self.waiting = 0
+        self.open = 0
+        self.checkout_failures = 0
+
+    def _add(self, field, delta):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def connection_check_out_started(self, event):
+        self._add("waiting", 1)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            by_server = self.checked_out_by_server
+            by_server[event.address] = by_server.get(event.address, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+            by_server = self.checked_out_by_server
+            by_server[event.address] = by_server.get(event.address, 0) - 1
+
+    def busiest(self):
+        """Maior número de conexões em uso num mesmo servidor."""
+        with self._lock:
+            return max(self.checked_out_by_server.values(), default=0)
+
+    def connection_created(self, event):
+        self._add("open", 1)
+
+    def connection_closed(self, event):
+        self._add("open", -1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_stats = PoolStatsListener()
+
+
+def pool_snapshot(client):
+    """Uso do pool; None no backend em memória (sem pool)."""
+    if DB_BACKEND == "memory":
+        return None
+    # max_pool_size vale por servidor: a saturação é a do pool mais cheio
+    max_size = client.options.pool_options.max_pool_size
+    busiest = pool_stats.busiest()
+    return {
+        "max_pool_size": max_size,
+        "open": pool_stats.open,
+        "checked_out": pool_stats.checked_out,
+        "checked_out_max_server": busiest,
+        "waiting": pool_stats.waiting,
+        "checkout_failures": pool_stats.checkout_failures,
+        "saturation": round(busiest / max_size, 3) if max_size else None,
+    }
+
+
+# -------------------------------------------------------------------
+# Lag do event loop
+# -------------------------------------------------------------------
+async def _measure_lag(interval):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        _lags.append(max(0.0, loop.time() - start - interval))
+
+
+def start(interval=HEALTH_LAG_INTERVAL_SECONDS):
+    global _lag_task
+    if _lag_task is None:
+        _lag_task = asyncio.get_running_loop().create_task(_measure_lag(interval))
+
+
+def stop():
+    global _lag_task
+    if _lag_task is not None:
+        _lag_task.cancel()
+        _lag_task = None
+
+
+def loop_lag_ms():
+    """Maior atraso entre as últimas 5 medições (reage rápido a travamentos)."""
+    if not _lags:
+        return None
+    return round(max(list(_lags)[-5:]) * 1000, 2)
+
+
+# -------------------------------------------------------------------
+# Verificações
+# -------------------------------------------------------------------
+async def ping(client):
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), HEALTH_PING_TIMEOUT_MS / 1000)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": "timeout"}
+    except Exception as e:
+        return {"ok": False, "error": type(e).__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+async def readiness(client):
+    """(pronto?, verificações)."""
+    mongo = await ping(client)
+    pool = pool_snapshot(client)
+    lag = loop_lag_ms()
+    checks = {
+        "mongo": mongo,
+        "pool": {
+            "ok": pool is None or pool["saturation"] is None or pool["saturation"] < HEALTH_MAX_POOL_SATURATION,
+            "saturation": pool and pool["saturation"],
+        },
+        "loop_lag": {"ok": lag is None or lag < HEALTH_MAX_LOOP_LAG_MS, "ms": lag},
+        "warm": {"ok": _warm},
+    }
+    return all(c["ok"] for c in checks.values()), checks
+
+
+async def details(client):
+    """Visão completa para o painel admin."""
+    from . import admission, beacons, cache, geoip, metering, refdata
+
+    ready, checks = await readiness(client)
+    lags = sorted(_lags)
+    return {
+        "ready": ready,
+        "checks": checks,
+        "pid": os.getpid(),
+        "uptime_s": round(time.monotonic() - _started_at, 1),
+        "pool": pool_snapshot(client),
+        "loop_lag_ms": {
+            "last": round(_lags[-1] * 1000, 2) if _lags else None,
+            "p50": round(lags[len(lags) // 2] * 1000, 2) if lags else None,
+            "max": round(lags[-1] * 1000, 2) if lags else None,
+            "samples": len(lags),
+        },
+        "tasks": len(asyncio.all_tasks()),
+        "admission": admission.controller.snapshot(),
+        "cache": {"synced": cache._synced, "entries": len(cache._entries)},
+        "refdata": {"loaded": refdata._snapshot is not None},
+        "geoip": geoip.locator.snapshot(),
+        "usage_pending": len(metering._counters),
+        "beacons": beacons.snapshot(),
+    }
@@ -0,0 +1,100 @@
+# -------------------------------------------------------------------
+# Índices recomendados por banco / coleção
+# Usado por `manage.py ensure-indexes` para criar os índices que as
+# rotas precisam (filtros e ordenações mais frequentes).
+# -------------------------------------------------------------------
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDEXES = {
+    "gpac": {
+        "pacientes": [
+            IndexModel([("cpf", ASCENDING)], name="cpf_1"),
+            IndexModel([("name", ASCENDING)], name="name_1"),
+        ],
+        "colaboradores": [
+            IndexModel([("username", ASCENDING)], name="username_1"),
+            IndexModel([("userProfile", ASCENDING)], name="userProfile_1"),
+        ],
+        "profiles": [
+            IndexModel([("name", ASCENDING)], name="name_1"),
+        ],
+        "agendamentos": [
+            IndexModel([("date", ASCENDING), ("time", ASCENDING)], name="date_1_time_1"),
+            IndexModel([("patientId", ASCENDING)], name="patientId_1"),
+            IndexModel([("collaboratorId", ASCENDING)], name="collaboratorId_1"),
+        ],
+        "estados": [
+            IndexModel([("nome", ASCENDING)], name="nome_1"),
+        ],
+        "municipios": [
+            IndexModel([("estado_sigla", ASCENDING), ("nome", ASCENDING)], name="estado_sigla_1_nome_1"),
+        ],
+        "bairros": [
+            IndexModel(
+                [("municipio_codigo_ibge", ASCENDING), ("ativo", ASCENDING), ("nome", ASCENDING)],
+                name="municipio_codigo_ibge_1_ativo_1_nome_1",
+            ),
+        ],
+    },
+    "bkautocenter": {
+        "tires": [
+            IndexModel([("id", ASCENDING)], name="id_1"),
+        ],
+        "services": [
+            IndexModel([("id", ASCENDING)], name="id_1"),
+        ],
+        "admin_users": [
+            IndexModel([("username", ASCENDING)], name="username_1"),
+        ],
+        "orders": [
+            IndexModel([("created_at", DESCENDING)], name="created_at_-1"),
+        ],
+    },
+    "aguanaboca": {
+        "produtos": [
+            IndexModel([("category", ASCENDING)], name="category_1"),
+        ],
+    },
+    "equora": {
+        "users": [
+            IndexModel([("id", ASCENDING)], name="id_1"),
+            IndexModel([("username", ASCENDING)], name="username_1"),
+        ],
+        "sessions": [
+            IndexModel([("session_id", ASCENDING)], name="session_id_1"),
+            # Sessões expiradas são removidas pelo próprio MongoDB
+            IndexModel([("expire", ASCENDING)], name="expire_ttl", expireAfterSeconds=0),
+        ],
+        "temp_tokens": [
+            IndexModel([("token", ASCENDING)], name="token_1"),
+            IndexModel([("expire", ASCENDING)], name="expire_ttl", expireAfterSeconds=0),
+        ],
+        "clients": [
+            IndexModel([("id", ASCENDING)], name="id_1"),
+        ],
+        "stats_access_daily": [
+            IndexModel([("day", ASCENDING), ("country", ASCENDING), ("city", ASCENDING), ("path", ASCENDING)],
+                       name="day_1_country_1_city_1_path_1", unique=True),
+        ],
+        "stats_access_hourly": [
+            IndexModel([("hour", ASCENDING), ("country", ASCENDING), ("city", ASCENDING), ("path", ASCENDING)],
+                       name="hour_1_country_1_city_1_path_1", unique=True),
+        ],
+        "stats_access_uniques": [
+            IndexModel([("day", ASCENDING), ("path", ASCENDING)], name="day_1_path_1", unique=True),
+        ],
+        "usage": [
+            IndexModel([("day", ASCENDING), ("tenant", ASCENDING), ("route", ASCENDING)],
+                       name="day_1_tenant_1_route_1", unique=True),
+        ],
+    },
+}
+
+# Índices de cada partição mensal equora.stats_access_AAAA_MM
+# (access_partitions.py). Ficam fora de INDEXES: as partições são criadas
+# conforme os meses passam e recebem os índices na primeira escrita.
+PARTITION_INDEXES = [
+    IndexModel([("timestamp", DESCENDING)], name="timestamp_-1"),
+    # Mapa de acessos: intervalos de geohash + período, sem ler os documentos
+    IndexModel([("geohash", ASCENDING), ("timestamp", ASCENDING)], name="geohash_1_timestamp_1"),
+]
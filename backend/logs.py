@@ -0,0 +1,197 @@
+# -------------------------------------------------------------------
+# Logging estruturado (JSON) sem bloquear o event loop
+#
+# - Os handlers da aplicação só enfileiram o registro (QueueHandler); a
+#   formatação JSON e a escrita no stderr acontecem numa thread própria
+#   (QueueListener). Com a fila cheia o registro é descartado e contado,
+#   nunca bloqueia a requisição.
+# - Cada registro leva o request_id da requisição atual (ContextVar
+#   preenchida pelo RequestIdMiddleware; vem do header X-Request-ID ou é
+#   gerado e devolvido na resposta).
+# - Níveis por logger: LOG_LEVELS="backend.routes.equipes_gpac=DEBUG,pymongo=WARNING".
+# - Logs DEBUG de alta frequência são amostrados: de cada mensagem só 1 a
+#   cada LOG_DEBUG_SAMPLE_EVERY chega à fila.
+#
+# Campos extras vão como `extra={...}` e viram chaves do JSON:
+#   logger.info("Webhook recebido", extra={"payment_id": pid})
+# -------------------------------------------------------------------
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from .settings import LOG_DEBUG_SAMPLE_EVERY, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_QUEUE_SIZE
+
+request_id_var = ContextVar("request_id", default=None)
+
+# Atributos padrão de LogRecord (o resto veio de `extra`)
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener = None
+
+
+# -------------------------------------------------------------------
+# Filtros (rodam na thread de quem loga)
+# -------------------------------------------------------------------
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Deixa passar 1 a cada `every` registros DEBUG de cada mensagem."""
+
+    def __init__(self, every=LOG_DEBUG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        if len(self._counts) > 10000:
+            self._counts.clear()
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+# -------------------------------------------------------------------
+# Fila e formatação (thread do listener)
+# -------------------------------------------------------------------
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (e conta) em vez de bloquear com a fila cheia."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Só resolve a mensagem aqui (os args podem mudar depois); o JSON e
+        # o traceback são montados na thread do listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return super().format(record)
+
+
+def parse_levels(text):
+    """"a=DEBUG,b=WARNING" -> {"a": "DEBUG", "b": "WARNING"}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup(level=LOG_LEVEL, levels=LOG_LEVELS, fmt=LOG_FORMAT, stream=None):
+    """Troca os handlers do root pela fila + listener. Idempotente."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter())
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+    # Os loggers do uvicorn têm handlers próprios; passam a usar a fila
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """Esvazia a fila e para a thread do listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# -------------------------------------------------------------------
+# Correlação por requisição
+# -------------------------------------------------------------------
+class RequestIdMiddleware:
+    """Define o request_id da requisição e o devolve em X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
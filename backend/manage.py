@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------------
+# manage.py - CLI de manutenção do backend
+#
+# Substitui os antigos scripts init_admin_equora.py e fill_stats_location.py.
+# Executar a partir da raiz do projeto:
+#
+#   python -m backend.manage create-admin --tenant equora --username admin --email admin@equora.com
+#   python -m backend.manage ensure-indexes [--tenant gpac]
+#   python -m backend.manage warm-cache
+#   python -m backend.manage backfill stats-location
+#   python -m backend.manage backfill stats-rollups
+#   python -m backend.manage backfill stats-uniques
+#   python -m backend.manage backfill stats-geohash
+#   python -m backend.manage backfill stats-normalize
+#   python -m backend.manage backfill stats-partition
+#   python -m backend.manage seed --tenant gpac --collection pacientes --file pacientes.csv
+#   python -m backend.manage report [--tenant equora] [--json relatorio.json]
+#   python -m backend.manage build-refdata [--path refdata.snapshot]
+#
+# Todos os comandos aceitam --batch-size e --concurrency (padrões em settings.py).
+# -------------------------------------------------------------------
+import argparse
+import asyncio
+import csv
+import getpass
+import hashlib
+import sys
+import uuid
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from bson import json_util
+from pymongo import UpdateOne
+from rich.progress import Progress
+
+from .db import client, db_gpac, db_bkautocenter, db_agua_na_boca, db_equora
+from . import access_docs, access_partitions, access_rollups, access_uniques, geohash, geoip, refdata
+from .dbstats import build_report
+from .indexes import INDEXES, PARTITION_INDEXES
+from .settings import GEOIP_DB_PATH, MANAGE_BATCH_SIZE, MANAGE_CONCURRENCY, REFDATA_PATH, REPORT_SAMPLE_SIZE
+
+TENANTS = {
+    "gpac": db_gpac,
+    "bkautocenter": db_bkautocenter,
+    "aguanaboca": db_agua_na_boca,
+    "equora": db_equora,
+}
+
+# Coleções lidas com frequência pelas rotas (dados de referência e catálogos)
+WARM_COLLECTIONS = [
+    ("gpac", "estados"),
+    ("gpac", "municipios"),
+    ("gpac", "bairros"),
+    ("gpac", "profiles"),
+    ("bkautocenter", "tires"),
+    ("bkautocenter", "services"),
+    ("aguanaboca", "produtos"),
+    ("equora", "users"),
+]
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+def hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def chunked(iterable, size: int):
+    """Agrupa um iterável em listas de até `size` itens."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def iter_batches(cursor, size: int):
+    """Agrupa um cursor Motor em listas de até `size` documentos."""
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def run_bounded(items, worker, concurrency: int):
+    """Executa `worker(item)` para cada item com no máximo `concurrency`
+    tarefas simultâneas. Aceita iteráveis síncronos e assíncronos sem
+    materializar a entrada inteira em memória."""
+    pending = set()
+
+    async def submit(item):
+        if len(pending) >= concurrency:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            for task in done:
+                task.result()
+        pending.add(asyncio.create_task(worker(item)))
+
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            await submit(item)
+    else:
+        for item in items:
+            await submit(item)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+# -------------------------------------------------------------------
+# create-admin
+# -------------------------------------------------------------------
+async def create_admin(args):
+    password = args.password or getpass.getpass(f"Senha para '{args.username}': ")
+    if not password:
+        raise SystemExit("Senha não pode ser vazia")
+    if args.tenant in ("equora", "gpac") and not args.email:
+        raise SystemExit(f"--email é obrigatório para o tenant {args.tenant}")
+
+    if args.tenant == "equora":
+        collection = db_equora.users
+        doc = {
+            "id": args.username,
+            "username": args.username,
+            "email": args.email,
+            "password_hash": hash_password(password),
+            "is_active": True,
+            "is_admin": True,
+            # Não habilitar 2FA por padrão ao criar o usuário inicial
+            "twofa_secret": None,
+            "provisioning_uri": None,
+            "provisioning_uri_used": False,
+            "created_at": datetime.utcnow(),
+        }
+    elif args.tenant == "bkautocenter":
+        collection = db_bkautocenter.admin_users
+        doc = {
+            "id": str(uuid.uuid4()),
+            "username": args.username,
+            "password_hash": hash_password(password),
+            "created_at": datetime.now(),
+        }
+    else:  # gpac
+        collection = db_gpac.colaboradores
+        doc = {
+            "name": args.name or args.username,
+            "email": args.email,
+            "phone": "",
+            "role": "administrador",
+            "username": args.username,
+            "password": hash_password(password),
+            "userProfile": "administradores",
+            "changePasswordOnFirstLogin": True,
+            "twoFactorAuth": False,
+            "createdAt": datetime.utcnow(),
+        }
+
+    if await collection.find_one({"username": args.username}):
+        print(f"Usuário '{args.username}' já existe em {args.tenant}!")
+        return 1
+    await collection.insert_one(doc)
+    print(f"Usuário admin criado em {args.tenant}: {args.username}")
+    return 0
+
+
+# -------------------------------------------------------------------
+# ensure-indexes
+# -------------------------------------------------------------------
+async def ensure_indexes(args):
+    # stats_access é particionada por mês: os índices vão para cada partição
+    # existente (as novas recebem os seus na primeira escrita)
+    targets = [
+        (db_name, coll_name, models)
+        for db_name, collections in INDEXES.items()
+        if not args.tenant or db_name == args.tenant
+        for coll_name, models in collections.items()
+    ]
+    if not args.tenant or args.tenant == "equora":
+        targets += [
+            ("equora", name, PARTITION_INDEXES)
+            for name in await access_partitions.partition_names(db_equora)
+        ]
+    with Progress() as progress:
+        task = progress.add_task("Criando índices", total=len(targets))
+
+        async def worker(target):
+            db_name, coll_name, models = target
+            names = await client[db_name][coll_name].create_indexes(models)
+            progress.console.print(f"{db_name}.{coll_name}: {', '.join(names)}")
+            progress.advance(task)
+
+        await run_bounded(targets, worker, args.concurrency)
+    return 0
+
+
+# -------------------------------------------------------------------
+# warm-cache
+# -------------------------------------------------------------------
+async def warm_cache(args):
+    """Percorre as coleções mais lidas para trazê-las ao cache do MongoDB
+    (WiredTiger) antes de liberar tráfego, por exemplo após um restart."""
+    targets = [t for t in WARM_COLLECTIONS if not args.tenant or t[0] == args.tenant]
+    with Progress() as progress:
+
+        async def worker(target):
+            db_name, coll_name = target
+            collection = client[db_name][coll_name]
+            total = await collection.estimated_document_count()
+            task = progress.add_task(f"{db_name}.{coll_name}", total=total)
+            async for batch in iter_batches(collection.find({}).batch_size(args.batch_size), args.batch_size):
+                progress.advance(task, len(batch))
+
+        await run_bounded(targets, worker, args.concurrency)
+    return 0
+
+
+# -------------------------------------------------------------------
+# backfill
+# -------------------------------------------------------------------
+async def _backfill_stats(args, label, query, projection, handle, start=None, end=None):
+    """Percorre em lotes os acessos de `query` em todas as partições (e na
+    coleção antiga), chamando `handle(coleção, lote)`, que devolve quantos
+    documentos alterou. Devolve (total, alterados)."""
+    collections = await access_partitions.collections(db_equora, start, end)
+    counts = [await col.count_documents(query) for col in collections]
+    updated = 0
+
+    with Progress() as progress:
+        task = progress.add_task(f"stats_access.{label}", total=sum(counts))
+        for col, count in zip(collections, counts):
+            if not count:
+                continue
+
+            async def worker(batch, col=col):
+                nonlocal updated
+                updated += await handle(col, batch)
+                progress.advance(task, len(batch))
+
+            cursor = col.find(query, projection).batch_size(args.batch_size)
+            await run_bounded(iter_batches(cursor, args.batch_size), worker, args.concurrency)
+
+    return sum(counts), updated
+
+
+async def _bulk(col, ops):
+    if not ops:
+        return 0
+    result = await col.bulk_write(ops, ordered=False)
+    return result.modified_count
+
+
+async def backfill_stats_location(args):
+    """Preenche `location` nos acessos (documentos sem localização ou com
+    latitude/longitude gravadas como string) usando o GeoLite2."""
+    if not geoip.locator.available():
+        raise SystemExit("MMDB não encontrado em: " + GEOIP_DB_PATH)
+
+    query = {
+        "$or": [
+            {"location": {"$exists": False}},
+            {"location.latitude": {"$type": "string"}},
+            {"location.longitude": {"$type": "string"}},
+        ]
+    }
+
+    async def handle(col, batch):
+        ops = []
+        for doc in batch:
+            loc = geoip.lookup(doc.get("ip"))
+            if loc:
+                ops.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"location": loc, "geohash": geohash.from_location(loc)}},
+                ))
+        return await _bulk(col, ops)
+
+    total, updated = await _backfill_stats(args, "location", query, {"ip": 1}, handle)
+    print(f"Total atualizado: {updated} de {total}")
+    return 0
+
+
+async def backfill_stats_rollups(args):
+    """Recalcula os rollups por dia/hora (access_rollups.py) a partir dos
+    acessos. Só mexe nos períodos anteriores ao dia atual (UTC), que a
+    ingestão ao vivo não toca mais, e posteriores ao acesso bruto mais
+    antigo: os rollups de meses já removidos pela retenção são mantidos.
+    Rodar depois do stats-location."""
+    cutoff = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    floor = await access_partitions.oldest_timestamp(db_equora)
+    if floor is None or floor >= cutoff:
+        print("Nenhum acesso bruto anterior a hoje: rollups mantidos")
+        return 0
+    for granularity, (name, fmt) in access_rollups.ROLLUPS.items():
+        await db_equora[name].delete_many({granularity: {"$gte": floor.strftime(fmt), "$lt": cutoff.strftime(fmt)}})
+
+    async def handle(col, batch):
+        access_rollups.add(batch)
+        await access_rollups.flush(db_equora)
+        return len(batch)
+
+    total, _ = await _backfill_stats(
+        args, "rollups", {"timestamp": {"$gte": floor, "$lt": cutoff}}, {"timestamp": 1, "path": 1, "location": 1},
+        handle, start=floor, end=cutoff,
+    )
+    # Contadores devolvidos por alguma falha de gravação
+    await access_rollups.flush(db_equora)
+
+    print(f"Rollups recalculados a partir de {total} acessos entre {floor.date()} e {cutoff.date()}")
+    return 0
+
+
+async def backfill_stats_uniques(args):
+    """Recalcula os esboços de visitantes únicos (access_uniques.py) dos
+    dias anteriores ao atual (UTC) ainda cobertos pelos acessos brutos,
+    como o stats-rollups."""
+    cutoff = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    floor = await access_partitions.oldest_timestamp(db_equora)
+    if floor is None or floor >= cutoff:
+        print("Nenhum acesso bruto anterior a hoje: esboços mantidos")
+        return 0
+    await db_equora[access_uniques.COLLECTION].delete_many({"day": {
+        "$gte": floor.strftime(access_uniques.DAY_FORMAT), "$lt": cutoff.strftime(access_uniques.DAY_FORMAT),
+    }})
+
+    async def handle(col, batch):
+        access_uniques.add(batch)
+        await access_uniques.flush(db_equora)
+        return len(batch)
+
+    total, _ = await _backfill_stats(
+        args, "uniques", {"timestamp": {"$gte": floor, "$lt": cutoff}}, {"timestamp": 1, "ip": 1, "path": 1},
+        handle, start=floor, end=cutoff,
+    )
+    # Esboços devolvidos por alguma falha de gravação
+    await access_uniques.flush(db_equora)
+
+    print(f"Visitantes únicos recalculados a partir de {total} acessos entre {floor.date()} e {cutoff.date()}")
+    return 0
+
+
+async def backfill_stats_geohash(args):
+    """Preenche `geohash` (geohash.py) nos acessos que já têm coordenadas
+    numéricas mas foram gravados antes do campo existir."""
+    query = {
+        "geohash": {"$exists": False},
+        "location.latitude": {"$type": "number"},
+        "location.longitude": {"$type": "number"},
+    }
+
+    async def handle(col, batch):
+        ops = []
+        for doc in batch:
+            cell = geohash.from_location(doc.get("location"))
+            if cell:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"geohash": cell}}))
+        return await _bulk(col, ops)
+
+    total, updated = await _backfill_stats(args, "geohash", query, {"location": 1}, handle)
+    print(f"Total atualizado: {updated} de {total}")
+    return 0
+
+
+async def backfill_stats_normalize(args):
+    """Reescreve os acessos antigos no formato canônico (access_docs.py).
+    Só seleciona documentos sem o `schema` atual: pode ser interrompido e
+    executado de novo, continuando de onde parou."""
+    query = {"schema": {"$ne": access_docs.SCHEMA_VERSION}}
+
+    async def handle(col, batch):
+        return await _bulk(col, [UpdateOne({"_id": doc["_id"]}, access_docs.migration_update(doc)) for doc in batch])
+
+    total, updated = await _backfill_stats(args, "normalize", query, {"timestamp": 1, "location": 1}, handle)
+    print(f"Total atualizado: {updated} de {total}")
+    return 0
+
+
+async def backfill_stats_partition(args):
+    """Move os acessos da coleção antiga (stats_access) para as partições
+    mensais (access_partitions.py) e remove a coleção quando esvazia.
+    Cada lote é copiado e depois apagado da origem: se for interrompido,
+    basta rodar de novo (cópias repetidas são ignoradas pela chave _id).
+    Timestamps que não são datas ficam na coleção antiga: rodar antes o
+    stats-normalize."""
+    legacy = db_equora[access_partitions.LEGACY]
+    query = {"timestamp": {"$type": "date"}}
+    total = await legacy.count_documents(query)
+    moved = 0
+
+    with Progress() as progress:
+        task = progress.add_task("stats_access.partition", total=total)
+
+        async def worker(batch):
+            nonlocal moved
+            # Duplicados contam como copiados (lote de uma execução anterior);
+            # documentos recusados ficam na origem para a próxima execução
+            rejected = set()
+            for name, docs in access_partitions.split(batch).items():
+                rejected.update(docs[i]["_id"] for i in await access_partitions.insert_many(db_equora, name, docs))
+            copied = [doc["_id"] for doc in batch if doc["_id"] not in rejected]
+            result = await legacy.delete_many({"_id": {"$in": copied}})
+            moved += result.deleted_count
+            progress.advance(task, len(batch))
+
+        cursor = legacy.find(query).batch_size(args.batch_size)
+        await run_bounded(iter_batches(cursor, args.batch_size), worker, args.concurrency)
+
+    remaining = await legacy.count_documents({})
+    if remaining:
+        print(f"Movidos: {moved} de {total}; {remaining} acessos continuam em {access_partitions.LEGACY}")
+    else:
+        await db_equora.drop_collection(access_partitions.LEGACY)
+        print(f"Movidos: {moved} de {total}; coleção {access_partitions.LEGACY} removida")
+    return 0
+
+
+BACKFILLS = {
+    "stats-location": backfill_stats_location,
+    "stats-rollups": backfill_stats_rollups,
+    "stats-uniques": backfill_stats_uniques,
+    "stats-geohash": backfill_stats_geohash,
+    "stats-normalize": backfill_stats_normalize,
+    "stats-partition": backfill_stats_partition,
+}
+
+
+async def backfill(args):
+    return await BACKFILLS[args.name](args)
+
+
+# -------------------------------------------------------------------
+# seed
+# -------------------------------------------------------------------
+def read_records(path: Path):
+    """Lê registros de um arquivo JSON (lista ou objeto), NDJSON/JSONL ou CSV.
+    JSON aceita o formato estendido do MongoDB ($oid, $date)."""
+    suffix = path.suffix.lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif suffix in (".ndjson", ".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json_util.loads(line)
+        else:
+            data = json_util.loads(f.read())
+            yield from (data if isinstance(data, list) else [data])
+
+
+async def seed(args):
+    path = Path(args.file)
+    if not path.exists():
+        raise SystemExit(f"Arquivo não encontrado: {path}")
+
+    collection = TENANTS[args.tenant][args.collection]
+    inserted = 0
+    with Progress() as progress:
+        task = progress.add_task(f"{args.tenant}.{args.collection}", total=None)
+
+        async def worker(batch):
+            nonlocal inserted
+            result = await collection.insert_many(batch, ordered=False)
+            inserted += len(result.inserted_ids)
+            progress.advance(task, len(batch))
+
+        await run_bounded(chunked(read_records(path), args.batch_size), worker, args.concurrency)
+
+    print(f"Total inserido em {args.tenant}.{args.collection}: {inserted}")
+    return 0
+
+
+# -------------------------------------------------------------------
+# report
+# -------------------------------------------------------------------
+def _fmt_bytes(value):
+    if value is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+async def report(args):
+    """Tamanho das coleções, uso de índices e alertas (ver dbstats.py)."""
+    from rich.console import Console
+    from rich.table import Table
+
+    result = await build_report([args.tenant] if args.tenant else None, sample_size=args.sample_size)
+    if args.json:
+        Path(args.json).write_text(json_util.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Relatório gravado em {args.json}")
+
+    table = Table(title="Coleções")
+    for column in ("coleção", "docs (est.)", "dados", "média/doc", "índices", "maior doc (amostra)"):
+        table.add_column(column, justify="left" if column == "coleção" else "right", no_wrap=column == "coleção")
+    for c in result["collections"]:
+        table.add_row(
+            f"{c['database']}.{c['collection']}", str(c["estimated_count"]), _fmt_bytes(c["size"]),
+            _fmt_bytes(c["avg_obj_size"]), _fmt_bytes(c["total_index_size"]), _fmt_bytes(c["sample"]["max_doc_size"]),
+        )
+    console = Console()
+    console.print(table)
+    for flag in result["flags"]:
+        console.print(f"[yellow]![/] {flag}")
+    return 0
+
+
+# -------------------------------------------------------------------
+# build-refdata
+# -------------------------------------------------------------------
+async def build_refdata(args):
+    """Gera o snapshot de dados de referência lido pelos workers (refdata.py)."""
+    keys, size = await refdata.build(args.path)
+    print(f"Snapshot gravado em {args.path}: {keys} chaves, {size} bytes")
+    return 0
+
+
+# -------------------------------------------------------------------
+# Parser
+# -------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="manage.py", description="Manutenção do backend Equora")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_bulk_options(p):
+        p.add_argument("--batch-size", type=int, default=MANAGE_BATCH_SIZE, help="Documentos por operação em lote")
+        p.add_argument("--concurrency", type=int, default=MANAGE_CONCURRENCY, help="Operações em lote simultâneas")
+
+    p = sub.add_parser("create-admin", help="Cria um usuário administrador em um tenant")
+    p.add_argument("--tenant", choices=["equora", "bkautocenter", "gpac"], required=True)
+    p.add_argument("--username", required=True)
+    p.add_argument("--email", default=None)
+    p.add_argument("--name", default=None, help="Nome exibido (GPAC)")
+    p.add_argument("--password", default=None, help="Se omitida, será solicitada no terminal")
+    p.set_defaults(func=create_admin)
+
+    p = sub.add_parser("ensure-indexes", help="Cria os índices recomendados (indexes.py)")
+    p.add_argument("--tenant", choices=sorted(TENANTS), default=None)
+    add_bulk_options(p)
+    p.set_defaults(func=ensure_indexes)
+
+    p = sub.add_parser("warm-cache", help="Aquece o cache do MongoDB com as coleções mais lidas")
+    p.add_argument("--tenant", choices=sorted(TENANTS), default=None)
+    add_bulk_options(p)
+    p.set_defaults(func=warm_cache)
+
+    p = sub.add_parser("backfill", help="Executa um backfill de dados")
+    p.add_argument("name", choices=sorted(BACKFILLS))
+    add_bulk_options(p)
+    p.set_defaults(func=backfill)
+
+    p = sub.add_parser("seed", help="Carga em lote a partir de JSON, NDJSON ou CSV")
+    p.add_argument("--tenant", choices=sorted(TENANTS), required=True)
+    p.add_argument("--collection", required=True)
+    p.add_argument("--file", required=True)
+    add_bulk_options(p)
+    p.set_defaults(func=seed)
+
+    p = sub.add_parser("report", help="Relatório de coleções, uso de índices e documentos grandes")
+    p.add_argument("--tenant", choices=sorted(TENANTS), default=None)
+    p.add_argument("--sample-size", type=int, default=REPORT_SAMPLE_SIZE, help="Documentos amostrados por coleção")
+    p.add_argument("--json", default=None, help="Grava o relatório completo em JSON")
+    p.set_defaults(func=report)
+
+    p = sub.add_parser("build-refdata", help="Gera o snapshot compartilhado de dados de referência")
+    p.add_argument("--path", default=REFDATA_PATH)
+    p.set_defaults(func=build_refdata)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return asyncio.run(args.func(args)) or 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# -------------------------------------------------------------------
+# Pipeline de imagens enviadas (pneus, serviços e produtos)
+#
+#   1. o upload é gravado em blocos num arquivo temporário, com limite de
+#      tamanho (MEDIA_MAX_UPLOAD_BYTES -> 413)
+#   2. o tipo real vem dos magic bytes, não da extensão nem do
+#      content-type do cliente (JPEG, PNG, GIF e WebP; o resto -> 415)
+#   3. num pool de processos (Pillow segura a CPU): orientação EXIF
+#      aplicada, metadados descartados e variantes redimensionadas
+#      (VARIANTS) em WebP e JPEG
+#   4. as variantes vão para o storage (storage.py) e o endpoint devolve
+#      as URLs de todas
+#
+# Nomes gerados: <prefixo>_<uuid>_<variante>.<webp|jpg>. O image_url
+# gravado no documento continua sendo um único arquivo (full.jpg); as
+# demais variantes são derivadas dele com variant_name().
+# -------------------------------------------------------------------
+import asyncio
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from fastapi import HTTPException
+
+from .settings import MEDIA_MAX_PIXELS, MEDIA_MAX_UPLOAD_BYTES, MEDIA_TMP_DIR, MEDIA_WORKERS, STORAGE_CHUNK_SIZE
+from .storage import iter_upload
+
+# Variante -> maior lado em pixels (nunca amplia a original)
+VARIANTS = {"thumb": 160, "card": 480, "full": 1600}
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+QUALITY = {"webp": 80, "jpg": 85}
+
+# Nome gerado pelo pipeline
+NAME_RE = re.compile(r"^(?P<base>.+_[0-9a-f]{32})_(?P<variant>%s)\.(?P<ext>webp|jpg)$" % "|".join(VARIANTS))
+
+_pool = None
+
+
+def sniff(head: bytes):
+    """Tipo da imagem pelos magic bytes, ou None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def variant_name(name, variant, ext="webp"):
+    """Outra variante do mesmo upload (ex.: full.jpg -> card.webp)."""
+    match = NAME_RE.match(name)
+    if not match:
+        return name
+    return f"{match['base']}_{variant}.{ext}"
+
+
+def related_names(name):
+    """Todos os arquivos de um upload do pipeline (ou só o próprio nome)."""
+    match = NAME_RE.match(name)
+    if not match:
+        return {name}
+    return {f"{match['base']}_{variant}.{ext}" for variant in VARIANTS for ext in FORMATS}
+
+
+# -------------------------------------------------------------------
+# Processamento (roda no pool de processos)
+# -------------------------------------------------------------------
+def _render(source_path, out_dir):
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MEDIA_MAX_PIXELS
+    try:
+        original = Image.open(source_path)
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e))
+    with original:
+        # Só o cabeçalho foi lido; recusa antes de decodificar os pixels
+        if original.width * original.height > MEDIA_MAX_PIXELS:
+            raise ValueError(f"imagem com {original.width}x{original.height} pixels")
+        original.load()
+        # Aplica a rotação do EXIF antes de descartar os metadados
+        image = ImageOps.exif_transpose(original)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    # Nova imagem só com os pixels: EXIF, XMP, ICC e comentários ficam para trás
+    clean = Image.new(image.mode, image.size)
+    clean.paste(image)
+
+    results = []
+    for variant, size in VARIANTS.items():
+        resized = clean.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for ext, (fmt, _) in FORMATS.items():
+            target = resized
+            if fmt == "JPEG" and target.mode == "RGBA":
+                # JPEG não tem transparência: fundo branco
+                background = Image.new("RGB", target.size, (255, 255, 255))
+                background.paste(target, mask=target.split()[3])
+                target = background
+            path = os.path.join(out_dir, f"{variant}.{ext}")
+            target.save(path, fmt, quality=QUALITY[ext], optimize=True)
+            results.append({
+                "variant": variant,
+                "ext": ext,
+                "path": path,
+                "width": target.width,
+                "height": target.height,
+            })
+    return results
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: o processo da API tem threads (Motor, logging) e fork as copiaria
+        _pool = ProcessPoolExecutor(max_workers=MEDIA_WORKERS, mp_context=get_context("spawn"))
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# -------------------------------------------------------------------
+# Upload
+# -------------------------------------------------------------------
+async def _spool(upload, path, max_bytes):
+    """Grava o upload em `path` em blocos; devolve o tipo detectado."""
+    loop = asyncio.get_running_loop()
+    f = await loop.run_in_executor(None, open, path, "wb")
+    kind = None
+    size = 0
+    try:
+        async for chunk in iter_upload(upload):
+            if kind is None:
+                kind = sniff(chunk[:16])
+                if kind is None:
+                    raise HTTPException(status_code=415, detail="Formato de imagem não suportado (use JPEG, PNG, GIF ou WebP)")
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Imagem maior que {max_bytes // (1024 * 1024)} MB")
+            await loop.run_in_executor(None, f.write, chunk)
+    finally:
+        await loop.run_in_executor(None, f.close)
+    if kind is None:
+        raise HTTPException(status_code=400, detail="Arquivo vazio")
+    return kind
+
+
+async def _file_chunks(path):
+    loop = asyncio.get_running_loop()
+    with open(path, "rb") as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, STORAGE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def process_upload(volume, upload, prefix, max_bytes=MEDIA_MAX_UPLOAD_BYTES):
+    """Processa o upload e grava as variantes no volume.
+
+    Retorna {"image_url": URL do full.jpg, "variants": {variante: {webp, jpg, width, height}}}.
+    """
+    base = f"{prefix}_{uuid.uuid4().hex}"
+    with tempfile.TemporaryDirectory(prefix="media-", dir=MEDIA_TMP_DIR or None) as work_dir:
+        source = os.path.join(work_dir, "source")
+        await _spool(upload, source, max_bytes)
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(_get_pool(), _render, source, work_dir)
+        except BrokenProcessPool:
+            # Um worker morreu (OOM, sinal): o próximo upload recria o pool
+            shutdown()
+            raise
+        except (OSError, ValueError, SyntaxError) as e:
+            # Pillow não conseguiu decodificar (arquivo truncado, bomba de pixels...)
+            raise HTTPException(status_code=422, detail=f"Imagem inválida: {type(e).__name__}")
+
+        variants = {}
+        for item in rendered:
+            name = f"{base}_{item['variant']}.{item['ext']}"
+            await volume.save(name, _file_chunks(item["path"]), FORMATS[item["ext"]][1])
+            entry = variants.setdefault(item["variant"], {"width": item["width"], "height": item["height"]})
+            entry[item["ext"]] = volume.url(name)
+    return {"image_url": variants["full"]["jpg"], "variants": variants}
+
+
+async def delete_upload(volume, name):
+    """Remove todas as variantes de um upload; True se algo foi removido."""
+    removed = False
+    for related in related_names(name):
+        removed = await volume.delete(related) or removed
+    return removed
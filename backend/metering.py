@@ -0,0 +1,220 @@
+# -------------------------------------------------------------------
+# Medição de uso por tenant (requisições, bytes, operações Mongo, erros)
+#
+# - UsageMiddleware (ASGI puro) conta cada requisição por tenant e rota
+#   (template da rota, ex.: /bkautocenter/tires/{tire_id}).
+# - UsageCommandListener (pymongo) conta os comandos enviados ao MongoDB
+#   durante a requisição. O Motor copia o contexto para a thread do
+#   executor, então o listener acha a requisição pela ContextVar.
+# - Os contadores vivem em memória e só são alterados na thread do event
+#   loop (sem locks); no listener, que roda em outra thread, usamos
+#   list.append, que é atômico.
+# - A cada USAGE_FLUSH_SECONDS os contadores são trocados por um dict
+#   novo e gravados com um único bulk_write de upserts ($inc) em
+#   equora.usage, um documento por dia/tenant/rota (rollup diário).
+#
+# Nenhuma escrita no banco acontece no caminho da requisição.
+# -------------------------------------------------------------------
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+
+from pymongo import UpdateOne, monitoring
+from pymongo.errors import BulkWriteError
+from starlette.routing import get_route_path
+
+from .settings import USAGE_FLUSH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Prefixo do caminho -> tenant (produto)
+TENANT_PREFIXES = [
+    ("/bkautocenter", "bkautocenter"),
+    ("/Produtos", "aguanaboca"),
+    ("/auth", "aguanaboca"),
+    ("/admin", "equora"),
+    ("/patients", "gpac"),
+    ("/colaboradores", "gpac"),
+    ("/agendamentos", "gpac"),
+    ("/comorbidities", "gpac"),
+    ("/especialidades", "gpac"),
+    ("/perfis", "gpac"),
+    ("/equipes", "gpac"),
+    ("/localizacao", "gpac"),
+    ("/2fa", "gpac"),
+]
+
+FIELDS = ("requests", "bytes_in", "bytes_out", "mongo_ops", "client_errors", "errors")
+
+# (tenant, rota) -> [requests, bytes_in, bytes_out, mongo_ops, client_errors, errors]
+_counters = {}
+# Operações Mongo da requisição atual (lista; append é atômico entre threads)
+_request_ops = ContextVar("usage_request_ops", default=None)
+_flush_task = None
+
+
+def tenant_for(path: str) -> str:
+    for prefix, tenant in TENANT_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return tenant
+    return "outros"
+
+
+def record(tenant, route, bytes_in, bytes_out, mongo_ops, status):
+    """Acumula uma requisição. Chamado apenas no event loop."""
+    row = _counters.get((tenant, route))
+    if row is None:
+        row = _counters[(tenant, route)] = [0, 0, 0, 0, 0, 0]
+    row[0] += 1
+    row[1] += bytes_in
+    row[2] += bytes_out
+    row[3] += mongo_ops
+    if 400 <= status < 500:
+        row[4] += 1
+    elif status >= 500:
+        row[5] += 1
+
+
+# -------------------------------------------------------------------
+# Coleta
+# -------------------------------------------------------------------
+class UsageCommandListener(monitoring.CommandListener):
+    """Conta os comandos Mongo disparados dentro de uma requisição."""
+
+    def started(self, event):
+        ops = _request_ops.get()
+        if ops is not None:
+            ops.append(1)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class UsageMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        ops = []
+        token = _request_ops.set(ops)
+        sizes = [0, 0]  # bytes recebidos, bytes enviados
+        status = [500]
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes[0] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes[1] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _request_ops.reset(token)
+            route = scope.get("route")
+            # Sem o root_path (/api) quando o proxy não o remove
+            path = get_route_path(scope)
+            record(tenant_for(path), getattr(route, "path", "<unmatched>"), sizes[0], sizes[1], len(ops), status[0])
+
+
+# -------------------------------------------------------------------
+# Flush periódico
+# -------------------------------------------------------------------
+async def flush(collection):
+    """Grava os contadores acumulados com um único bulk_write."""
+    global _counters
+    if not _counters:
+        return 0
+    pending, _counters = _counters, {}
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    now = datetime.utcnow()
+    keys = list(pending)
+    ops = [
+        UpdateOne(
+            {"day": day, "tenant": tenant, "route": route},
+            {"$inc": dict(zip(FIELDS, pending[(tenant, route)])), "$set": {"updated_at": now}},
+            upsert=True,
+        )
+        for tenant, route in keys
+    ]
+    try:
+        await collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as exc:
+        # ordered=False: as demais operações já foram aplicadas; só as que
+        # falharam voltam, senão seriam contadas duas vezes
+        failed = {error["index"] for error in exc.details.get("writeErrors", [])}
+        _merge_back({keys[i]: pending[keys[i]] for i in failed})
+        logger.exception("Falha ao gravar parte dos contadores de uso", extra={"failed": len(failed)})
+        return len(ops) - len(failed)
+    except Exception:
+        _merge_back(pending)
+        logger.exception("Falha ao gravar contadores de uso")
+        return 0
+    return len(ops)
+
+
+def _merge_back(pending):
+    # Devolve os contadores para a próxima tentativa
+    for key, row in pending.items():
+        current = _counters.setdefault(key, [0] * len(FIELDS))
+        for i, value in enumerate(row):
+            current[i] += value
+
+
+async def _flush_loop(collection, interval):
+    while True:
+        await asyncio.sleep(interval)
+        await flush(collection)
+
+
+def start(collection, interval=USAGE_FLUSH_SECONDS):
+    global _flush_task
+    if _flush_task is None:
+        _flush_task = asyncio.get_running_loop().create_task(_flush_loop(collection, interval))
+
+
+async def stop(collection):
+    """Cancela o flush periódico e grava o que restou (shutdown)."""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    await flush(collection)
+
+
+# -------------------------------------------------------------------
+# Consulta (rollups diários)
+# -------------------------------------------------------------------
+async def daily_usage(collection, start=None, end=None, tenant=None, by_route=False):
+    query = {}
+    if start or end:
+        query["day"] = {}
+        if start:
+            query["day"]["$gte"] = start
+        if end:
+            query["day"]["$lte"] = end
+    if tenant:
+        query["tenant"] = tenant
+    group_id = {"day": "$day", "tenant": "$tenant"}
+    if by_route:
+        group_id["route"] = "$route"
+    pipeline = [
+        {"$match": query},
+        {"$group": {"_id": group_id, **{f: {"$sum": f"${f}"} for f in FIELDS}}},
+        {"$sort": {"_id.day": 1, "_id.tenant": 1}},
+    ]
+    rows = await collection.aggregate(pipeline).to_list(None)
+    return [{**row.pop("_id"), **row} for row in rows]
@@ -0,0 +1,61 @@
+# -------------------------------------------------------------------
+# Preferência de leitura por rota / por chamada
+#
+# Leituras analíticas (contagens, listagens de relatório) não precisam do
+# dado mais recente e não devem disputar o primário com as escritas
+# clínicas. As rotas declaram o perfil da leitura:
+#
+#   stats = reads(db_equora.stats_access, "reporting")
+#   await stats.find(...)
+#
+# O perfil "reporting" usa REPORTING_READ_PREFERENCE (secondaryPreferred
+# por padrão) com maxStalenessSeconds. Sem replica set o driver ignora a
+# preferência e lê do único nó, então o mesmo código serve aos dois casos.
+# -------------------------------------------------------------------
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+from .settings import REPORTING_MAX_STALENESS_SECONDS, REPORTING_READ_PREFERENCE
+
+MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def make(mode, max_staleness=-1):
+    """Instância de ReadPreference a partir do nome do modo."""
+    try:
+        cls = MODES[mode]
+    except KeyError:
+        raise ValueError(f"Preferência de leitura desconhecida: {mode}") from None
+    if cls is Primary:
+        # O primário nunca está atrasado; o driver rejeita maxStaleness aqui
+        return Primary()
+    return cls(max_staleness=max_staleness)
+
+
+PROFILES = {
+    "primary": Primary(),
+    "reporting": make(REPORTING_READ_PREFERENCE, REPORTING_MAX_STALENESS_SECONDS),
+}
+
+# (coleção, perfil) -> coleção com a preferência aplicada
+_collections = {}
+
+
+def reads(collection, profile="reporting"):
+    """A mesma coleção, lendo conforme o perfil informado."""
+    key = (collection.full_name, profile)
+    bound = _collections.get(key)
+    if bound is None:
+        bound = _collections[key] = collection.with_options(read_preference=PROFILES[profile])
+    return bound
@@ -0,0 +1,215 @@
+# -------------------------------------------------------------------
+# Snapshot imutável dos dados de referência, mapeado em memória
+#
+# Estados, municípios por UF, bairros ativos por município, a tabela CBO
+# e a lista de permissões são iguais em todos os workers. O snapshot
+# guarda, para cada chave de consulta, o corpo JSON já pronto da resposta:
+#
+#   cabeçalho   MAGIC (8 bytes) + quantidade de chaves (uint32)
+#               + carimbo: hash das constantes do código (16 bytes)
+#               + momento da geração (double, epoch)
+#   índice      entradas ordenadas: chave (32 bytes) + offset (uint64) + tamanho (uint32)
+#   dados       corpos JSON concatenados
+#
+# Os workers abrem o arquivo com mmap somente leitura: as páginas ficam no
+# page cache do sistema e são compartilhadas, sem cópia por worker e sem
+# consultas ao MongoDB. A busca é binária direto no índice mapeado.
+#
+# O snapshot é gerado no deploy (`manage.py build-refdata`) ou, se não
+# existir ou estiver vencido, pelo primeiro worker que obtiver o lock.
+# Vencido é o snapshot de outra versão das constantes do código (tabela
+# CBO, permissões) ou gerado há mais de REFDATA_MAX_AGE_SECONDS (dados do
+# MongoDB). Um arquivo novo substitui o anterior com os.replace e é
+# detectado pelos workers em até REFDATA_RELOAD_SECONDS.
+# -------------------------------------------------------------------
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+from fastapi import Response
+
+from .db import db_gpac
+from .settings import REFDATA_MAX_AGE_SECONDS, REFDATA_PATH, REFDATA_RELOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"EQREF02\n"
+HEADER = struct.Struct("<8sI16sd")
+ENTRY = struct.Struct("<32sQI")
+KEY_SIZE = 32
+
+# Snapshot aberto: (mmap, quantidade de chaves, inode do arquivo)
+_snapshot = None
+_checked_at = 0.0
+
+
+def _dumps(value) -> bytes:
+    # Mesmo formato do JSONResponse do FastAPI
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# -------------------------------------------------------------------
+# Geração
+# -------------------------------------------------------------------
+def _constants():
+    from .routes.especialidades_gpac import CBO_ESPECIALIDADES
+    from .routes.perfis_gpac import AVAILABLE_PERMISSIONS
+
+    return AVAILABLE_PERMISSIONS, CBO_ESPECIALIDADES
+
+
+def code_stamp() -> bytes:
+    """Hash das constantes do código que entram no snapshot."""
+    return hashlib.blake2b(_dumps(_constants()), digest_size=16).digest()
+
+
+async def collect():
+    """Chave -> valor de todos os dados de referência."""
+    AVAILABLE_PERMISSIONS, CBO_ESPECIALIDADES = _constants()
+
+    data = {"permissions": AVAILABLE_PERMISSIONS}
+    for cbo, especialidade in CBO_ESPECIALIDADES.items():
+        data[f"cbo/{cbo}"] = especialidade
+
+    estados = await db_gpac.estados.find({}, {"codigo_ibge": 1, "sigla": 1, "nome": 1}).sort("nome", 1).to_list(None)
+    if estados:
+        data["estados"] = [{"id": e.get("codigo_ibge"), "sigla": e.get("sigla"), "nome": e.get("nome")} for e in estados]
+
+    municipios = {}
+    cursor = db_gpac.municipios.find({}, {"codigo_ibge": 1, "nome": 1, "estado_sigla": 1}).sort("nome", 1)
+    async for m in cursor:
+        municipios.setdefault(f"municipios/{m.get('estado_sigla')}", []).append(
+            {"id": m.get("codigo_ibge"), "nome": m.get("nome")}
+        )
+    data.update(municipios)
+
+    bairros = {}
+    async for b in db_gpac.bairros.find({"ativo": True}, {"municipio_codigo_ibge": 1, "nome": 1}):
+        bairros.setdefault(f"bairros/{b.get('municipio_codigo_ibge')}", set()).add(b.get("nome"))
+    data.update({key: sorted(names) for key, names in bairros.items()})
+    return data
+
+
+def write_snapshot(data, path=REFDATA_PATH):
+    """Grava o snapshot em um arquivo temporário e troca atomicamente."""
+    keys = sorted(k.encode("utf-8") for k in data)
+    if any(len(k) > KEY_SIZE for k in keys):
+        raise ValueError("Chave do snapshot maior que 32 bytes")
+    bodies = [_dumps(data[k.decode("utf-8")]) for k in keys]
+
+    offset = HEADER.size + ENTRY.size * len(keys)
+    index = bytearray()
+    for key, body in zip(keys, bodies):
+        index += ENTRY.pack(key, offset, len(body))
+        offset += len(body)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), code_stamp(), time.time()))
+        f.write(index)
+        for body in bodies:
+            f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(keys), offset
+
+
+async def build(path=REFDATA_PATH):
+    return write_snapshot(await collect(), path)
+
+
+def stale(path=REFDATA_PATH):
+    """True se o snapshot não existe, é de outro formato ou versão das
+    constantes do código, ou passou de REFDATA_MAX_AGE_SECONDS."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except FileNotFoundError:
+        return True
+    if len(header) < HEADER.size:
+        return True
+    magic, _, stamp, built_at = HEADER.unpack(header)
+    if magic != MAGIC or stamp != code_stamp():
+        return True
+    return REFDATA_MAX_AGE_SECONDS > 0 and time.time() - built_at > REFDATA_MAX_AGE_SECONDS
+
+
+async def ensure(path=REFDATA_PATH):
+    """Gera o snapshot se não existir ou estiver vencido. Só um worker gera
+    (flock); os demais seguem com o snapshot atual (ou consultando o
+    MongoDB) até o novo aparecer."""
+    if stale(path):
+        with open(f"{path}.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return _open(path)
+            try:
+                if stale(path):
+                    keys, size = await build(path)
+                    logger.info("Snapshot de referência gerado: %s chaves, %s bytes", keys, size)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    return _open(path)
+
+
+# -------------------------------------------------------------------
+# Leitura
+# -------------------------------------------------------------------
+def _open(path=REFDATA_PATH):
+    global _snapshot, _checked_at
+    _checked_at = time.monotonic()
+    try:
+        with open(path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if _snapshot and _snapshot[2] == inode:
+                return True
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return False
+    magic, count, _, _ = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        mapped.close()
+        logger.error("Snapshot de referência inválido: %s", path)
+        return False
+    # O mapeamento anterior é liberado quando não houver mais referências
+    _snapshot = (mapped, count, inode)
+    return True
+
+
+def _find(mapped, count, key: bytes):
+    key = key.ljust(KEY_SIZE, b"\0")
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        base = HEADER.size + mid * ENTRY.size
+        current = mapped[base:base + KEY_SIZE]
+        if current < key:
+            lo = mid + 1
+        elif current > key:
+            hi = mid
+        else:
+            _, offset, length = ENTRY.unpack_from(mapped, base)
+            return mapped[offset:offset + length]
+    return None
+
+
+def lookup(key: str):
+    """Corpo JSON (bytes) da chave, ou None se não houver snapshot/chave."""
+    if time.monotonic() - _checked_at > REFDATA_RELOAD_SECONDS:
+        _open()
+    if _snapshot is None:
+        return None
+    mapped, count, _ = _snapshot
+    return _find(mapped, count, key.encode("utf-8"))
+
+
+def response(key: str):
+    body = lookup(key)
+    return Response(content=body, media_type="application/json") if body is not None else None
@@ -1,30 +1,34 @@
 # -------------------------------------------------------------------
 # Imports padrão e externos
 # -------------------------------------------------------------------
-import os
 import uuid
 import secrets
 import hashlib
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from typing import List, Optional
 import io
 import base64
 
 import pyotp
 import qrcode
-import geoip2.database
-from fastapi import APIRouter, Request, Response, HTTPException, status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Query, Request, Response, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, EmailStr, Field
 
 # -------------------------------------------------------------------
 # Imports internos
 # -------------------------------------------------------------------
-from backend.db import db_equora
+from backend.db import client, db_equora
 from backend.schemas.schemas_equora import (
     UserCreate, UserPasswordLogin, User2FALogin, UserOut, 
     ClientCreate, ClientOut, UserUpdate
 )
+from backend.schemas.trusted import trusted_list_response
+from backend.dbstats import DATABASES, build_report
+from backend import access_docs, access_partitions, access_rollups, access_uniques, beacons, exports, geohash, geoip, health
+from backend.metering import daily_usage
+from backend.settings import EXPORT_BATCH_SIZE, REPORT_SAMPLE_SIZE, STATS_HOURLY_MAX_DAYS
+from backend.readpref import reads
 
 
 
@@ -38,20 +42,22 @@ SESSION_EXPIRE_MINUTES = 30
 
 # -------------------------------------------------------------------
 # Estatísticas de Acesso (rota usada pelo frontend AdminStatistics)
-# Coleção: stats_access
-# Campos esperados: { ip: str, location?: {country, city, latitude, longitude}, timestamp: datetime }
+# Coleções: stats_access_AAAA_MM (partições mensais, access_partitions.py)
+# Formato dos documentos: access_docs.py
 # -------------------------------------------------------------------
 
 
 class AccessIn(BaseModel):
-    ip: Optional[str] = None
-    path: Optional[str] = None
+    # Limites para o beacon não levar documentos enormes para a fila
+    ip: Optional[str] = Field(None, max_length=64)
+    path: Optional[str] = Field(None, max_length=2048)
 
 
 @router.get("/stats/access")
 async def list_access_stats(start: Optional[str] = None, end: Optional[str] = None):
     """Retorna acessos salvos (opcional filtro por intervalo ISO date yyyy-mm-dd)."""
     query = {}
+    start_dt = end_dt = None
     if start or end:
         # converter strings para datetimes simples (com hora 00:00) para filtrar
         try:
@@ -73,59 +79,128 @@ async def list_access_stats(start: Optional[str] = None, end: Optional[str] = No
         elif end_dt:
             query["timestamp"] = {"$lte": end_dt}
 
-    cursor = db_equora["stats_access"].find(query).sort("timestamp", -1).limit(1000)
+    # Partições do intervalo, da mais nova para a mais antiga, até juntar
+    # 1000 acessos (a coleção antiga, se ainda existir, é sempre lida).
+    # Documentos já no formato canônico (access_docs.py): a projeção roda
+    # no MongoDB. Relatório: pode ler de um secundário
+    limit = 1000
+    partitions = await access_partitions.collections(
+        db_equora, start_dt, end_dt and end_dt + timedelta(microseconds=1), newest_first=True,
+    )
     results = []
-    async for doc in cursor:
-        # normalizar retorno para o frontend
-        loc = doc.get("location")
-        norm_loc = None
-        if loc and isinstance(loc, dict):
-            # aceitar várias formas de chaves e converter strings para números
-            lat = None
-            lon = None
-            if "latitude" in loc:
-                lat = loc.get("latitude")
-            elif "lat" in loc:
-                lat = loc.get("lat")
-            if "longitude" in loc:
-                lon = loc.get("longitude")
-            elif "lng" in loc:
-                lon = loc.get("lng")
+    for collection in partitions:
+        legacy = collection.name == access_partitions.LEGACY
+        if len(results) >= limit and not legacy:
+            continue
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"timestamp": -1}},
+            {"$limit": limit if legacy else limit - len(results)},
+            {"$project": access_docs.LIST_PROJECTION},
+        ]
+        results += await reads(collection).aggregate(pipeline).to_list(None)
+    results.sort(key=lambda row: row.get("timestamp") or "", reverse=True)
+    return results[:limit]
+
+
+@router.get("/stats/access/summary")
+async def access_stats_summary(start: Optional[str] = None, end: Optional[str] = None,
+                               granularity: str = "day", top: int = 10):
+    """Resumo dos acessos a partir dos rollups (access_rollups.py): total por
+    dia ou hora e os países, cidades e caminhos com mais acessos.
+    start/end no formato yyyy-mm-dd (inclusivos)."""
+    if granularity not in access_rollups.ROLLUPS:
+        raise HTTPException(status_code=400, detail="granularity deve ser 'day' ou 'hour'")
+    if not 1 <= top <= 100:
+        raise HTTPException(status_code=400, detail="top deve estar entre 1 e 100")
+    try:
+        start_dt = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end_dt = datetime.strptime(end, "%Y-%m-%d") if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de data inválido. Use yyyy-mm-dd")
+    if granularity == "hour" and (not start_dt or not end_dt or (end_dt - start_dt).days >= STATS_HOURLY_MAX_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Por hora, informe start e end com no máximo {STATS_HOURLY_MAX_DAYS} dias",
+        )
+    collection = reads(db_equora[access_rollups.collection_name(granularity)])
+    return await access_rollups.summary(collection, granularity, start, end, top)
 
-            try:
-                if isinstance(lat, str):
-                    lat = float(lat)
-                if isinstance(lon, str):
-                    lon = float(lon)
-            except Exception:
-                lat = None
-                lon = None
-
-            if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
-                norm_loc = {
-                    "country": loc.get("country"),
-                    "city": loc.get("city"),
-                    "latitude": lat,
-                    "longitude": lon
-                }
-
-        # garantir que retornamos ISO com info de timezone (converter naive -> UTC)
-        ts = doc.get("timestamp")
-        ts_iso = None
-        if ts:
-            try:
-                if getattr(ts, 'tzinfo', None) is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-                ts_iso = ts.isoformat()
-            except Exception:
-                ts_iso = None
-
-        results.append({
-            "ip": doc.get("ip"),
-            "location": norm_loc,
-            "timestamp": ts_iso
+
+@router.get("/stats/access/uniques")
+async def access_stats_uniques(start: Optional[str] = None, end: Optional[str] = None, path: Optional[str] = None):
+    """Visitantes únicos (IPs distintos) estimados no intervalo, juntando os
+    esboços HyperLogLog diários (access_uniques.py); total e série por dia.
+    start/end no formato yyyy-mm-dd (inclusivos); path filtra um caminho."""
+    try:
+        start_dt = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end_dt = datetime.strptime(end, "%Y-%m-%d") if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de data inválido. Use yyyy-mm-dd")
+    if start_dt and end_dt and end_dt < start_dt:
+        raise HTTPException(status_code=400, detail="end deve ser igual ou posterior a start")
+    collection = reads(db_equora[access_uniques.COLLECTION])
+    return await access_uniques.unique_visitors(collection, start, end, path)
+
+
+@router.get("/stats/access/clusters")
+async def access_stats_clusters(south: float, west: float, north: float, east: float, zoom: int,
+                                start: Optional[str] = None, end: Optional[str] = None):
+    """Acessos agrupados para o mapa: uma célula de geohash por marcador,
+    com o total de acessos, dentro da área visível (west > east cruza o
+    antimeridiano). O tamanho da célula vem do zoom do Leaflet."""
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise HTTPException(status_code=400, detail="Área inválida")
+    if not 0 <= zoom <= 22:
+        raise HTTPException(status_code=400, detail="zoom deve estar entre 0 e 22")
+    try:
+        start_dt = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end_dt = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de data inválido. Use yyyy-mm-dd")
+
+    precision = geohash.precision_for_zoom(zoom)
+    ranges = geohash.covering_ranges(south, west, north, east, precision)
+    match = {"$or": [{"geohash": {"$gte": lo, "$lt": hi}} for lo, hi in ranges]}
+    if start_dt or end_dt:
+        match["timestamp"] = {}
+        if start_dt:
+            match["timestamp"]["$gte"] = start_dt
+        if end_dt:
+            match["timestamp"]["$lt"] = end_dt
+    # Só campos do índice {geohash, timestamp}: a agregação não lê os documentos
+    pipeline = [
+        {"$match": match},
+        {"$project": {"_id": 0, "cell": {"$substrCP": ["$geohash", 0, precision]}}},
+        {"$group": {"_id": "$cell", "count": {"$sum": 1}}},
+    ]
+    counts = {}
+    for collection in await access_partitions.collections(db_equora, start_dt, end_dt):
+        async for row in reads(collection).aggregate(pipeline):
+            counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+
+    boxes = geohash.split_bbox(south, west, north, east)
+    clusters = []
+    for cell, count in counts.items():
+        cell_south, cell_west, cell_north, cell_east = geohash.bounds(cell)
+        # Os intervalos podem ser mais largos que a área visível
+        if not any(cell_south <= n and cell_north >= s and cell_west <= e and cell_east >= w
+                   for s, w, n, e in boxes):
+            continue
+        lat, lon = geohash.center(cell)
+        clusters.append({
+            "geohash": cell,
+            "count": count,
+            "latitude": lat,
+            "longitude": lon,
+            "bounds": [cell_south, cell_west, cell_north, cell_east],
         })
-    return results
+    clusters.sort(key=lambda c: c["count"], reverse=True)
+    return {
+        "precision": precision,
+        "total": sum(c["count"] for c in clusters),
+        "clusters": clusters,
+    }
 
 
 @router.post("/stats/access", status_code=201)
@@ -143,51 +218,106 @@ async def create_access_stat(access: AccessIn, request: Request):
             client = request.client
             ip = client.host if client else None
 
-    doc = {"ip": ip, "timestamp": datetime.utcnow()}
-    # salvar caminho da página quando enviado pelo frontend (opcional)
-    if getattr(access, 'path', None):
-        doc["path"] = access.path
-    # tentativa simples de lookup geoip se banco local estiver presente (opcional)
-    try:
-        # inserir sem bloquear caso geoip não esteja configurado
-        reader_path = os.getenv("GEOIP_DB_PATH")
-        if not reader_path:
-            # tentar fallback relativo ao diretório backend
-            this_dir = os.path.dirname(__file__)
-            reader_path = os.path.abspath(os.path.join(this_dir, '..', 'GeoLite2-City.mmdb'))
-        if reader_path and os.path.exists(reader_path):
-            try:
-                # somente tentar lookup se tivermos um IP
-                if ip:
-                    with geoip2.database.Reader(reader_path) as reader:
-                        r = reader.city(ip)
-                        loc = {"country": r.country.name, "city": r.city.name, "latitude": r.location.latitude, "longitude": r.location.longitude}
-                        doc["location"] = loc
-            except Exception:
-                pass
-    except Exception:
-        pass
-
-    await db_equora["stats_access"].insert_one(doc)
+    # Documento no formato canônico (access_docs.py), com o caminho da página
+    # quando enviado e a localização do leitor GeoIP do processo (se houver)
+    doc = access_docs.build(ip, path=access.path, location=geoip.lookup(ip))
+
+    # Gravação em lote pela fila do beacons.py; responde sem esperar o banco
+    beacons.submit(doc)
     return {"result": "ok"}
 
 
+@router.get("/stats/access/export")
+async def export_access_stats(request: Request, start: Optional[str] = None, end: Optional[str] = None,
+                              format: str = "ndjson", gzip: bool = False):
+    """Exporta todos os acessos do intervalo (start/end yyyy-mm-dd, inclusivos)
+    em NDJSON ou CSV, em streaming e sem limite de linhas — requer sessão de admin."""
+    await require_admin(request, "Apenas administradores podem exportar estatísticas")
+    if format not in exports.FORMATS:
+        raise HTTPException(status_code=400, detail="format deve ser 'ndjson' ou 'csv'")
+    query = {}
+    try:
+        start_dt = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end_dt = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de data inválido. Use yyyy-mm-dd")
+    if start_dt:
+        query.setdefault("timestamp", {})["$gte"] = start_dt
+    if end_dt:
+        query.setdefault("timestamp", {})["$lt"] = end_dt
+
+    # Cursores em lotes, partição a partição em ordem cronológica, com as
+    # linhas já achatadas pelo MongoDB; pode ler de um secundário
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"timestamp": 1}},
+        {"$project": access_docs.EXPORT_PROJECTION},
+    ]
+    partitions = await access_partitions.collections(db_equora, start_dt, end_dt)
+
+    async def cursor():
+        for collection in partitions:
+            async for row in reads(collection).aggregate(pipeline, batchSize=EXPORT_BATCH_SIZE):
+                yield row
+
+    name = exports.filename(f"stats_access_{start or 'inicio'}_{end or 'hoje'}", format, gzip)
+    return StreamingResponse(
+        exports.stream_rows(cursor(), dict, access_docs.EXPORT_FIELDS, format, compress=gzip),
+        media_type=exports.media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
+
 @router.delete("/stats/access")
 async def clear_access_stats(request: Request):
     """Limpa todos os registros de acesso — requer sessão de admin."""
-    session_id = request.cookies.get(SESSION_COOKIE_NAME)
-    if not session_id:
-        raise HTTPException(status_code=401, detail="Não autenticado")
-    user_id = await verify_session(session_id)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Sessão inválida")
-    user = await db_equora.users.find_one({"id": user_id})
-    if not user or not user.get("is_admin"):
-        raise HTTPException(status_code=403, detail="Apenas administradores podem limpar estatísticas")
-    await db_equora["stats_access"].delete_many({})
+    await require_admin(request, "Apenas administradores podem limpar estatísticas")
+    # drop das partições e dos rollups, em vez de apagar documento a documento
+    await access_partitions.drop_all(db_equora)
+    for granularity in access_rollups.ROLLUPS:
+        await db_equora.drop_collection(access_rollups.collection_name(granularity))
+    await db_equora.drop_collection(access_uniques.COLLECTION)
     return {"result": "cleared"}
 
 
+# -------------------------------------------------------------------
+# Uso por tenant (rollups diários gravados por metering.py)
+# -------------------------------------------------------------------
+@router.get("/usage")
+async def list_usage(request: Request, start: Optional[str] = None, end: Optional[str] = None,
+                     tenant: Optional[str] = None, by_route: bool = False):
+    """Requisições, bytes, operações Mongo e erros por dia e tenant
+    (start/end no formato yyyy-mm-dd) — requer sessão de admin."""
+    await require_admin(request, "Apenas administradores podem ver o uso")
+    for value in (start, end):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Formato de data inválido. Use yyyy-mm-dd")
+    return await daily_usage(db_equora.usage, start, end, tenant, by_route)
+
+
+# -------------------------------------------------------------------
+# Diagnóstico do banco
+# -------------------------------------------------------------------
+@router.get("/db/report")
+async def db_report(request: Request, database: Optional[str] = None,
+                    sample_size: int = Query(REPORT_SAMPLE_SIZE, ge=1, le=1000)):
+    """Tamanho das coleções, uso de índices e alertas (dbstats.py) — requer sessão de admin."""
+    await require_admin(request, "Apenas administradores podem ver o relatório do banco")
+    if database and database not in DATABASES:
+        raise HTTPException(status_code=404, detail="Banco desconhecido")
+    return await build_report([database] if database else None, sample_size=sample_size)
+
+
+@router.get("/health")
+async def worker_health(request: Request):
+    """Readiness, pool, lag do event loop e caches deste worker — requer sessão de admin."""
+    await require_admin(request, "Apenas administradores podem ver a saúde do servidor")
+    return await health.details(client)
+
+
 # -------------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------------
@@ -206,6 +336,19 @@ async def verify_session(session_id: str):
         return None
     return session["user_id"]
 
+async def require_admin(request: Request, detail: str = "Apenas administradores"):
+    """Valida a sessão do cookie e exige usuário admin; retorna o usuário."""
+    session_id = request.cookies.get(SESSION_COOKIE_NAME)
+    if not session_id:
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    user_id = await verify_session(session_id)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Sessão inválida")
+    user = await db_equora.users.find_one({"id": user_id})
+    if not user or not user.get("is_admin"):
+        raise HTTPException(status_code=403, detail=detail)
+    return user
+
 # Token temporário para login 2FA
 # Nota: não usar armazenamento em memória para temp tokens quando backend
 # roda em múltiplas instâncias (pm2, cluster). Usaremos a coleção MongoDB
@@ -241,7 +384,7 @@ async def create_user(user: UserCreate):
 @router.get("/users", response_model=List[UserOut])
 async def list_users():
     users = await db_equora.users.find().to_list(100)
-    return [UserOut(**u) for u in users]
+    return trusted_list_response(UserOut, users)
 
 @router.put("/users/{user_id}", response_model=UserOut)
 async def update_user(user_id: str, user_update: UserUpdate, request: Request):
@@ -4,8 +4,8 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
-from schemas.schemas_aguanaboca import User, UserInDB, Token, TokenData
-from db import db_agua_na_boca
+from ..schemas.schemas_aguanaboca import User, UserInDB, Token, TokenData
+from ..db import db_agua_na_boca
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "secret-key")
@@ -5,6 +5,9 @@ from datetime import datetime
 from ..db import db_gpac
 from bson import ObjectId
 import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/colaboradores", tags=["Colaboradores GPAC"])
 
@@ -50,48 +53,40 @@ async def login_colaborador(login_data: LoginRequest):
     Endpoint para autenticação de colaboradores
     """
     try:
-        print(f"[DEBUG] Tentativa de login para username: {login_data.username}")
-        
         # Buscar colaborador pelo username
         colaborador = await db_gpac.colaboradores.find_one({"username": login_data.username})
         
         if not colaborador:
-            print(f"[DEBUG] Usuário não encontrado: {login_data.username}")
+            logger.info("Login recusado: usuário não encontrado", extra={"username": login_data.username})
             return LoginResponse(
                 success=False,
                 message="Usuário não encontrado"
             )
         
-        print(f"[DEBUG] Usuário encontrado: {colaborador.get('name')}")
-        
         # Verificar senha (hash)
         password_hash = hashlib.sha256(login_data.password.encode()).hexdigest()
         stored_password = colaborador.get("password")
         
-        print(f"[DEBUG] Senha fornecida (hash): {password_hash}")
-        print(f"[DEBUG] Senha armazenada: {stored_password}")
-        
-        # Verificar se a senha armazenada está hasheada ou não
-        if stored_password == password_hash:
-            # Senha hasheada confere
-            print("[DEBUG] Senha hasheada confere")
-        elif stored_password == login_data.password:
-            # Senha em texto simples confere (backward compatibility)
-            print("[DEBUG] Senha em texto simples confere")
-        elif not stored_password and login_data.password in ['admin', 'admin123', '123456']:
-            # Senha não definida no banco, aceitar senhas padrão temporariamente
-            print("[DEBUG] Senha não definida, usando senha padrão temporária")
-            # Atualizar a senha no banco com hash
-            await db_gpac.colaboradores.update_one(
-                {"_id": ObjectId(colaborador["_id"])},
-                {"$set": {"password": password_hash}}
-            )
-        else:
-            print("[DEBUG] Senha não confere")
-            return LoginResponse(
-                success=False,
-                message="Senha incorreta"
-            )
+        # Verificar se a senha armazenada está hasheada ou não (hash que
+        # confere segue direto para o login)
+        if stored_password != password_hash:
+            if stored_password == login_data.password:
+                # Senha em texto simples confere (backward compatibility)
+                logger.warning("Senha em texto simples no cadastro", extra={"username": login_data.username})
+            elif not stored_password and login_data.password in ['admin', 'admin123', '123456']:
+                # Senha não definida no banco, aceitar senhas padrão temporariamente
+                logger.warning("Senha não definida, usando senha padrão temporária", extra={"username": login_data.username})
+                # Atualizar a senha no banco com hash
+                await db_gpac.colaboradores.update_one(
+                    {"_id": ObjectId(colaborador["_id"])},
+                    {"$set": {"password": password_hash}}
+                )
+            else:
+                logger.info("Login recusado: senha incorreta", extra={"username": login_data.username})
+                return LoginResponse(
+                    success=False,
+                    message="Senha incorreta"
+                )
         
         # Preparar dados do usuário para retorno (sem senha)
         user_data = {
@@ -105,7 +100,7 @@ async def login_colaborador(login_data: LoginRequest):
             "crm": colaborador.get("crm")
         }
         
-        print(f"[DEBUG] Login bem-sucedido para: {colaborador.get('name')}")
+        logger.debug("Login bem-sucedido", extra={"username": login_data.username})
         
         return LoginResponse(
             success=True,
@@ -116,7 +111,7 @@ async def login_colaborador(login_data: LoginRequest):
         )
         
     except Exception as e:
-        print(f"[ERROR] Erro no login: {str(e)}")
+        logger.exception("Erro no login")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
 @router.get("/debug/{username}")
@@ -3,6 +3,9 @@ from ..db import db_gpac
 from ..schemas.schemas_gpac import TeamModel
 from bson import ObjectId
 from typing import Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/equipes", tags=["Equipes GPAC"])
 
@@ -24,40 +27,32 @@ async def test_db_connection():
 @router.post("/")
 async def create_team(team: TeamModel):
     try:
-        print(f"🔍 Dados recebidos para criação de equipe: {team}")
         team_dict = team.model_dump()
-        print(f"🔍 Dados após model_dump: {team_dict}")
-        print(f"🔍 Districts específicos: {team_dict.get('districts', 'NÃO ENCONTRADO')}")
+        logger.debug("Criando equipe", extra={"districts": len(team_dict.get("districts") or [])})
         
         result = await db_gpac.equipes.insert_one(team_dict)
         team_dict["_id"] = str(result.inserted_id)
-        print(f"✅ Equipe criada com sucesso: {result.inserted_id}")
+        logger.info("Equipe criada", extra={"team_id": team_dict["_id"]})
         
         return team_dict
     except Exception as e:
-        print(f"❌ Erro ao criar equipe: {str(e)}")
-        import traceback
-        print(f"🔍 Stack trace completo: {traceback.format_exc()}")
+        logger.exception("Erro ao criar equipe")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
 @router.get("/")
 async def list_teams():
     try:
-        print("🔍 Iniciando listagem de equipes...")
         teams = await db_gpac.equipes.find().to_list(1000)
-        print(f"✅ {len(teams)} equipes encontradas")
+        logger.debug("Equipes listadas", extra={"count": len(teams)})
         
-        # Converter ObjectId para string manualmente e verificar districts
+        # Converter ObjectId para string manualmente
         for team in teams:
             if '_id' in team:
                 team['_id'] = str(team['_id'])
-            print(f"🔍 Equipe: {team.get('name', 'SEM NOME')} - Districts: {team.get('districts', 'NÃO ENCONTRADO')}")
         
         return teams
     except Exception as e:
-        print(f"❌ Erro ao listar equipes: {str(e)}")
-        import traceback
-        print(f"🔍 Stack trace completo: {traceback.format_exc()}")
+        logger.exception("Erro ao listar equipes")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
 @router.get("/{team_id}")
@@ -73,26 +68,22 @@ async def get_team(team_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar equipe: {str(e)}")
+        logger.exception("Erro ao buscar equipe", extra={"team_id": team_id})
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
 @router.put("/{team_id}")
 async def update_team(team_id: str, team: TeamModel):
     try:
-        print(f"🔍 Atualizando equipe {team_id} com dados: {team}")
-        
         if not ObjectId.is_valid(team_id):
             raise HTTPException(status_code=400, detail="ID da equipe inválido")
             
         team_dict = team.model_dump(exclude_unset=True)
-        print(f"🔍 Dados processados para atualização: {team_dict}")
-        print(f"🔍 Districts para atualização: {team_dict.get('districts', 'NÃO ENCONTRADO')}")
+        logger.debug("Atualizando equipe", extra={"team_id": team_id, "fields": sorted(team_dict)})
         
         result = await db_gpac.equipes.update_one(
             {"_id": ObjectId(team_id)},
             {"$set": team_dict}
         )
-        print(f"🔍 Resultado da atualização: matched={result.matched_count}, modified={result.modified_count}")
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Equipe não encontrada")
@@ -101,14 +92,12 @@ async def update_team(team_id: str, team: TeamModel):
         if updated_team and '_id' in updated_team:
             updated_team['_id'] = str(updated_team['_id'])
         
-        print(f"✅ Equipe atualizada com sucesso: {updated_team}")
+        logger.info("Equipe atualizada", extra={"team_id": team_id, "modified": result.modified_count})
         return updated_team
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erro ao atualizar equipe: {str(e)}")
-        import traceback
-        print(f"🔍 Stack trace completo: {traceback.format_exc()}")
+        logger.exception("Erro ao atualizar equipe", extra={"team_id": team_id})
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
 @router.delete("/{team_id}")
@@ -124,5 +113,5 @@ async def delete_team(team_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao excluir equipe: {str(e)}")
+        logger.exception("Erro ao excluir equipe", extra={"team_id": team_id})
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
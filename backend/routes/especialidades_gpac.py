@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
+from .. import refdata
+
 # Definindo o router para especialidades
 router = APIRouter(prefix="/especialidades", tags=["Especialidades GPAC"])
 
@@ -31,6 +33,90 @@ especialidades_data = [
     {"id": "10", "cbo": "2260", "name": "Médico Neurologista", "description": "Especialista em diagnóstico e tratamento de doenças do sistema nervoso"}
 ]
 
+# Tabela CBO de especialidades conhecidas (usada quando o CBO não está em especialidades_data)
+CBO_ESPECIALIDADES = {
+    '2251': {
+        'name': 'Médico Clínico',
+        'description': 'Médico generalista responsável pelo diagnóstico e tratamento de doenças em adultos'
+    },
+    '2252': {
+        'name': 'Médico em Medicina de Família e Comunidade',
+        'description': 'Especialista em cuidados primários de saúde para indivíduos e famílias'
+    },
+    '2253': {
+        'name': 'Médico Cardiologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do coração e sistema cardiovascular'
+    },
+    '2254': {
+        'name': 'Médico Dermatologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças da pele, cabelos e unhas'
+    },
+    '2255': {
+        'name': 'Médico Ginecologista e Obstetra',
+        'description': 'Especialista em saúde reprodutiva feminina, gravidez e parto'
+    },
+    '2256': {
+        'name': 'Médico Oftalmologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças dos olhos'
+    },
+    '2257': {
+        'name': 'Médico Ortopedista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do sistema músculo-esquelético'
+    },
+    '2258': {
+        'name': 'Médico Pediatra',
+        'description': 'Especialista em cuidados médicos de bebês, crianças e adolescentes'
+    },
+    '2259': {
+        'name': 'Médico Psiquiatra',
+        'description': 'Especialista em diagnóstico e tratamento de transtornos mentais'
+    },
+    '2260': {
+        'name': 'Médico Neurologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do sistema nervoso'
+    },
+    '2261': {
+        'name': 'Médico Endocrinologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do sistema endócrino'
+    },
+    '2262': {
+        'name': 'Médico Gastroenterologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do sistema digestivo'
+    },
+    '2263': {
+        'name': 'Médico Pneumologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do sistema respiratório'
+    },
+    '2264': {
+        'name': 'Médico Nefrologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças dos rins'
+    },
+    '2265': {
+        'name': 'Médico Oncologista',
+        'description': 'Especialista em diagnóstico e tratamento de câncer'
+    },
+    '2266': {
+        'name': 'Médico Urologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças do sistema urinário'
+    },
+    '2267': {
+        'name': 'Médico Anestesiologista',
+        'description': 'Especialista em anestesia e cuidados perioperatórios'
+    },
+    '2268': {
+        'name': 'Médico Radiologista',
+        'description': 'Especialista em diagnóstico por imagem'
+    },
+    '2269': {
+        'name': 'Médico Patologista',
+        'description': 'Especialista em diagnóstico de doenças através de análise de tecidos'
+    },
+    '2270': {
+        'name': 'Médico Infectologista',
+        'description': 'Especialista em diagnóstico e tratamento de doenças infecciosas'
+    }
+}
+
 @router.get("/")
 async def get_specialties():
     """Retorna todas as especialidades"""
@@ -128,91 +214,12 @@ async def get_specialty_by_cbo(cbo: str):
                     "description": esp.get("description", "")
                 }
         
-        # Se não encontrar, buscar no dicionário de CBOs conhecidos
-        cbo_especialidades = {
-            '2251': {
-                'name': 'Médico Clínico',
-                'description': 'Médico generalista responsável pelo diagnóstico e tratamento de doenças em adultos'
-            },
-            '2252': {
-                'name': 'Médico em Medicina de Família e Comunidade',
-                'description': 'Especialista em cuidados primários de saúde para indivíduos e famílias'
-            },
-            '2253': {
-                'name': 'Médico Cardiologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do coração e sistema cardiovascular'
-            },
-            '2254': {
-                'name': 'Médico Dermatologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças da pele, cabelos e unhas'
-            },
-            '2255': {
-                'name': 'Médico Ginecologista e Obstetra',
-                'description': 'Especialista em saúde reprodutiva feminina, gravidez e parto'
-            },
-            '2256': {
-                'name': 'Médico Oftalmologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças dos olhos'
-            },
-            '2257': {
-                'name': 'Médico Ortopedista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do sistema músculo-esquelético'
-            },
-            '2258': {
-                'name': 'Médico Pediatra',
-                'description': 'Especialista em cuidados médicos de bebês, crianças e adolescentes'
-            },
-            '2259': {
-                'name': 'Médico Psiquiatra',
-                'description': 'Especialista em diagnóstico e tratamento de transtornos mentais'
-            },
-            '2260': {
-                'name': 'Médico Neurologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do sistema nervoso'
-            },
-            '2261': {
-                'name': 'Médico Endocrinologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do sistema endócrino'
-            },
-            '2262': {
-                'name': 'Médico Gastroenterologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do sistema digestivo'
-            },
-            '2263': {
-                'name': 'Médico Pneumologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do sistema respiratório'
-            },
-            '2264': {
-                'name': 'Médico Nefrologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças dos rins'
-            },
-            '2265': {
-                'name': 'Médico Oncologista',
-                'description': 'Especialista em diagnóstico e tratamento de câncer'
-            },
-            '2266': {
-                'name': 'Médico Urologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças do sistema urinário'
-            },
-            '2267': {
-                'name': 'Médico Anestesiologista',
-                'description': 'Especialista em anestesia e cuidados perioperatórios'
-            },
-            '2268': {
-                'name': 'Médico Radiologista',
-                'description': 'Especialista em diagnóstico por imagem'
-            },
-            '2269': {
-                'name': 'Médico Patologista',
-                'description': 'Especialista em diagnóstico de doenças através de análise de tecidos'
-            },
-            '2270': {
-                'name': 'Médico Infectologista',
-                'description': 'Especialista em diagnóstico e tratamento de doenças infecciosas'
-            }
-        }
+        # Se não encontrar, buscar na tabela CBO (snapshot compartilhado, ver refdata.py)
         
-        especialidade = cbo_especialidades.get(cbo)
+        snapshot = refdata.response(f"cbo/{cbo}")
+        if snapshot is not None:
+            return snapshot
+        especialidade = CBO_ESPECIALIDADES.get(cbo)
         if especialidade:
             return especialidade
         else:
@@ -8,6 +8,11 @@ from fastapi import APIRouter, HTTPException
 from typing import List
 import asyncio
 from ..db import db_gpac
+from .. import refdata
+from ..readpref import reads
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Localização GPAC"])
 
@@ -19,6 +24,9 @@ bairros_collection = db_gpac["bairros"]
 @router.get("/estados", response_model=List[dict])
 async def get_estados():
     """Retorna lista de estados do banco local"""
+    snapshot = refdata.response("estados")
+    if snapshot is not None:
+        return snapshot
     try:
         cursor = estados_collection.find({}).sort("nome", 1)
         estados = []
@@ -29,13 +37,16 @@ async def get_estados():
                 "nome": estado.get("nome")
             })
         return estados
-    except Exception as e:
-        print(f"Erro ao buscar estados: {e}")
+    except Exception:
+        logger.exception("Erro ao buscar estados")
         return []
 
 @router.get("/municipios/{estado_sigla}", response_model=List[dict])
 async def get_municipios_by_estado(estado_sigla: str):
     """Retorna municípios de um estado do banco local"""
+    snapshot = refdata.response(f"municipios/{estado_sigla.upper()}")
+    if snapshot is not None:
+        return snapshot
     try:
         cursor = municipios_collection.find({"estado_sigla": estado_sigla.upper()}).sort("nome", 1)
         municipios = []
@@ -45,13 +56,16 @@ async def get_municipios_by_estado(estado_sigla: str):
                 "nome": municipio.get("nome")
             })
         return municipios
-    except Exception as e:
-        print(f"Erro ao buscar municípios: {e}")
+    except Exception:
+        logger.exception("Erro ao buscar municípios")
         return []
 
 @router.get("/bairros/{municipio_codigo}", response_model=List[str])
 async def get_bairros_by_municipio(municipio_codigo: int):
     """Retorna bairros de um município do banco local"""
+    snapshot = refdata.response(f"bairros/{municipio_codigo}")
+    if snapshot is not None:
+        return snapshot
     try:
         cursor = bairros_collection.find(
             {"municipio_codigo_ibge": municipio_codigo, "ativo": True}
@@ -62,22 +76,24 @@ async def get_bairros_by_municipio(municipio_codigo: int):
             bairros.append(bairro.get("nome"))
         
         return sorted(list(set(bairros)))
-    except Exception as e:
-        print(f"Erro ao buscar bairros: {e}")
+    except Exception:
+        logger.exception("Erro ao buscar bairros")
         return []
 
 @router.get("/admin/stats")
 async def get_stats():
     """Retorna estatísticas do banco de localização"""
     try:
+        # Contagens de relatório: podem ler de um secundário
+        bairros = reads(bairros_collection)
         stats = {
-            "estados": await estados_collection.count_documents({}),
-            "municipios": await municipios_collection.count_documents({}),
-            "bairros": await bairros_collection.count_documents({"ativo": True}),
+            "estados": await reads(estados_collection).count_documents({}),
+            "municipios": await reads(municipios_collection).count_documents({}),
+            "bairros": await bairros.count_documents({"ativo": True}),
         }
-        municipios_com_bairros = await bairros_collection.distinct("municipio_codigo_ibge")
+        municipios_com_bairros = await bairros.distinct("municipio_codigo_ibge")
         stats["municipios_com_bairros"] = len(municipios_com_bairros)
         return stats
-    except Exception as e:
-        print(f"Erro ao buscar estatísticas: {e}")
+    except Exception:
+        logger.exception("Erro ao buscar estatísticas")
         return {"estados": 0, "municipios": 0, "bairros": 0, "municipios_com_bairros": 0}
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import Optional, List
 from datetime import datetime
 from ..db import db_gpac
+from ..readpref import reads
 from bson import ObjectId
 
 router = APIRouter(prefix="/patients", tags=["Pacientes GPAC"])
@@ -120,8 +121,9 @@ async def excluir_paciente(id: str):
 @router.get("/debug/structure")
 async def debug_patient_structure():
     try:
-        count = await db_gpac.pacientes.count_documents({})
-        sample_patient = await db_gpac.pacientes.find_one()
+        pacientes = reads(db_gpac.pacientes)
+        count = await pacientes.count_documents({})
+        sample_patient = await pacientes.find_one()
         
         # Removido: contagem de pacientes com comorbidities
         
@@ -13,6 +13,10 @@ from ..api.apimercadopago import create_payment_preference
 # Importar schemas e conexão com banco
 from ..schemas.schemas_bkautocenter import Order, OrderCreate, OrderUpdate, OrderItem, PayerData, PaymentStatus, PaymentType
 from ..db import db_bkautocenter
+from ..readpref import reads
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Pagamentos BKautoCenter"])
 
@@ -152,9 +156,11 @@ async def create_checkout(request: CheckoutRequest):
         except:
             pass
         
-        # Gerar referência externa única
+        # Gerar referência externa única (o timestamp sozinho colide quando
+        # dois checkouts caem no mesmo segundo)
         import time
-        external_reference = f"BKAC-{int(time.time())}"
+        import uuid
+        external_reference = f"BKAC-{int(time.time())}-{uuid.uuid4().hex[:8]}"
         
         # Salvar pedido no banco de dados
         order_items = convert_cart_to_order_items(request.cart_items)
@@ -282,7 +288,7 @@ async def payment_callback(
         )
         
         # Log da atualização
-        print(f"Pedido {external_reference} atualizado: {status} -> {payment_status}")
+        logger.info("Pedido atualizado", extra={"external_reference": external_reference, "mp_status": status, "payment_status": payment_status.value})
         
         return {
             "success": True,
@@ -302,7 +308,8 @@ async def get_orders(skip: int = 0, limit: int = 100):
     Endpoint para listar pedidos
     """
     try:
-        orders = await db_bkautocenter.orders.find().skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
+        # Listagem administrativa: pode ler de um secundário
+        orders = await reads(db_bkautocenter.orders).find().skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
         
         # Converter para formato legível
         formatted_orders = []
@@ -352,8 +359,8 @@ async def mercadopago_webhook(request: Request):
         # Obter dados do webhook
         webhook_data = await request.json()
         
-        # Log dos dados recebidos
-        print(f"Webhook recebido: {webhook_data}")
+        # Log só dos identificadores (o payload pode ter dados do pagador)
+        logger.info("Webhook recebido", extra={"type": webhook_data.get("type"), "action": webhook_data.get("action")})
         
         # Verificar se é uma notificação de pagamento
         if webhook_data.get('type') == 'payment':
@@ -362,12 +369,12 @@ async def mercadopago_webhook(request: Request):
             if payment_id:
                 # Aqui você poderia consultar a API do MercadoPago para obter detalhes do pagamento
                 # Por ora, vamos apenas logar
-                print(f"Payment ID do webhook: {payment_id}")
+                logger.info("Pagamento notificado", extra={"payment_id": payment_id})
         
         return {"status": "received"}
         
     except Exception as e:
-        print(f"Erro no webhook: {str(e)}")
+        logger.exception("Erro no webhook")
         return {"status": "error", "message": str(e)}
 
 @router.get("/test")
@@ -4,10 +4,25 @@ from datetime import datetime
 from bson import ObjectId
 
 from ..db import db_gpac
+from .. import cache, refdata
 from ..schemas.schemas_gpac import ProfileModel
 
 router = APIRouter(prefix="/perfis", tags=["Perfis GPAC"])
 
+# Permissões disponíveis no sistema (também publicadas no snapshot de refdata.py)
+AVAILABLE_PERMISSIONS = [
+    {"id": "1", "name": "Visão Geral", "key": "overview", "type": "menu"},
+    {"id": "2", "name": "Pacientes", "key": "patients", "type": "menu"},
+    {"id": "3", "name": "Histórico de Pacientes", "key": "patient-history", "type": "menu"},
+    {"id": "4", "name": "Colaboradores", "key": "collaborators", "type": "menu"},
+    {"id": "5", "name": "Agendamentos", "key": "appointments", "type": "menu"},
+    {"id": "6", "name": "Administração", "key": "admin", "type": "menu"},
+    {"id": "7", "name": "Comorbidades", "key": "admin-comorbidities", "type": "submenu", "parentKey": "admin"},
+    {"id": "8", "name": "Especialidades", "key": "admin-specialties", "type": "submenu", "parentKey": "admin"},
+    {"id": "9", "name": "Perfis", "key": "admin-profiles", "type": "submenu", "parentKey": "admin"},
+    {"id": "10", "name": "Equipes", "key": "equipe", "type": "menu"},
+]
+
 @router.post("/")
 async def create_profile(profile_data: dict = Body(...)):
     """Criar um novo perfil de acesso"""
@@ -31,6 +46,7 @@ async def create_profile(profile_data: dict = Body(...)):
         
         # Inserir no banco
         result = await db_gpac.profiles.insert_one(profile_dict)
+        await cache.bump(db_gpac.profiles)
         
         # Recuperar o perfil inserido
         created_profile = await db_gpac.profiles.find_one({"_id": result.inserted_id})
@@ -50,7 +66,7 @@ async def create_profile(profile_data: dict = Body(...)):
 @router.get("/")
 async def get_profiles():
     """Listar todos os perfis de acesso"""
-    try:
+    async def load():
         profiles = []
         async for doc in db_gpac.profiles.find():
             profile = {
@@ -63,6 +79,9 @@ async def get_profiles():
             }
             profiles.append(profile)
         return profiles
+
+    try:
+        return await cache.get_or_load(db_gpac.profiles, "all", load)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -144,6 +163,7 @@ async def update_profile(profile_id: str, profile_data: dict = Body(...)):
             {"_id": ObjectId(profile_id)},
             {"$set": update_data}
         )
+        await cache.bump(db_gpac.profiles)
         
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Perfil não encontrado ou dados iguais")
@@ -223,6 +243,7 @@ async def delete_profile(profile_id: str):
         
         # Excluir perfil
         result = await db_gpac.profiles.delete_one({"_id": ObjectId(profile_id)})
+        await cache.bump(db_gpac.profiles)
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Perfil não encontrado")
@@ -245,19 +266,7 @@ async def delete_profile(profile_id: str):
 async def get_available_permissions():
     """Obter lista de permissões disponíveis no sistema"""
     try:
-        permissions = [
-            {"id": "1", "name": "Visão Geral", "key": "overview", "type": "menu"},
-            {"id": "2", "name": "Pacientes", "key": "patients", "type": "menu"},
-            {"id": "3", "name": "Histórico de Pacientes", "key": "patient-history", "type": "menu"},
-            {"id": "4", "name": "Colaboradores", "key": "collaborators", "type": "menu"},
-            {"id": "5", "name": "Agendamentos", "key": "appointments", "type": "menu"},
-            {"id": "6", "name": "Administração", "key": "admin", "type": "menu"},
-            {"id": "7", "name": "Comorbidades", "key": "admin-comorbidities", "type": "submenu", "parentKey": "admin"},
-            {"id": "8", "name": "Especialidades", "key": "admin-specialties", "type": "submenu", "parentKey": "admin"},
-            {"id": "9", "name": "Perfis", "key": "admin-profiles", "type": "submenu", "parentKey": "admin"},
-            {"id": "10", "name": "Equipes", "key": "equipe", "type": "menu"},
-        ]
-        return permissions
+        return refdata.response("permissions") or AVAILABLE_PERMISSIONS
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
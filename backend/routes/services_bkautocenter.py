@@ -1,17 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Response
 from typing import List, Optional
 from ..schemas.schemas_bkautocenter import Service, ServiceCreate, ServiceUpdate
+from ..schemas.trusted import list_adapter, from_db, trusted_response
 from ..db import db_bkautocenter
+from .. import cache, media
+from ..storage import Volume
 from datetime import datetime
-import os
-import uuid
-from pathlib import Path
+import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/services", tags=["Services BKAutoCenter"])
 
-# Diretório para salvar as imagens
-UPLOAD_DIR = Path("/var/www/html/bkautocenter/img/services")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Imagens no storage configurado (disco local ou S3)
+IMAGES = Volume("bkautocenter/img/services")
 
 @router.post("/", response_model=Service)
 async def create_service(service: ServiceCreate):
@@ -21,6 +24,7 @@ async def create_service(service: ServiceCreate):
     
     try:
         await db_bkautocenter.services.insert_one(service_obj.model_dump())
+        await cache.bump(db_bkautocenter.services)
         return service_obj
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao criar serviço: {str(e)}")
@@ -29,8 +33,12 @@ async def create_service(service: ServiceCreate):
 async def get_services():
     """Listar todos os serviços"""
     try:
-        services = await db_bkautocenter.services.find().to_list(1000)
-        return [Service(**service) for service in services]
+        async def load():
+            services = await db_bkautocenter.services.find().to_list(1000)
+            return list_adapter(Service).dump_json([from_db(Service, service) for service in services], warnings=False)
+
+        body = await cache.get_or_load(db_bkautocenter.services, "all", load)
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar serviços: {str(e)}")
 
@@ -41,7 +49,7 @@ async def get_service(service_id: str):
         service = await db_bkautocenter.services.find_one({"id": service_id})
         if not service:
             raise HTTPException(status_code=404, detail="Serviço não encontrado")
-        return Service(**service)
+        return trusted_response(Service, service)
     except HTTPException:
         raise
     except Exception as e:
@@ -65,6 +73,7 @@ async def update_service(service_id: str, service_update: ServiceUpdate):
             {"id": service_id},
             {"$set": update_data}
         )
+        await cache.bump(db_bkautocenter.services)
         
         # Buscar e retornar o serviço atualizado
         updated_service = await db_bkautocenter.services.find_one({"id": service_id})
@@ -86,6 +95,7 @@ async def delete_service(service_id: str):
         
         # Deletar o serviço do banco de dados
         result = await db_bkautocenter.services.delete_one({"id": service_id})
+        await cache.bump(db_bkautocenter.services)
         
         # Se tiver uma URL de imagem, tentar deletar o arquivo
         if "image_url" in service and service["image_url"]:
@@ -94,16 +104,14 @@ async def delete_service(service_id: str):
                 image_url = service["image_url"]
                 if "service_" in image_url and ("/img/services/" in image_url or "/bkautocenter/img/services/" in image_url):
                     filename = image_url.split("/")[-1]
-                    file_path = UPLOAD_DIR / filename
                     
-                    # Verificar se o arquivo existe e tentar remover
-                    if file_path.exists():
-                        os.remove(file_path)
-                        print(f"Imagem removida: {file_path}")
+                    # Remove o arquivo e as demais variantes (não falha se já não existem)
+                    if await media.delete_upload(IMAGES, filename):
+                        logger.info("Imagem removida", extra={"location": IMAGES.location(filename)})
                     else:
-                        print(f"Arquivo de imagem não encontrado: {file_path}")
-            except Exception as img_error:
-                print(f"Erro ao remover arquivo de imagem: {str(img_error)}")
+                        logger.warning("Arquivo de imagem não encontrado", extra={"location": IMAGES.location(filename)})
+            except Exception:
+                logger.exception("Erro ao remover arquivo de imagem")
         
         return {"message": "Serviço e imagem associada deletados com sucesso"}
     except HTTPException:
@@ -114,37 +122,11 @@ async def delete_service(service_id: str):
 @router.post("/upload-image")
 async def upload_service_image(file: UploadFile = File(...)):
     """Upload de imagem para serviço"""
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Arquivo deve ser uma imagem")
-    
-    # Gerar nome único para o arquivo
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"service_{uuid.uuid4()}.{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
+    # Tipo validado pelo conteúdo; gera as variantes thumb/card/full em WebP e JPEG
     try:
-        # Salvar arquivo
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Definir permissões corretas para o arquivo
-        os.chmod(file_path, 0o664)  # rw-rw-r--
-        
-        # Tentar definir o grupo correto (ubuntu:www-data)
-        try:
-            import pwd, grp
-            uid = pwd.getpwnam('ubuntu').pw_uid
-            gid = grp.getgrnam('www-data').gr_gid
-            os.chown(file_path, uid, gid)
-        except (KeyError, PermissionError) as e:
-            # Se não conseguir mudar o owner, pelo menos garante que está legível
-            print(f"Aviso: Não foi possível alterar owner do arquivo: {e}")
-            os.chmod(file_path, 0o666)  # rw-rw-rw-
-        
-        # Retornar URL relativa
-        return {"image_url": f"http://140.238.187.229/bkautocenter/img/services/{unique_filename}"}
-    
+        return await media.process_upload(IMAGES, file, "service")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao fazer upload da imagem: {str(e)}")
 
@@ -153,16 +135,8 @@ async def list_service_image_files():
     """Listar todos os arquivos de imagens de serviços no servidor"""
     try:
         files = []
-        for file_path in UPLOAD_DIR.glob("*"):
-            if file_path.is_file() and file_path.name.startswith("service_"):
-                file_info = {
-                    "name": file_path.name,
-                    "path": str(file_path),
-                    "size_kb": round(os.path.getsize(file_path) / 1024, 2),
-                    "url": f"http://140.238.187.229/bkautocenter/img/services/{file_path.name}",
-                    "last_modified": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                }
-                files.append(file_info)
+        for name, info in await IMAGES.list("service_"):
+            files.append(IMAGES.describe(name, info))
         return files
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar arquivos de imagens: {str(e)}")
@@ -172,10 +146,8 @@ async def find_orphaned_service_images():
     """Encontrar imagens órfãs (sem serviço associado) no servidor"""
     try:
         # 1. Listar todas as imagens no servidor
-        all_files = []
-        for file_path in UPLOAD_DIR.glob("service_*"):
-            if file_path.is_file():
-                all_files.append(file_path.name)
+        stored = dict(await IMAGES.list("service_"))
+        all_files = list(stored)
         
         # 2. Buscar todas as URLs de imagens no banco de dados
         services = await db_bkautocenter.services.find({}, {"image_url": 1}).to_list(1000)
@@ -186,21 +158,15 @@ async def find_orphaned_service_images():
                 # Extrair o nome do arquivo da URL
                 image_url = service["image_url"]
                 if "service_" in image_url:
+                    # Todas as variantes do upload contam como usadas
                     filename = image_url.split("/")[-1]
-                    used_images.append(filename)
+                    used_images.extend(media.related_names(filename))
         
         # 3. Encontrar imagens órfãs (arquivos no servidor que não estão no banco)
         orphaned_images = []
         for file_name in all_files:
             if file_name not in used_images:
-                file_path = UPLOAD_DIR / file_name
-                orphaned_images.append({
-                    "name": file_name,
-                    "path": str(file_path),
-                    "size_kb": round(os.path.getsize(file_path) / 1024, 2),
-                    "url": f"http://140.238.187.229/bkautocenter/img/services/{file_name}",
-                    "last_modified": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                })
+                orphaned_images.append(IMAGES.describe(file_name, stored[file_name]))
         
         return {
             "total_images": len(all_files),
@@ -215,12 +181,15 @@ async def delete_orphaned_service_image(filename: str):
     """Deletar uma imagem órfã específica"""
     try:
         # Verificar se o arquivo existe
-        file_path = UPLOAD_DIR / filename
-        if not file_path.exists():
+        try:
+            exists = await IMAGES.exists(filename)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
+        if not exists:
             raise HTTPException(status_code=404, detail="Arquivo não encontrado")
         
-        # Verificar se a imagem não está sendo usada
-        service = await db_bkautocenter.services.find_one({"image_url": {"$regex": filename}})
+        # Verificar se a imagem não está sendo usada (o banco guarda só a variante full.jpg)
+        service = await db_bkautocenter.services.find_one({"image_url": {"$regex": re.escape(media.variant_name(filename, "full", "jpg"))}})
         if service:
             raise HTTPException(
                 status_code=400, 
@@ -228,7 +197,7 @@ async def delete_orphaned_service_image(filename: str):
             )
         
         # Deletar o arquivo
-        os.remove(file_path)
+        await IMAGES.delete(filename)
         return {"message": f"Imagem {filename} deletada com sucesso"}
     except HTTPException:
         raise
@@ -240,10 +209,8 @@ async def clean_all_orphaned_service_images():
     """Limpar todas as imagens órfãs de serviços"""
     try:
         # 1. Listar todas as imagens no servidor
-        all_files = []
-        for file_path in UPLOAD_DIR.glob("service_*"):
-            if file_path.is_file():
-                all_files.append(file_path.name)
+        stored = dict(await IMAGES.list("service_"))
+        all_files = list(stored)
         
         # 2. Buscar todas as URLs de imagens no banco de dados
         services = await db_bkautocenter.services.find({}, {"image_url": 1}).to_list(1000)
@@ -254,19 +221,19 @@ async def clean_all_orphaned_service_images():
                 # Extrair o nome do arquivo da URL
                 image_url = service["image_url"]
                 if "service_" in image_url:
+                    # Todas as variantes do upload contam como usadas
                     filename = image_url.split("/")[-1]
-                    used_images.append(filename)
+                    used_images.extend(media.related_names(filename))
         
         # 3. Deletar imagens órfãs
         deleted_count = 0
         for file_name in all_files:
             if file_name not in used_images:
-                file_path = UPLOAD_DIR / file_name
                 try:
-                    os.remove(file_path)
+                    await IMAGES.delete(file_name)
                     deleted_count += 1
-                except Exception as e:
-                    print(f"Erro ao deletar {file_path}: {str(e)}")
+                except Exception:
+                    logger.exception("Erro ao deletar imagem órfã", extra={"location": IMAGES.location(file_name)})
         
         return {
             "message": f"{deleted_count} imagens órfãs deletadas com sucesso",
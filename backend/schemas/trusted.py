@@ -0,0 +1,57 @@
+# -------------------------------------------------------------------
+# Caminho de leitura "confiável" para documentos gravados pela própria API
+#
+# Os documentos de tires, services, users e status_checks já foram
+# validados pelos schemas na escrita. Na leitura, em vez de rodar
+# Model(**doc) para cada documento e deixar o FastAPI validar o
+# response_model de novo, montamos as instâncias com model_construct
+# (sem validação) e serializamos a lista inteira de uma vez com um
+# TypeAdapter pré-construído, devolvendo a Response pronta.
+#
+# As rotas mantêm response_model (documentação/OpenAPI); a validação
+# das escritas continua estrita.
+# -------------------------------------------------------------------
+from functools import lru_cache
+from typing import List, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _required_fields(model: Type[BaseModel]) -> frozenset:
+    return frozenset(name for name, field in model.model_fields.items() if field.is_required())
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter de List[model], criado uma única vez por modelo."""
+    return TypeAdapter(List[model])
+
+
+@lru_cache(maxsize=None)
+def item_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def from_db(model: Type[BaseModel], doc: dict) -> BaseModel:
+    """Monta o modelo a partir de um documento do MongoDB sem validar.
+    Campos extras (ex.: _id) são descartados; se faltar algum campo
+    obrigatório (documento antigo/importado), cai na validação normal."""
+    values = {name: doc[name] for name in model.model_fields if name in doc}
+    if not _required_fields(model) <= values.keys():
+        return model.model_validate(doc)
+    return model.model_construct(**values)
+
+
+def trusted_list_response(model: Type[BaseModel], docs) -> Response:
+    """Serializa uma lista de documentos em uma única passada."""
+    items = [from_db(model, doc) for doc in docs]
+    # warnings=False: tipos divergentes vindos do banco (ex.: datas como
+    # string em documentos antigos) são serializados como estão
+    return Response(content=list_adapter(model).dump_json(items, warnings=False), media_type="application/json")
+
+
+def trusted_response(model: Type[BaseModel], doc: dict) -> Response:
+    return Response(content=item_adapter(model).dump_json(from_db(model, doc), warnings=False),
+                    media_type="application/json")
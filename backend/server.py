@@ -17,6 +17,7 @@ from typing import List
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
@@ -24,48 +25,48 @@ from pydantic import BaseModel, Field
 # -------------------------------------------------------------------
 # Importações internas (bancos e schemas)
 # -------------------------------------------------------------------
-from schemas.email_utils import send_email
-from schemas.email_schemas import EmailRequest
-from db import db_gpac, db_bkautocenter, db_agua_na_boca, db_equora, client
+from .schemas.email_utils import send_email
+from .schemas.email_schemas import EmailRequest
+from .schemas.trusted import trusted_list_response
+from .db import db_gpac, db_bkautocenter, db_agua_na_boca, db_equora, client
+from . import access_partitions, admission, beacons, cache, health, logs, media, metering, refdata
 
 # -------------------------------------------------------------------
 # Importações de rotas GPAC
 # -------------------------------------------------------------------
-from routes.pacientes_gpac import router as pacientes_router
-from routes.colaboradores_gpac import router as colaboradores_router
-from routes.agendamentos_gpac import router as agendamentos_router
-from routes.comorbidades_gpac import router as comorbidades_router
-from routes.especialidades_gpac import router as especialidades_router
-from routes.perfis_gpac import router as perfis_router
-from routes.equipes_gpac import router as equipes_router
-from routes.localizacao_gpac import router as localizacao_router
-from routes.twoFactor_gpac import router as twofactor_router
+from .routes.pacientes_gpac import router as pacientes_router
+from .routes.colaboradores_gpac import router as colaboradores_router
+from .routes.agendamentos_gpac import router as agendamentos_router
+from .routes.comorbidades_gpac import router as comorbidades_router
+from .routes.especialidades_gpac import router as especialidades_router
+from .routes.perfis_gpac import router as perfis_router
+from .routes.equipes_gpac import router as equipes_router
+from .routes.localizacao_gpac import router as localizacao_router
+from .routes.twoFactor_gpac import router as twofactor_router
 
 # -------------------------------------------------------------------
 # Importações de rotas BKAutocenter
 # -------------------------------------------------------------------
-from routes.services_bkautocenter import router as services_bk_router
-from routes.tires_bkautocenter import router as tires_bk_router
-from routes.auth_bkautocenter import router as auth_bk_router
-from routes.payments_bkautocenter import router as payments_bk_router
+from .routes.services_bkautocenter import router as services_bk_router
+from .routes.tires_bkautocenter import router as tires_bk_router
+from .routes.auth_bkautocenter import router as auth_bk_router
+from .routes.payments_bkautocenter import router as payments_bk_router
 
 # -------------------------------------------------------------------
 # Importações de rotas Aguá na Boca
 # -------------------------------------------------------------------
-from routes.produtos_aguanaboca import router as produtos_aguanaboca_router
-from routes.auth_aguanaboca import router as auth_aguanaboca_router
+from .routes.produtos_aguanaboca import router as produtos_aguanaboca_router
+from .routes.auth_aguanaboca import router as auth_aguanaboca_router
 
 # -------------------------------------------------------------------
 # Importações de rotas Equora Systems
 # -------------------------------------------------------------------
-from routes.admin_equora import router as admin_equora_router
+from .routes.admin_equora import router as admin_equora_router
 
 # -------------------------------------------------------------------
 # Carregar variáveis de ambiente
 # -------------------------------------------------------------------
 load_dotenv(dotenv_path=ROOT_DIR / ".env")
-print(">>> SENDGRID_API_KEY:", os.getenv("SENDGRID_API_KEY"))
-print(">>> FROM_EMAIL:", os.getenv("FROM_EMAIL"))
 
 # -------------------------------------------------------------------
 # Modelos Pydantic
@@ -97,6 +98,20 @@ api_router = APIRouter()
 async def root():
     return {"message": "Hello World"}
 
+# Liveness: só confirma que o processo responde
+@api_router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+# Readiness: ping no Mongo, pool, lag do event loop e warm-up (health.py)
+@api_router.get("/readyz")
+async def readyz():
+    ready, checks = await health.readiness(client)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "checks": checks},
+    )
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_obj = StatusCheck(**input.dict())
@@ -106,7 +121,7 @@ async def create_status_check(input: StatusCheckCreate):
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     status_checks = await db_gpac.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+    return trusted_list_response(StatusCheck, status_checks)
 
 @api_router.post("/send-email")
 async def send_custom_email(email: EmailRequest):
@@ -117,6 +132,12 @@ async def send_custom_email(email: EmailRequest):
         logging.error("Erro ao enviar e-mail:\n%s", traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Erro ao enviar e-mail: {str(e)}")
 
+# -------------------------------------------------------------------
+# Controle de admissão (admission.py): o mais interno, para que os 503
+# também recebam CORS, medição de uso e request_id
+# -------------------------------------------------------------------
+app.add_middleware(admission.AdmissionMiddleware)
+
 # -------------------------------------------------------------------
 # Configuração de CORS
 # -------------------------------------------------------------------
@@ -129,6 +150,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Medição de uso por tenant (contadores em memória, ver metering.py)
+app.add_middleware(metering.UsageMiddleware)
+
+# request_id por requisição (logs.py); mais externo, para cobrir os demais
+app.add_middleware(logs.RequestIdMiddleware)
+
 # -------------------------------------------------------------------
 # Inclusão das rotas no api_router
 # -------------------------------------------------------------------
@@ -165,15 +192,34 @@ app.include_router(api_router)
 # -------------------------------------------------------------------
 # Logging
 # -------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# JSON via fila + thread própria (logs.py); nunca logar segredos
+logs.setup()
 logger = logging.getLogger(__name__)
+logger.info(
+    "Configuração de e-mail",
+    extra={"from_email": os.getenv("FROM_EMAIL"), "sendgrid_configured": bool(os.getenv("SENDGRID_API_KEY"))},
+)
 
 # -------------------------------------------------------------------
-# Shutdown do servidor
+# Startup / shutdown do servidor
 # -------------------------------------------------------------------
+@app.on_event("startup")
+async def start_background_tasks():
+    health.start()
+    metering.start(db_equora.usage)
+    beacons.start(db_equora)
+    access_partitions.start(db_equora)
+    cache.start()
+    await refdata.ensure()
+    health.mark_warm()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    health.stop()
+    cache.stop()
+    await metering.stop(db_equora.usage)
+    await beacons.stop(db_equora)
+    access_partitions.stop()
+    media.shutdown()
     client.close()
+    logs.shutdown()
@@ -0,0 +1,134 @@
+# -------------------------------------------------------------------
+# Configurações do backend (lidas do .env / variáveis de ambiente)
+# -------------------------------------------------------------------
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(dotenv_path=ROOT_DIR / ".env")
+
+# Banco de dados
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+# "mongo" (padrão) ou "memory" (backend em memória para testes/benchmarks)
+DB_BACKEND = os.getenv("DB_BACKEND", "mongo")
+
+# GeoIP (GeoLite2-City.mmdb). Fallback para o arquivo no diretório 'backend'
+GEOIP_DB_PATH = os.getenv("GEOIP_DB_PATH") or str(ROOT_DIR / "GeoLite2-City.mmdb")
+# Resultados em cache (LRU, inclui IPs sem localização) e intervalo entre
+# as verificações de arquivo novo para recarga a quente (geoip.py)
+GEOIP_CACHE_SIZE = int(os.getenv("GEOIP_CACHE_SIZE", "50000"))
+GEOIP_RELOAD_CHECK_SECONDS = float(os.getenv("GEOIP_RELOAD_CHECK_SECONDS", "30"))
+
+# CLI de manutenção (manage.py): tamanho dos lotes e paralelismo padrão
+MANAGE_BATCH_SIZE = int(os.getenv("MANAGE_BATCH_SIZE", "1000"))
+MANAGE_CONCURRENCY = int(os.getenv("MANAGE_CONCURRENCY", "4"))
+
+# Relatório de coleções/índices (dbstats.py): documentos amostrados por
+# coleção e tamanho a partir do qual um documento é considerado grande
+REPORT_SAMPLE_SIZE = int(os.getenv("REPORT_SAMPLE_SIZE", "200"))
+REPORT_LARGE_DOC_BYTES = int(os.getenv("REPORT_LARGE_DOC_BYTES", str(64 * 1024)))
+
+# Medição de uso por tenant (metering.py): intervalo entre os flushes dos
+# contadores em memória para a coleção equora.usage
+USAGE_FLUSH_SECONDS = float(os.getenv("USAGE_FLUSH_SECONDS", "60"))
+
+# Coerência dos caches locais entre workers (cache.py):
+#   poll         -> consulta equora.cache_versions a cada CACHE_POLL_SECONDS
+#   changestream -> acompanha cache_versions por change stream (replica set)
+#   off          -> sem cache local
+CACHE_COHERENCE = os.getenv("CACHE_COHERENCE", "poll")
+CACHE_POLL_SECONDS = float(os.getenv("CACHE_POLL_SECONDS", "1.0"))
+
+# Snapshot de dados de referência (refdata.py): arquivo mapeado em memória
+# por todos os workers e intervalo para detectar um snapshot novo
+REFDATA_PATH = os.getenv("REFDATA_PATH") or str(ROOT_DIR / "refdata.snapshot")
+REFDATA_RELOAD_SECONDS = float(os.getenv("REFDATA_RELOAD_SECONDS", "30"))
+# Idade máxima do snapshot: o worker que sobe depois disso o regera com os
+# dados atuais do MongoDB (0 = só por versão do código ou build-refdata)
+REFDATA_MAX_AGE_SECONDS = float(os.getenv("REFDATA_MAX_AGE_SECONDS", "86400"))
+
+# Preferência de leitura das consultas de relatório (readpref.py). Em
+# replica set vão para um secundário com atraso de até
+# REPORTING_MAX_STALENESS_SECONDS (mínimo 90; -1 desativa o limite); em
+# nó único, secondaryPreferred cai naturalmente no primário.
+REPORTING_READ_PREFERENCE = os.getenv("REPORTING_READ_PREFERENCE", "secondaryPreferred")
+REPORTING_MAX_STALENESS_SECONDS = int(os.getenv("REPORTING_MAX_STALENESS_SECONDS", "120"))
+
+# Armazenamento de uploads (storage.py)
+#   local -> disco em STORAGE_LOCAL_ROOT (servido pelo nginx)
+#   s3    -> bucket S3/MinIO (credenciais pela cadeia padrão do boto3)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "/var/www/html")
+# Grupo aplicado aos arquivos locais para o servidor web ler ("" desativa)
+STORAGE_LOCAL_GROUP = os.getenv("STORAGE_LOCAL_GROUP", "www-data")
+STORAGE_S3_BUCKET = os.getenv("STORAGE_S3_BUCKET", "")
+STORAGE_S3_ENDPOINT_URL = os.getenv("STORAGE_S3_ENDPOINT_URL", "")
+STORAGE_S3_REGION = os.getenv("STORAGE_S3_REGION", "")
+STORAGE_S3_PART_SIZE = int(os.getenv("STORAGE_S3_PART_SIZE", str(8 * 1024 * 1024)))
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+# URL pública da raiz do storage (nginx, CDN ou endpoint do bucket)
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "http://140.238.187.229")
+# Imagens de produtos: o site da Água na Boca serve /uploads relativo
+AGUANABOCA_UPLOADS_URL = os.getenv("AGUANABOCA_UPLOADS_URL", "/uploads")
+
+# Saúde do worker (health.py): limites do /readyz
+HEALTH_PING_TIMEOUT_MS = float(os.getenv("HEALTH_PING_TIMEOUT_MS", "500"))
+HEALTH_MAX_POOL_SATURATION = float(os.getenv("HEALTH_MAX_POOL_SATURATION", "0.9"))
+HEALTH_MAX_LOOP_LAG_MS = float(os.getenv("HEALTH_MAX_LOOP_LAG_MS", "250"))
+HEALTH_LAG_INTERVAL_SECONDS = float(os.getenv("HEALTH_LAG_INTERVAL_SECONDS", "0.5"))
+
+# Logging (logs.py): formato "json" ou "text", nível raiz, níveis por
+# logger ("pymongo=WARNING,backend.routes.equipes_gpac=DEBUG"), tamanho da
+# fila do listener e amostragem dos logs DEBUG (1 a cada N por mensagem)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_DEBUG_SAMPLE_EVERY = int(os.getenv("LOG_DEBUG_SAMPLE_EVERY", "10"))
+
+# Controle de admissão (admission.py): limites da concorrência adaptativa,
+# atraso de fila tolerado e janela de avaliação
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") not in ("0", "false", "no")
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "200"))
+ADMISSION_MIN_CONCURRENCY = int(os.getenv("ADMISSION_MIN_CONCURRENCY", "10"))
+ADMISSION_TARGET_DELAY_MS = float(os.getenv("ADMISSION_TARGET_DELAY_MS", "50"))
+ADMISSION_INTERVAL_SECONDS = float(os.getenv("ADMISSION_INTERVAL_SECONDS", "1.0"))
+
+# Pipeline de imagens (media.py): tamanho máximo do upload, limite de
+# pixels da imagem decodificada, processos do Pillow e diretório dos
+# arquivos temporários (vazio = padrão do sistema)
+MEDIA_MAX_UPLOAD_BYTES = int(os.getenv("MEDIA_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MEDIA_MAX_PIXELS = int(os.getenv("MEDIA_MAX_PIXELS", str(40_000_000)))
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))
+MEDIA_TMP_DIR = os.getenv("MEDIA_TMP_DIR", "")
+
+# Beacon de acesso (beacons.py): capacidade da fila em memória, tamanho
+# do lote do insert_many e intervalo máximo entre as gravações
+BEACON_QUEUE_SIZE = int(os.getenv("BEACON_QUEUE_SIZE", "50000"))
+BEACON_BATCH_SIZE = int(os.getenv("BEACON_BATCH_SIZE", "500"))
+BEACON_FLUSH_SECONDS = float(os.getenv("BEACON_FLUSH_SECONDS", "1.0"))
+# Tentativas de gravar um mesmo acesso antes de descartá-lo
+BEACON_MAX_ATTEMPTS = int(os.getenv("BEACON_MAX_ATTEMPTS", "20"))
+
+# Resumo das estatísticas de acesso (access_rollups.py): maior intervalo,
+# em dias, aceito na granularidade por hora
+STATS_HOURLY_MAX_DAYS = int(os.getenv("STATS_HOURLY_MAX_DAYS", "31"))
+
+# Exportação em streaming (exports.py): documentos por lote do cursor e
+# tamanho aproximado de cada pedaço enviado ao cliente
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+# Partições mensais de acesso (access_partitions.py): meses mantidos
+# (0 = sem retenção) e intervalo da verificação de retenção
+STATS_ACCESS_RETENTION_MONTHS = int(os.getenv("STATS_ACCESS_RETENTION_MONTHS", "24"))
+STATS_RETENTION_CHECK_SECONDS = float(os.getenv("STATS_RETENTION_CHECK_SECONDS", "3600"))
+
+# Visitantes únicos (access_uniques.py): precisão dos esboços HyperLogLog
+# (2**precisão bytes por dia e caminho; erro ~1.04/sqrt(2**precisão))
+STATS_UNIQUES_PRECISION = int(os.getenv("STATS_UNIQUES_PRECISION", "12"))
+
+# Caminhos distintos por dia nos rollups e visitantes únicos; os que
+# passarem do limite são contados juntos em "(outros)"
+STATS_MAX_PATHS_PER_DAY = int(os.getenv("STATS_MAX_PATHS_PER_DAY", "200"))
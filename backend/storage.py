@@ -0,0 +1,293 @@
+# -------------------------------------------------------------------
+# Armazenamento de arquivos enviados (imagens de pneus, serviços e
+# produtos)
+#
+# Dois backends com a mesma interface assíncrona:
+#   local -> disco (STORAGE_LOCAL_ROOT), escrita em blocos num executor,
+#            arquivo temporário + os.replace (nunca expõe arquivo parcial)
+#   s3    -> bucket compatível com S3 (AWS, MinIO...), multipart upload
+#            em partes de STORAGE_S3_PART_SIZE, chamadas boto3 em thread
+#
+# O upload é lido em blocos de STORAGE_CHUNK_SIZE e enviado conforme
+# chega: o arquivo nunca é carregado inteiro na memória e o event loop
+# não bloqueia em I/O.
+#
+# As rotas usam um Volume (prefixo de chave + URL pública):
+#
+#   PNEUS = Volume("bkautocenter/img/pneus")
+#   await PNEUS.save("tire_x.jpg", upload)
+#   PNEUS.url("tire_x.jpg")  -> STORAGE_PUBLIC_URL/bkautocenter/img/pneus/tire_x.jpg
+# -------------------------------------------------------------------
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from .settings import (
+    STORAGE_BACKEND,
+    STORAGE_CHUNK_SIZE,
+    STORAGE_LOCAL_GROUP,
+    STORAGE_LOCAL_ROOT,
+    STORAGE_PUBLIC_URL,
+    STORAGE_S3_BUCKET,
+    STORAGE_S3_ENDPOINT_URL,
+    STORAGE_S3_PART_SIZE,
+    STORAGE_S3_REGION,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_upload(upload, chunk_size=STORAGE_CHUNK_SIZE):
+    """Blocos de um UploadFile (ou de qualquer objeto com read async)."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _chunks(source):
+    if hasattr(source, "read"):
+        async for chunk in iter_upload(source):
+            yield chunk
+    elif isinstance(source, (bytes, bytearray)):
+        yield bytes(source)
+    else:
+        async for chunk in source:
+            yield chunk
+
+
+# -------------------------------------------------------------------
+# Disco local
+# -------------------------------------------------------------------
+class LocalStorage:
+    def __init__(self, root, group=STORAGE_LOCAL_GROUP):
+        self.root = Path(root)
+        self.group = group
+
+    def _path(self, key):
+        return self.root / key
+
+    def location(self, key):
+        return str(self._path(key))
+
+    def _finish(self, tmp_path, path):
+        os.replace(tmp_path, path)
+        os.chmod(path, 0o664)  # rw-rw-r--
+        if not self.group:
+            return
+        try:
+            import grp
+            os.chown(path, -1, grp.getgrnam(self.group).gr_gid)
+        except (KeyError, PermissionError) as e:
+            # Sem o grupo do servidor web, ao menos garante que está legível
+            logger.warning("Não foi possível alterar o grupo de %s: %s", path, e)
+            os.chmod(path, 0o666)  # rw-rw-rw-
+
+    async def save(self, key, source, content_type=None):
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: path.parent.mkdir(parents=True, exist_ok=True))
+        f = await loop.run_in_executor(None, open, tmp_path, "wb")
+        size = 0
+        try:
+            async for chunk in _chunks(source):
+                await loop.run_in_executor(None, f.write, chunk)
+                size += len(chunk)
+            await loop.run_in_executor(None, f.close)
+            await loop.run_in_executor(None, self._finish, tmp_path, path)
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return size
+
+    async def delete(self, key):
+        def remove():
+            try:
+                self._path(key).unlink()
+                return True
+            except FileNotFoundError:
+                return False
+        return await asyncio.to_thread(remove)
+
+    def _stat(self, path):
+        st = path.stat()
+        return {"size": st.st_size, "last_modified": datetime.fromtimestamp(st.st_mtime)}
+
+    async def stat(self, key):
+        def run():
+            path = self._path(key)
+            return self._stat(path) if path.is_file() else None
+        return await asyncio.to_thread(run)
+
+    async def list(self, prefix):
+        """(nome, stat) dos arquivos cujo caminho começa com `prefix`."""
+        def run():
+            directory, _, start = prefix.rpartition("/")
+            base = self._path(directory)
+            if not base.is_dir():
+                return []
+            return [
+                (f"{directory}/{path.name}" if directory else path.name, self._stat(path))
+                for path in sorted(base.iterdir())
+                if path.name.startswith(start) and not path.name.startswith(".") and path.is_file()
+            ]
+        return await asyncio.to_thread(run)
+
+
+# -------------------------------------------------------------------
+# S3 / MinIO
+# -------------------------------------------------------------------
+class S3Storage:
+    def __init__(self, bucket, endpoint_url=None, region=None, part_size=STORAGE_S3_PART_SIZE):
+        import boto3
+        self.bucket = bucket
+        self.part_size = max(part_size, 5 * 1024 * 1024)  # mínimo do S3 por parte
+        # Credenciais pela cadeia padrão do boto3 (AWS_ACCESS_KEY_ID etc.)
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+
+    def location(self, key):
+        return f"s3://{self.bucket}/{key}"
+
+    async def save(self, key, source, content_type=None):
+        extra = {"ContentType": content_type} if content_type else {}
+        buffer = bytearray()
+        parts = []
+        upload_id = None
+        size = 0
+        try:
+            async for chunk in _chunks(source):
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        created = await asyncio.to_thread(
+                            self.client.create_multipart_upload, Bucket=self.bucket, Key=key, **extra
+                        )
+                        upload_id = created["UploadId"]
+                    body, buffer = bytes(buffer[:self.part_size]), buffer[self.part_size:]
+                    number = len(parts) + 1
+                    part = await asyncio.to_thread(
+                        self.client.upload_part, Bucket=self.bucket, Key=key, UploadId=upload_id,
+                        PartNumber=number, Body=body,
+                    )
+                    parts.append({"PartNumber": number, "ETag": part["ETag"]})
+            if upload_id is None:
+                # Arquivo menor que uma parte: um único PUT
+                await asyncio.to_thread(
+                    self.client.put_object, Bucket=self.bucket, Key=key, Body=bytes(buffer), **extra
+                )
+                return size
+            if buffer:
+                number = len(parts) + 1
+                part = await asyncio.to_thread(
+                    self.client.upload_part, Bucket=self.bucket, Key=key, UploadId=upload_id,
+                    PartNumber=number, Body=bytes(buffer),
+                )
+                parts.append({"PartNumber": number, "ETag": part["ETag"]})
+            await asyncio.to_thread(
+                self.client.complete_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            if upload_id is not None:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+            raise
+        return size
+
+    async def delete(self, key):
+        if await self.stat(key) is None:
+            return False
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+        return True
+
+    async def stat(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": head["ContentLength"], "last_modified": head["LastModified"]}
+
+    async def list(self, prefix):
+        def run():
+            items = []
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    items.append((obj["Key"], {"size": obj["Size"], "last_modified": obj["LastModified"]}))
+            return items
+        return await asyncio.to_thread(run)
+
+
+@lru_cache(maxsize=1)
+def get_storage():
+    """Backend configurado em STORAGE_BACKEND (criado no primeiro uso)."""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(STORAGE_S3_BUCKET, STORAGE_S3_ENDPOINT_URL, STORAGE_S3_REGION)
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(STORAGE_LOCAL_ROOT)
+    raise ValueError(f"STORAGE_BACKEND desconhecido: {STORAGE_BACKEND}")
+
+
+# -------------------------------------------------------------------
+# Volumes usados pelas rotas
+# -------------------------------------------------------------------
+class Volume:
+    """Arquivos de um prefixo do storage, endereçados só pelo nome."""
+
+    def __init__(self, prefix, public_url=None):
+        self.prefix = prefix.strip("/")
+        # URL base dos arquivos; por padrão STORAGE_PUBLIC_URL + prefixo
+        self.public_url = (public_url or f"{STORAGE_PUBLIC_URL.rstrip('/')}/{self.prefix}").rstrip("/")
+
+    def key(self, name):
+        if not name or "/" in name or name.startswith("."):
+            raise ValueError(f"Nome de arquivo inválido: {name!r}")
+        return f"{self.prefix}/{name}"
+
+    def url(self, name):
+        return f"{self.public_url}/{name}"
+
+    def location(self, name):
+        return get_storage().location(self.key(name))
+
+    async def save(self, name, source, content_type=None):
+        return await get_storage().save(self.key(name), source, content_type)
+
+    async def delete(self, name):
+        return await get_storage().delete(self.key(name))
+
+    async def stat(self, name):
+        return await get_storage().stat(self.key(name))
+
+    async def exists(self, name):
+        return await self.stat(name) is not None
+
+    async def list(self, startswith=""):
+        """[(nome, stat)] dos arquivos do volume cujo nome começa com `startswith`."""
+        items = await get_storage().list(f"{self.prefix}/{startswith}")
+        return [(key.rsplit("/", 1)[-1], info) for key, info in items]
+
+    def describe(self, name, info):
+        """Formato usado pelos endpoints de manutenção."""
+        modified = info["last_modified"]
+        if modified.tzinfo is not None:
+            modified = modified.astimezone(timezone.utc).replace(tzinfo=None)
+        return {
+            "name": name,
+            "path": self.location(name),
+            "size_kb": round(info["size"] / 1024, 2),
+            "url": self.url(name),
+            "last_modified": modified.isoformat(),
+        }
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------------
+# Benchmark dos endpoints mais usados, com baselines em JSON
+#
+# Executa a aplicação ASGI no próprio processo (padrão, com o backend em
+# memória e dados sintéticos) ou contra um uvicorn local (--url), com
+# clientes concorrentes, e reporta p50/p95/p99 e vazão por cenário.
+#
+#   python -m backend.tools.bench --save bench_baseline.json
+#   python -m backend.tools.bench --compare bench_baseline.json
+#   python -m backend.tools.bench --mongo --seed-data get_tires listar_pacientes
+#   python -m backend.tools.bench --url http://127.0.0.1:8000
+#
+# O MercadoPago é substituído por um stand-in local (--mp-latency-ms
+# simula a latência da API real). No modo --url o servidor remoto usa a
+# integração que estiver configurada nele, por isso create_checkout só
+# roda se for pedido explicitamente.
+# -------------------------------------------------------------------
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Cenários: nome -> (método, caminho, gerador de corpo)
+BENCH_USER = {"username": "bench", "password": "bench-password"}
+
+CART = {
+    "cart_items": [
+        {"id": "tire-0000001", "brand": "Michelin", "model": "Primacy 4", "size": "205/55 R16",
+         "price": "R$ 599,90", "quantity": 4, "image": "img/pneus/tire_0000001.jpg"},
+    ],
+}
+
+
+def _random_ip(rng):
+    return f"{rng.choice((177, 189, 200, 201))}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+SCENARIOS = {
+    "listar_pacientes": lambda rng: ("GET", "/patients/pacientes", None),
+    "get_tires": lambda rng: ("GET", "/bkautocenter/tires/", None),
+    "create_access_stat": lambda rng: ("POST", "/admin/stats/access", {"ip": _random_ip(rng), "path": "/"}),
+    "list_access_stats": lambda rng: ("GET", "/admin/stats/access", None),
+    "login_password": lambda rng: ("POST", "/admin/login/password", BENCH_USER),
+    "create_checkout": lambda rng: ("POST", "/bkautocenter/checkout", CART),
+    "get_municipios_by_estado": lambda rng: ("GET", "/localizacao/municipios/RJ", None),
+}
+
+# Volume de dados semeado antes do benchmark (modo em processo)
+BENCH_PROFILE = {
+    "stats_access": 20_000,
+    "pacientes": 2_000,
+    "colaboradores": 100,
+    "agendamentos": 0,
+    "equipes": 0,
+    "tires": 1_000,
+    "services": 40,
+    "orders": 0,
+    "produtos": 0,
+}
+BENCH_DATASETS = ["estados", "municipios", "bairros", "stats_access", "pacientes", "tires"]
+
+
+# -------------------------------------------------------------------
+# Cliente ASGI mínimo (sem servidor HTTP)
+# -------------------------------------------------------------------
+class ASGIClient:
+    """Chama a aplicação ASGI diretamente, sem rede. start() roda o startup
+    da aplicação, como o uvicorn: sem ele as tarefas de fundo (beacons,
+    rollups, metering, cache, refdata) não existem e os números enganam."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan = None
+
+    async def start(self):
+        self._lifespan = self.app.router.lifespan_context(self.app)
+        await self._lifespan.__aenter__()
+
+    async def request(self, method, path, body=None, headers=None):
+        path, _, query = path.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        raw_headers = [(b"host", b"bench"), (b"content-length", str(len(payload)).encode())]
+        if body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode(), value.encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+        sent = False
+        response = {"status": 0, "headers": [], "body": bytearray()}
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await self.app(scope, receive, send)
+        return response["status"], bytes(response["body"])
+
+    async def close(self):
+        # Shutdown: grava o que as tarefas de fundo ainda tinham pendente
+        if self._lifespan is not None:
+            lifespan, self._lifespan = self._lifespan, None
+            await lifespan.__aexit__(None, None, None)
+
+
+class HTTPClient:
+    """Cliente HTTP (aiohttp) para rodar contra um uvicorn local."""
+
+    def __init__(self, base_url):
+        import aiohttp
+        self.base_url = base_url.rstrip("/")
+        self.session = aiohttp.ClientSession()
+
+    async def request(self, method, path, body=None, headers=None):
+        async with self.session.request(method, self.base_url + path, json=body, headers=headers) as resp:
+            return resp.status, await resp.read()
+
+    async def close(self):
+        await self.session.close()
+
+
+# -------------------------------------------------------------------
+# Preparação do ambiente em processo
+# -------------------------------------------------------------------
+def install_mercadopago_stand_in(latency_ms: float):
+    """Substitui create_payment_preference por uma versão local."""
+    from ..routes import payments_bkautocenter
+
+    counter = iter(range(1, sys.maxsize))
+
+    def create_payment_preference(items, payer_info=None):
+        if latency_ms:
+            # A chamada real ao SDK é síncrona; mantemos o mesmo comportamento
+            time.sleep(latency_ms / 1000)
+        return f"https://mercadopago.local/checkout/v1/redirect?pref_id=BENCH-{next(counter)}"
+
+    payments_bkautocenter.create_payment_preference = create_payment_preference
+
+
+async def seed_bench_data(seed: int):
+    from ..db import db_equora
+    from . import synthetic
+
+    profile = synthetic.make_profile(BENCH_PROFILE)
+    await synthetic.load(BENCH_DATASETS, profile, seed=seed)
+    if not await db_equora.users.find_one({"username": BENCH_USER["username"]}):
+        await db_equora.users.insert_one({
+            "id": "bench",
+            "username": BENCH_USER["username"],
+            "email": "bench@equora.com",
+            "password_hash": hashlib.sha256(BENCH_USER["password"].encode()).hexdigest(),
+            "is_active": True,
+            "is_admin": True,
+            "twofa_secret": None,
+        })
+
+
+# -------------------------------------------------------------------
+# Execução e métricas
+# -------------------------------------------------------------------
+def percentile(sorted_values, pct):
+    """Percentil pelo método nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+async def run_scenario(http, name, requests, concurrency, warmup, seed):
+    rng = random.Random(f"{seed}:{name}")
+    build = SCENARIOS[name]
+    for _ in range(warmup):
+        await http.request(*build(rng))
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, path, body = build(rng)
+            start = time.perf_counter()
+            status, _ = await http.request(method, path, body)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def compare(results, baseline, threshold):
+    """Compara com a baseline; retorna lista de regressões."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        p95_delta = (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps_delta = (current["throughput_rps"] - base["throughput_rps"]) / base["throughput_rps"] \
+            if base["throughput_rps"] else 0.0
+        current["vs_baseline"] = {"p95": round(p95_delta * 100, 1), "throughput": round(rps_delta * 100, 1)}
+        if p95_delta > threshold or rps_delta < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def print_report(results):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"Benchmark ({results['meta']['mode']})")
+    for column in ("cenário", "req", "erros", "req/s", "p50 ms", "p95 ms", "p99 ms", "Δp95", "Δreq/s"):
+        if column == "cenário":
+            table.add_column(column, no_wrap=True)
+        else:
+            table.add_column(column, justify="right")
+    for name, r in results["scenarios"].items():
+        delta = r.get("vs_baseline", {})
+        table.add_row(
+            name, str(r["requests"]), str(r["errors"]), f"{r['throughput_rps']:.1f}",
+            f"{r['p50_ms']:.2f}", f"{r['p95_ms']:.2f}", f"{r['p99_ms']:.2f}",
+            f"{delta['p95']:+.1f}%" if delta else "-", f"{delta['throughput']:+.1f}%" if delta else "-",
+        )
+    Console().print(table)
+
+
+async def run(args):
+    if args.url:
+        http = HTTPClient(args.url)
+        mode = f"http {args.url}"
+    else:
+        from ..server import app
+        install_mercadopago_stand_in(args.mp_latency_ms)
+        if args.seed_data:
+            await seed_bench_data(args.seed)
+        http = ASGIClient(app)
+        await http.start()
+        mode = f"asgi/{os.environ.get('DB_BACKEND', 'mongo')}"
+
+    results = {
+        "meta": {
+            "mode": mode,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenarios:
+            results["scenarios"][name] = await run_scenario(
+                http, name, args.requests, args.concurrency, args.warmup, args.seed
+            )
+    finally:
+        await http.close()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="bench", description="Benchmark dos endpoints críticos")
+    parser.add_argument("scenarios", nargs="*", metavar="cenário", help=f"Cenários: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=2000, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clientes simultâneos")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo", action="store_true", help="Usa o MongoDB de MONGO_URL em vez do backend em memória")
+    parser.add_argument("--seed-data", action="store_true", help="Semeia dados sintéticos (sempre ativo em memória)")
+    parser.add_argument("--url", default=None, help="Roda contra um servidor (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--mp-latency-ms", type=float, default=0.0, help="Latência simulada do MercadoPago")
+    parser.add_argument("--save", default=None, help="Grava os resultados como baseline JSON")
+    parser.add_argument("--compare", default=None, help="Compara com uma baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Tolerância de regressão (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    if not args.scenarios:
+        args.scenarios = [s for s in SCENARIOS if not (args.url and s == "create_checkout")]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"cenários desconhecidos: {', '.join(sorted(unknown))}")
+    if not args.url and not args.mongo:
+        # Precisa ser definido antes do primeiro import de backend.db
+        os.environ["DB_BACKEND"] = "memory"
+        args.seed_data = True
+    if not args.url:
+        # Snapshot de referência em diretório temporário: os dados semeados
+        # não podem ir parar no snapshot de produção (backend/refdata.snapshot)
+        refdata_dir = tempfile.TemporaryDirectory(prefix="equora-refdata-")
+        os.environ["REFDATA_PATH"] = os.path.join(refdata_dir.name, "refdata.snapshot")
+
+    results = asyncio.run(run(args))
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressões acima de {args.threshold:.0%}: {', '.join(regressions)}")
+            exit_code = 1
+    print_report(results)
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Baseline gravada em {args.save}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
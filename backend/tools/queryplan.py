@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------------
+# Regressão de planos de consulta
+#
+# Dispara as rotas quentes contra a aplicação ASGI (no próprio processo),
+# captura cada formato de consulta enviado ao MongoDB por um
+# CommandListener do pymongo e roda `explain` (executionStats) em cada um.
+# Falha (exit 1) quando um formato quente usa COLLSCAN, faz SORT em
+# memória ou examina mais de --max-ratio documentos por documento
+# retornado.
+#
+#   python -m backend.tools.queryplan --seed-data
+#   python -m backend.tools.queryplan --max-ratio 5 --verbose
+#
+# Precisa de um MongoDB real (explain não existe no backend em memória).
+# Os nomes dos bancos são fixos (gpac, equora, ...): use um mongod
+# descartável em MONGO_URL ao passar --seed-data.
+# -------------------------------------------------------------------
+import argparse
+import asyncio
+import json
+import sys
+
+from pymongo import monitoring
+
+# Requisições que exercitam as consultas quentes das rotas
+HOT_REQUESTS = [
+    ("GET", "/localizacao/estados", None),
+    ("GET", "/localizacao/municipios/RJ", None),
+    ("GET", "/localizacao/bairros/3304557", None),
+    ("GET", "/localizacao/admin/stats", None),
+    ("GET", "/patients/pacientes", None),
+    ("GET", "/colaboradores/", None),
+    ("POST", "/colaboradores/login", {"username": "colab1", "password": "x"}),
+    ("GET", "/bkautocenter/tires/", None),
+    ("GET", "/bkautocenter/tires/tire-0000001", None),
+    ("GET", "/bkautocenter/services/", None),
+    ("GET", "/bkautocenter/services/service-00001", None),
+    ("GET", "/admin/stats/access", None),
+    ("GET", "/admin/stats/access?start=2025-01-01&end=2025-06-30", None),
+    ("POST", "/admin/login/password", {"username": "bench", "password": "bench-password"}),
+    ("GET", "/Produtos/", None),
+]
+
+# Formatos conhecidos que ainda não usam índice: viram aviso em vez de falha.
+# Chave = descrição do formato (coluna "formato" do relatório).
+KNOWN_ISSUES = {
+    'equora.users find {"username": {"$options": "?", "$regex": "?"}}':
+        "login case-insensitive por regex; precisa de collation ou campo normalizado",
+}
+
+READ_COMMANDS = ("find", "aggregate", "count", "distinct")
+# Campos de sessão/transporte que não fazem parte do formato nem do explain
+TRANSPORT_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "readConcern", "comment"}
+
+PLAN_DATASETS = ["colaboradores", "services", "produtos"]
+PLAN_PROFILE = {"colaboradores": 200, "services": 40, "produtos": 200}
+
+
+# -------------------------------------------------------------------
+# Captura dos formatos
+# -------------------------------------------------------------------
+def shape_of(value):
+    """Troca os valores literais por '?' mantendo campos e operadores."""
+    if isinstance(value, dict):
+        return {k: shape_of(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [shape_of(v) for v in value[:1]]
+    return "?"
+
+
+def describe(db_name, command_name, command):
+    """Descrição legível (e chave de deduplicação) do formato da consulta."""
+    collection = command[command_name]
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline", [])
+        match = pipeline[0].get("$match", {}) if pipeline else {}
+        stages = [next(iter(stage)) for stage in pipeline]
+        text = f"{db_name}.{collection} aggregate {json.dumps(shape_of(match), sort_keys=True)} {stages}"
+    else:
+        query = command.get("filter", command.get("query", {}))
+        text = f"{db_name}.{collection} {command_name} {json.dumps(shape_of(query), sort_keys=True)}"
+    if command.get("sort"):
+        text += f" sort={json.dumps(command['sort'])}"
+    return text
+
+
+def query_filter(command_name, command):
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline", [])
+        return pipeline[0].get("$match", {}) if pipeline else {}
+    return command.get("filter", command.get("query", {}))
+
+
+class QueryShapeListener(monitoring.CommandListener):
+    """Guarda o primeiro comando concreto de cada formato de leitura."""
+
+    def __init__(self):
+        self.capturing = False
+        self.shapes = {}
+
+    def started(self, event):
+        if not self.capturing or event.command_name not in READ_COMMANDS:
+            return
+        command = {k: v for k, v in event.command.items() if k not in TRANSPORT_FIELDS}
+        key = describe(event.database_name, event.command_name, command)
+        self.shapes.setdefault(key, (event.database_name, event.command_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# -------------------------------------------------------------------
+# Análise do explain
+# -------------------------------------------------------------------
+def plan_stages(node):
+    """Lista os estágios de um winningPlan (clássico ou SBE)."""
+    if not isinstance(node, dict):
+        return []
+    if "queryPlan" in node:
+        return plan_stages(node["queryPlan"])
+    stages = [node["stage"]] if "stage" in node else []
+    stages += plan_stages(node.get("inputStage"))
+    for child in node.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+def explain_sections(explain):
+    """(queryPlanner, executionStats) tanto para find quanto para aggregate."""
+    if "queryPlanner" in explain:
+        return explain["queryPlanner"], explain.get("executionStats", {})
+    for stage in explain.get("stages", []):
+        cursor = stage.get("$cursor")
+        if cursor:
+            return cursor["queryPlanner"], cursor.get("executionStats", {})
+    return {}, {}
+
+
+def analyze(key, command_name, command, explain, max_ratio):
+    planner, stats = explain_sections(explain)
+    stages = plan_stages(planner.get("winningPlan", {}))
+    examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+    ratio = examined / max(returned, 1)
+
+    problems = []
+    # Leitura completa da coleção (sem filtro e sem ordenação) é esperada
+    full_read = not query_filter(command_name, command) and not command.get("sort")
+    if "COLLSCAN" in stages and not full_read:
+        problems.append("COLLSCAN")
+    if "SORT" in stages:
+        problems.append("SORT em memória")
+    # Em agregações/contagens o retorno é o resultado agrupado, não os documentos
+    if command_name == "find" and ratio > max_ratio and not full_read:
+        problems.append(f"{ratio:.1f} docs examinados/retornado")
+
+    if not problems:
+        status = "ok"
+    elif key in KNOWN_ISSUES:
+        status = "aviso"
+    else:
+        status = "falha"
+    return {
+        "shape": key,
+        "stages": stages,
+        "examined": examined,
+        "returned": returned,
+        "ratio": round(ratio, 2),
+        "problems": problems,
+        "status": status,
+    }
+
+
+async def explain_shape(client, db_name, command_name, command):
+    return await client[db_name].command({"explain": command, "verbosity": "executionStats"})
+
+
+# -------------------------------------------------------------------
+# Execução
+# -------------------------------------------------------------------
+async def seed_plan_data(seed):
+    from . import synthetic
+    from .bench import seed_bench_data
+
+    await seed_bench_data(seed)
+    await synthetic.load(PLAN_DATASETS, synthetic.make_profile(PLAN_PROFILE), seed=seed)
+
+
+async def ensure_all_indexes(client):
+    # Como `manage ensure-indexes`: stats_access é particionada por mês,
+    # os índices vão para cada partição
+    from .. import access_partitions
+    from ..indexes import INDEXES, PARTITION_INDEXES
+
+    for db_name, collections in INDEXES.items():
+        for coll_name, models in collections.items():
+            await client[db_name][coll_name].create_indexes(models)
+    database = client["equora"]
+    for name in await access_partitions.partition_names(database):
+        await database[name].create_indexes(PARTITION_INDEXES)
+
+
+async def run(args, listener):
+    from ..db import client
+    from ..server import app
+    from .bench import ASGIClient
+
+    if args.seed_data:
+        await seed_plan_data(args.seed)
+    await ensure_all_indexes(client)
+
+    http = ASGIClient(app)
+    listener.capturing = True
+    try:
+        for method, path, body in HOT_REQUESTS:
+            status, _ = await http.request(method, path, body)
+            if args.verbose:
+                print(f"{method} {path} -> {status}")
+    finally:
+        listener.capturing = False
+
+    results = []
+    for key, (db_name, command_name, command) in sorted(listener.shapes.items()):
+        explain = await explain_shape(client, db_name, command_name, command)
+        results.append(analyze(key, command_name, command, explain, args.max_ratio))
+    client.close()
+    return results
+
+
+def print_report(results):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Planos de consulta")
+    for column in ("formato", "estágios", "examinados", "retornados", "razão", "status"):
+        table.add_column(column, justify="right" if column in ("examinados", "retornados", "razão") else "left")
+    colors = {"ok": "green", "aviso": "yellow", "falha": "red"}
+    for r in results:
+        status = r["status"] if not r["problems"] else f"{r['status']}: {', '.join(r['problems'])}"
+        table.add_row(
+            r["shape"], " > ".join(r["stages"]), str(r["examined"]), str(r["returned"]),
+            f"{r['ratio']:.1f}", f"[{colors[r['status']]}]{status}[/]",
+        )
+    Console().print(table)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="queryplan", description="Regressão de planos das consultas quentes")
+    parser.add_argument("--seed-data", action="store_true", help="Semeia dados sintéticos antes (mongod descartável!)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-ratio", type=float, default=10.0,
+                        help="Máximo de documentos examinados por documento retornado")
+    parser.add_argument("--json", default=None, help="Grava o resultado em JSON")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    # O listener precisa ser registrado antes de o client de db.py ser criado
+    listener = QueryShapeListener()
+    monitoring.register(listener)
+
+    results = asyncio.run(run(args, listener))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    failures = [r for r in results if r["status"] == "falha"]
+    if failures:
+        print(f"{len(failures)} formato(s) quente(s) sem uso adequado de índice")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------------
+# Soak test: carga mista contínua contra um único processo da aplicação
+#
+# Replica por horas uma mistura de tráfego (beacon de estatísticas,
+# leituras da loja, CRUD do GPAC, logins e checkouts) e, a cada
+# intervalo, amostra RSS, conexões abertas no MongoDB, lag do event loop
+# e p99 de latência. Ao final falha (exit 1) se alguma dessas séries
+# cresce de forma monotônica, sinal típico de vazamento.
+#
+#   python -m backend.tools.soak --duration 2h --interval 60
+#   python -m backend.tools.soak --mongo --seed-data --duration 8h --save soak.json
+#   python -m backend.tools.soak --url http://127.0.0.1:8000 --pid 12345 --duration 1h
+#
+# No modo em memória (padrão) as coleções que só crescem por causa da
+# carga (stats_access, orders) são esvaziadas a cada amostra, para que o
+# crescimento do banco falso não seja confundido com vazamento da app.
+#
+# Em processo, a aplicação roda com o startup/shutdown completos (tarefas
+# de fundo de beacons, rollups, metering, cache e refdata ativas); as
+# amostras incluem a fila do beacon, e o teste falha se nenhum acesso
+# chegar a ser gravado.
+# -------------------------------------------------------------------
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .bench import BENCH_USER, CART, SCENARIOS, percentile
+
+# Operação -> peso na mistura
+WORKLOAD = {
+    "beacon": 40,
+    "storefront": 25,
+    "gpac_crud": 15,
+    "login": 10,
+    "checkout": 10,
+}
+
+STOREFRONT_PATHS = ["/bkautocenter/tires/", "/bkautocenter/services/", "/Produtos/"]
+
+# Métrica -> crescimento relativo tolerado entre o início e o fim
+DEFAULT_THRESHOLDS = {
+    "rss_mb": 0.10, "mongo_connections": 0.25, "loop_lag_ms": 0.50, "p99_ms": 0.50, "beacon_pending": 0.50,
+}
+
+
+# -------------------------------------------------------------------
+# Operações da carga
+# -------------------------------------------------------------------
+def _paciente(rng):
+    n = rng.randrange(10**9)
+    return {
+        "name": f"Soak {n}",
+        "email": f"soak{n}@example.com",
+        "phone": "(21) 99999-0000",
+        "cpf": f"{n:011d}",
+        "city": "Rio de Janeiro",
+    }
+
+
+async def op_beacon(http, rng):
+    method, path, body = SCENARIOS["create_access_stat"](rng)
+    return [await http.request(method, path, body)]
+
+
+async def op_storefront(http, rng):
+    return [await http.request("GET", rng.choice(STOREFRONT_PATHS))]
+
+
+async def op_gpac_crud(http, rng):
+    status, body = await http.request("POST", "/patients/", _paciente(rng))
+    results = [(status, body)]
+    if status >= 400:
+        return results
+    patient_id = json.loads(body)["_id"]
+    results.append(await http.request("PUT", f"/patients/{patient_id}", {"city": f"Cidade {rng.randrange(1000)}"}))
+    results.append(await http.request("DELETE", f"/patients/{patient_id}"))
+    return results
+
+
+async def op_login(http, rng):
+    if rng.random() < 0.5:
+        return [await http.request("POST", "/admin/login/password", BENCH_USER)]
+    return [await http.request("POST", "/colaboradores/login", {"username": f"colab{rng.randrange(100)}", "password": "x"})]
+
+
+async def op_checkout(http, rng):
+    return [await http.request("POST", "/bkautocenter/checkout", CART)]
+
+
+OPERATIONS = {
+    "beacon": op_beacon,
+    "storefront": op_storefront,
+    "gpac_crud": op_gpac_crud,
+    "login": op_login,
+    "checkout": op_checkout,
+}
+
+
+# -------------------------------------------------------------------
+# Amostragem
+# -------------------------------------------------------------------
+def read_rss_mb(pid=None):
+    """RSS atual do processo (Linux, /proc)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def read_mongo_connections(client):
+    try:
+        status = await client.admin.command("serverStatus")
+    except Exception:
+        return None
+    return status.get("connections", {}).get("current")
+
+
+class LoopLagProbe:
+    """Mede o atraso do event loop: dorme `interval` e mede o excesso."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def drain(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+# -------------------------------------------------------------------
+# Análise de tendência
+# -------------------------------------------------------------------
+def trend(series):
+    """(fração de passos não decrescentes, crescimento relativo fim/início)."""
+    values = [v for v in series if v is not None]
+    if len(values) < 3:
+        return 0.0, 0.0
+    steps = list(zip(values, values[1:]))
+    rising = sum(1 for a, b in steps if b >= a) / len(steps)
+    # Médias do primeiro e do último terço suavizam o ruído das pontas
+    third = max(1, len(values) // 3)
+    head = sum(values[:third]) / third
+    tail = sum(values[-third:]) / third
+    growth = (tail - head) / head if head else (1.0 if tail > head else 0.0)
+    return round(rising, 3), round(growth, 3)
+
+
+def find_leaks(samples, thresholds, min_rising=0.8, skip=1):
+    """Métricas com crescimento monotônico acima do limite."""
+    leaks = []
+    for metric, limit in thresholds.items():
+        rising, growth = trend([s.get(metric) for s in samples[skip:]])
+        if rising >= min_rising and growth > limit:
+            leaks.append({"metric": metric, "rising": rising, "growth": growth})
+    return leaks
+
+
+def beacons_stalled(samples):
+    """True se a aplicação em processo não gravou nenhum acesso novo durante
+    o teste (flusher parado: a fila só enche e descarta)."""
+    written = [s["beacon_written"] for s in samples if s.get("beacon_written") is not None]
+    if not written:
+        return False
+    return written[-1] <= written[0] if len(written) > 1 else written[0] == 0
+
+
+# -------------------------------------------------------------------
+# Execução
+# -------------------------------------------------------------------
+def parse_duration(text):
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+async def run(args):
+    from .bench import ASGIClient, HTTPClient, install_mercadopago_stand_in, seed_bench_data
+
+    client = beacons = None
+    if args.url:
+        http = HTTPClient(args.url)
+    else:
+        from .. import beacons
+        from ..db import client
+        from ..server import app
+        install_mercadopago_stand_in(args.mp_latency_ms)
+        if args.seed_data:
+            await seed_bench_data(args.seed)
+        http = ASGIClient(app)
+        await http.start()
+    memory = os.environ.get("DB_BACKEND") == "memory"
+
+    rng = random.Random(args.seed)
+    names = list(WORKLOAD)
+    weights = [WORKLOAD[n] for n in names]
+    latencies, errors, requests = [], 0, 0
+    probe = LoopLagProbe()
+    probe.start()
+    deadline = time.monotonic() + args.duration
+
+    async def worker():
+        nonlocal errors, requests
+        while time.monotonic() < deadline:
+            operation = OPERATIONS[rng.choices(names, weights)[0]]
+            start = time.perf_counter()
+            results = await operation(http, rng)
+            latencies.append(time.perf_counter() - start)
+            requests += len(results)
+            errors += sum(1 for status, _ in results if status >= 400)
+            # No backend em memória nenhuma chamada suspende de verdade;
+            # cede o loop para o sampler e a sonda de lag rodarem
+            await asyncio.sleep(0)
+
+    async def sampler():
+        nonlocal latencies, errors, requests
+        started = time.monotonic()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(args.interval, max(0.0, deadline - time.monotonic())))
+            window, latencies = sorted(latencies), []
+            lags = sorted(probe.drain())
+            queue = beacons.snapshot() if beacons else {}
+            sample = {
+                "elapsed_s": round(time.monotonic() - started, 1),
+                "requests": requests,
+                "errors": errors,
+                "rss_mb": read_rss_mb(args.pid),
+                "mongo_connections": await read_mongo_connections(client) if client is not None and not memory else None,
+                "loop_lag_ms": round(percentile(lags, 99) * 1000, 2) if lags and not args.url else None,
+                "p99_ms": round(percentile(window, 99) * 1000, 2) if window else None,
+                "beacon_pending": queue.get("pending"),
+                "beacon_written": queue.get("written"),
+            }
+            requests = errors = 0
+            samples.append(sample)
+            print(json.dumps(sample), flush=True)
+            if memory:
+                from .. import access_partitions
+                from ..db import db_equora, db_bkautocenter
+                await access_partitions.drop_all(db_equora)
+                await db_bkautocenter.orders.delete_many({})
+
+    samples = []
+    try:
+        await asyncio.gather(sampler(), *(worker() for _ in range(args.concurrency)))
+    finally:
+        probe.stop()
+        await http.close()
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="soak", description="Soak test com carga mista")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("1h"), help="Ex.: 90s, 30m, 8h")
+    parser.add_argument("--interval", type=float, default=60.0, help="Segundos entre amostras")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo", action="store_true", help="Usa o MongoDB de MONGO_URL em vez do backend em memória")
+    parser.add_argument("--seed-data", action="store_true", help="Semeia dados sintéticos (sempre ativo em memória)")
+    parser.add_argument("--url", default=None, help="Roda contra um servidor (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--pid", type=int, default=None, help="PID do servidor para ler o RSS (modo --url)")
+    parser.add_argument("--mp-latency-ms", type=float, default=0.0, help="Latência simulada do MercadoPago")
+    parser.add_argument("--min-rising", type=float, default=0.8,
+                        help="Fração mínima de amostras crescentes para considerar a série monotônica")
+    parser.add_argument("--threshold", action="append", default=[], metavar="MÉTRICA=FRAÇÃO",
+                        help="Crescimento tolerado por métrica (ex.: rss_mb=0.05)")
+    parser.add_argument("--save", default=None, help="Grava amostras e resultado em JSON")
+    args = parser.parse_args(argv)
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for item in args.threshold:
+        metric, _, value = item.partition("=")
+        if metric not in thresholds:
+            parser.error(f"métrica desconhecida: {metric}")
+        thresholds[metric] = float(value)
+    if not args.url and not args.mongo:
+        # Precisa ser definido antes do primeiro import de backend.db
+        os.environ["DB_BACKEND"] = "memory"
+        args.seed_data = True
+    if not args.url:
+        # Snapshot de referência em diretório temporário: os dados semeados
+        # não podem ir parar no snapshot de produção (backend/refdata.snapshot)
+        refdata_dir = tempfile.TemporaryDirectory(prefix="equora-refdata-")
+        os.environ["REFDATA_PATH"] = os.path.join(refdata_dir.name, "refdata.snapshot")
+
+    samples = asyncio.run(run(args))
+    leaks = find_leaks(samples, thresholds, args.min_rising)
+    stalled = beacons_stalled(samples)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({
+            "meta": {"created_at": datetime.now(timezone.utc).isoformat(), "duration_s": args.duration,
+                     "interval_s": args.interval, "concurrency": args.concurrency, "thresholds": thresholds},
+            "samples": samples,
+            "leaks": leaks,
+            "beacons_stalled": stalled,
+        }, indent=2), encoding="utf-8")
+    for leak in leaks:
+        print(f"Crescimento monotônico em {leak['metric']}: +{leak['growth']:.0%} "
+              f"({leak['rising']:.0%} das amostras crescentes)")
+    if stalled:
+        print("Nenhum acesso do beacon foi gravado durante o teste")
+    return 1 if leaks or stalled else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
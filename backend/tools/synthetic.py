@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------------
+# Gerador de dados sintéticos para testes de escala (todos os tenants)
+#
+# Gera volumes realistas de forma determinística (mesma seed => mesmos
+# dados) e em streaming, direto no MongoDB (insert_many em lotes) ou em
+# arquivos NDJSON (JSON estendido, compatível com `manage.py seed`).
+#
+#   python -m backend.tools.synthetic --all
+#   python -m backend.tools.synthetic stats_access pacientes --set stats_access=5000000
+#   python -m backend.tools.synthetic --all --out /tmp/dataset --seed 7
+#
+# Distribuições ajustáveis com --set chave=valor (ver DEFAULT_PROFILE).
+# -------------------------------------------------------------------
+import argparse
+import asyncio
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson import ObjectId, json_util
+from rich.progress import Progress
+
+from .. import access_docs, access_partitions
+from ..db import client
+from ..manage import chunked, run_bounded
+from ..settings import MANAGE_BATCH_SIZE, MANAGE_CONCURRENCY
+
+DEFAULT_PROFILE = {
+    # Quantidades por dataset
+    "stats_access": 1_000_000,
+    "pacientes": 200_000,
+    "colaboradores": 500,
+    "agendamentos": 400_000,
+    "equipes": 300,
+    "tires": 5_000,
+    "services": 40,
+    "orders": 20_000,
+    "produtos": 300,
+    # Janela de tempo (dias até `end`)
+    "end": "2025-12-31",
+    "days": 730,
+    # stats_access: visitantes recorrentes (Zipf) e acessos sem geolocalização
+    "visitors": 50_000,
+    "visitor_skew": 1.2,
+    "no_location_ratio": 0.1,
+    # orders: distribuição de status de pagamento
+    "order_status_weights": {"approved": 60, "pending": 25, "rejected": 10, "cancelled": 5},
+}
+
+# -------------------------------------------------------------------
+# Dados de referência (localização real)
+# -------------------------------------------------------------------
+ESTADOS = [
+    {"codigo_ibge": 33, "sigla": "RJ", "nome": "Rio de Janeiro", "regiao": "Sudeste"},
+    {"codigo_ibge": 35, "sigla": "SP", "nome": "São Paulo", "regiao": "Sudeste"},
+    {"codigo_ibge": 31, "sigla": "MG", "nome": "Minas Gerais", "regiao": "Sudeste"},
+]
+
+MUNICIPIOS = [
+    {"codigo_ibge": 3304557, "nome": "Rio de Janeiro", "estado_sigla": "RJ", "lat": -22.9068, "lon": -43.1729},
+    {"codigo_ibge": 3303302, "nome": "Niterói", "estado_sigla": "RJ", "lat": -22.8832, "lon": -43.1034},
+    {"codigo_ibge": 3550308, "nome": "São Paulo", "estado_sigla": "SP", "lat": -23.5505, "lon": -46.6333},
+    {"codigo_ibge": 3106200, "nome": "Belo Horizonte", "estado_sigla": "MG", "lat": -19.9167, "lon": -43.9345},
+]
+
+BAIRROS = {
+    3304557: ["Copacabana", "Ipanema", "Leblon", "Botafogo", "Tijuca", "Méier", "Madureira",
+              "Barra da Tijuca", "Campo Grande", "Bangu", "Flamengo", "Laranjeiras", "Centro", "Penha"],
+    3303302: ["Icaraí", "Santa Rosa", "Fonseca", "São Francisco", "Centro", "Ingá", "Barreto", "Itaipu"],
+    3550308: ["Pinheiros", "Moema", "Vila Mariana", "Mooca", "Tatuapé", "Santana", "Itaquera",
+              "Butantã", "Lapa", "Bela Vista", "Consolação", "Ipiranga"],
+    3106200: ["Savassi", "Lourdes", "Funcionários", "Pampulha", "Barreiro", "Venda Nova", "Centro", "Buritis"],
+}
+
+FIRST_NAMES = ["Ana", "Maria", "João", "José", "Pedro", "Paulo", "Lucas", "Mariana", "Juliana", "Fernanda",
+               "Carlos", "Rafael", "Gabriel", "Beatriz", "Camila", "Larissa", "Bruno", "Felipe", "Aline", "Marcos"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+              "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes"]
+
+ACCESS_PATHS = ["/", "/bkautocenter", "/bkautocenter/pneus", "/bkautocenter/servicos", "/aguanaboca",
+                "/aguanaboca/bolos", "/aguanaboca/doces", "/gpac", "/contato", "/sobre"]
+ACCESS_CITIES = [
+    ("Brazil", "Rio de Janeiro", -22.9068, -43.1729, 40),
+    ("Brazil", "São Paulo", -23.5505, -46.6333, 30),
+    ("Brazil", "Belo Horizonte", -19.9167, -43.9345, 10),
+    ("Brazil", "Niterói", -22.8832, -43.1034, 8),
+    ("United States", "Ashburn", 39.0438, -77.4874, 6),
+    ("Portugal", "Lisbon", 38.7223, -9.1393, 4),
+    ("Germany", "Frankfurt am Main", 50.1109, 8.6821, 2),
+]
+
+TIRE_BRANDS = {
+    "Michelin": ["Primacy 4", "Energy XM2+", "Pilot Sport 4", "LTX Force"],
+    "Pirelli": ["Cinturato P1", "P7", "Scorpion ATR", "P Zero"],
+    "Goodyear": ["Direction Touring", "EfficientGrip", "Wrangler"],
+    "Bridgestone": ["Turanza", "Ecopia EP150", "Dueler A/T"],
+    "Continental": ["PowerContact 2", "ContiSportContact 5"],
+}
+TIRE_SIZES = ["175/70 R13", "175/65 R14", "185/65 R15", "195/55 R16", "205/55 R16", "215/50 R17", "225/45 R17",
+              "235/60 R18", "265/65 R17"]
+
+CARE_TYPES = ["hipertensao", "diabetes", "gestante", "saude_mental", "idoso", "crianca"]
+APPOINTMENT_TYPES = ["consulta", "retorno", "exame", "visita_domiciliar"]
+APPOINTMENT_STATUS = [("completed", 55), ("scheduled", 25), ("cancelled", 12), ("confirmed", 8)]
+ROLES = [("medico", 30), ("enfermeiro", 35), ("recepcionista", 20), ("administrador", 5), ("agente", 10)]
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+def _oid(prefix: int, index: int) -> ObjectId:
+    """ObjectId determinístico (permite referências entre datasets)."""
+    return ObjectId(f"{prefix:02x}{index:022x}")
+
+
+def _weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _timestamp(rng, profile):
+    end = datetime.fromisoformat(profile["end"])
+    return end - timedelta(seconds=rng.randrange(int(profile["days"]) * 86400))
+
+
+def _price(value: float) -> str:
+    return "R$ " + f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def gerar_cpf(rng) -> str:
+    """CPF com dígitos verificadores válidos (formato 000.000.000-00)."""
+    digits = [rng.randrange(10) for _ in range(9)]
+    for length in (9, 10):
+        total = sum(d * (length + 1 - i) for i, d in enumerate(digits[:length]))
+        rest = total % 11
+        digits.append(0 if rest < 2 else 11 - rest)
+    s = "".join(map(str, digits))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+
+def gerar_cns(rng) -> str:
+    """CNS definitivo (inicia com 1 ou 2) com dígito verificador válido."""
+    while True:
+        pis = str(rng.choice((1, 2))) + "".join(str(rng.randrange(10)) for _ in range(10))
+        total = sum(int(d) * (15 - i) for i, d in enumerate(pis))
+        dv = 11 - total % 11
+        if dv == 11:
+            dv = 0
+        if dv == 10:
+            total += 2
+            dv = 11 - total % 11
+            cns = f"{pis}001{dv}"
+        else:
+            cns = f"{pis}000{dv}"
+        if len(cns) == 15:
+            return cns
+
+
+def _zipf_index(rng, size, skew):
+    """Índice em [0, size) com cauda longa: poucos visitantes fazem muitas visitas."""
+    u = rng.random()
+    return min(size - 1, int(size * u ** (skew * 2)))
+
+
+# -------------------------------------------------------------------
+# Geradores por dataset (cada um com seu próprio Random derivado da seed)
+# -------------------------------------------------------------------
+def gen_estados(rng, profile):
+    for estado in ESTADOS:
+        yield {"_id": _oid(1, estado["codigo_ibge"]), **estado}
+
+
+def gen_municipios(rng, profile):
+    estados = {e["sigla"]: e for e in ESTADOS}
+    for m in MUNICIPIOS:
+        estado = estados[m["estado_sigla"]]
+        yield {
+            "_id": _oid(2, m["codigo_ibge"]),
+            "codigo_ibge": m["codigo_ibge"],
+            "nome": m["nome"],
+            "estado_sigla": estado["sigla"],
+            "estado_nome": estado["nome"],
+            "estado_codigo_ibge": estado["codigo_ibge"],
+        }
+
+
+def gen_bairros(rng, profile):
+    estados = {e["sigla"]: e for e in ESTADOS}
+    index = 0
+    for m in MUNICIPIOS:
+        for nome in BAIRROS[m["codigo_ibge"]]:
+            index += 1
+            yield {
+                "_id": _oid(3, index),
+                "nome": nome,
+                "municipio_codigo_ibge": m["codigo_ibge"],
+                "municipio_nome": m["nome"],
+                "estado_sigla": m["estado_sigla"],
+                "estado_nome": estados[m["estado_sigla"]]["nome"],
+                "tipo": "bairro",
+                "fonte": "ibge",
+                "ativo": True,
+                "criado_em": datetime.fromisoformat(profile["end"]),
+            }
+
+
+def gen_stats_access(rng, profile):
+    visitors = int(profile["visitors"])
+    # IPs fixos por visitante para que visitantes recorrentes se repitam
+    ip_rng = random.Random(rng.random())
+    ips = [f"{ip_rng.choice((177, 179, 186, 189, 191, 200, 201))}.{ip_rng.randrange(256)}."
+           f"{ip_rng.randrange(256)}.{ip_rng.randrange(1, 255)}" for _ in range(visitors)]
+    cities = [(c[:4], c[4]) for c in ACCESS_CITIES]
+    for _ in range(int(profile["stats_access"])):
+        visitor = _zipf_index(rng, visitors, float(profile["visitor_skew"]))
+        timestamp, path = _timestamp(rng, profile), rng.choice(ACCESS_PATHS)
+        location = None
+        if rng.random() >= float(profile["no_location_ratio"]):
+            country, city, lat, lon = _weighted(rng, cities)
+            location = {
+                "country": country,
+                "city": city,
+                "latitude": round(lat + rng.uniform(-0.08, 0.08), 4),
+                "longitude": round(lon + rng.uniform(-0.08, 0.08), 4),
+            }
+        # Mesmo formato dos acessos gravados pela API (access_docs.py)
+        yield access_docs.build(ips[visitor], path, location, timestamp)
+
+
+def gen_pacientes(rng, profile):
+    for i in range(int(profile["pacientes"])):
+        m = rng.choice(MUNICIPIOS)
+        birth = datetime(1935, 1, 1) + timedelta(days=rng.randrange(365 * 88))
+        name = _person_name(rng)
+        yield {
+            "_id": _oid(10, i),
+            "name": name,
+            "email": f"{name.split()[0].lower()}.{i}@example.com",
+            "phone": f"({rng.randrange(11, 99)}) 9{rng.randrange(1000, 9999)}-{rng.randrange(1000, 9999)}",
+            "cpf": gerar_cpf(rng),
+            "city": m["nome"],
+            "age": (datetime.fromisoformat(profile["end"]) - birth).days // 365,
+            "createdAt": _timestamp(rng, profile),
+            "gender": rng.choice(("masculino", "feminino", "outros")),
+            "rg": str(rng.randrange(10_000_000, 99_999_999)),
+            "rgOrgan": "DETRAN",
+            "cns": gerar_cns(rng),
+            "cep": f"{rng.randrange(20000, 39999)}-{rng.randrange(1000):03d}",
+            "address": f"Rua {rng.choice(LAST_NAMES)}, {rng.randrange(1, 2000)}",
+            "neighborhood": rng.choice(BAIRROS[m["codigo_ibge"]]),
+            "state": m["estado_sigla"],
+            "careTypes": rng.sample(CARE_TYPES, rng.randrange(0, 3)),
+            "medicalReports": [],
+            "birthDate": birth.strftime("%Y-%m-%d"),
+            "medicalHistory": "",
+        }
+
+
+def gen_colaboradores(rng, profile):
+    for i in range(int(profile["colaboradores"])):
+        m = rng.choice(MUNICIPIOS)
+        name = _person_name(rng)
+        role = _weighted(rng, ROLES)
+        yield {
+            "_id": _oid(11, i),
+            "name": name,
+            "email": f"colaborador.{i}@example.com",
+            "phone": f"({rng.randrange(11, 99)}) 9{rng.randrange(1000, 9999)}-{rng.randrange(1000, 9999)}",
+            "role": role,
+            "specialty": [str(rng.randrange(2251, 2261))] if role == "medico" else [],
+            "crm": str(rng.randrange(100000, 999999)) if role == "medico" else None,
+            "cpf": gerar_cpf(rng),
+            "city": m["nome"],
+            "state": m["estado_sigla"],
+            "neighborhood": rng.choice(BAIRROS[m["codigo_ibge"]]),
+            "username": f"colab{i}",
+            "userProfile": "equipe_medica" if role in ("medico", "enfermeiro") else "cadastro",
+            "changePasswordOnFirstLogin": False,
+            "twoFactorAuth": False,
+            "createdAt": _timestamp(rng, profile),
+        }
+
+
+def gen_agendamentos(rng, profile):
+    pacientes = max(1, int(profile["pacientes"]))
+    colaboradores = max(1, int(profile["colaboradores"]))
+    for i in range(int(profile["agendamentos"])):
+        when = _timestamp(rng, profile)
+        yield {
+            "_id": _oid(12, i),
+            "patientId": str(_oid(10, rng.randrange(pacientes))),
+            "patientName": _person_name(rng),
+            "collaboratorId": str(_oid(11, rng.randrange(colaboradores))),
+            "collaboratorName": _person_name(rng),
+            "date": when.strftime("%Y-%m-%d"),
+            "time": f"{rng.randrange(7, 19):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+            "type": rng.choice(APPOINTMENT_TYPES),
+            "status": _weighted(rng, APPOINTMENT_STATUS),
+            "notes": "",
+            "createdAt": when - timedelta(days=rng.randrange(1, 30)),
+        }
+
+
+def gen_equipes(rng, profile):
+    colaboradores = max(1, int(profile["colaboradores"]))
+    for i in range(int(profile["equipes"])):
+        m = rng.choice(MUNICIPIOS)
+        members = [rng.randrange(colaboradores) for _ in range(rng.randrange(3, 10))]
+        yield {
+            "_id": _oid(13, i),
+            "name": f"Equipe {m['nome']} {i + 1}",
+            "description": "",
+            "collaborators": [str(_oid(11, c)) for c in members],
+            "collaboratorNames": [_person_name(rng) for _ in members],
+            "specialties": [str(rng.randrange(2251, 2261))],
+            "state": m["estado_sigla"],
+            "city": m["nome"],
+            "districts": rng.sample(BAIRROS[m["codigo_ibge"]], rng.randrange(1, 4)),
+        }
+
+
+def gen_tires(rng, profile):
+    for i in range(int(profile["tires"])):
+        brand = rng.choice(list(TIRE_BRANDS))
+        created = _timestamp(rng, profile)
+        yield {
+            "id": f"tire-{i:07d}",
+            "brand": brand,
+            "model": rng.choice(TIRE_BRANDS[brand]),
+            "size": rng.choice(TIRE_SIZES),
+            "price": _price(rng.randrange(250, 1500) + 0.9),
+            "image_url": f"http://140.238.187.229/bkautocenter/img/pneus/tire_{i:07d}.jpg",
+            "in_stock": rng.random() < 0.85,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def gen_services(rng, profile):
+    names = ["Alinhamento", "Balanceamento", "Troca de Óleo", "Revisão", "Freios", "Suspensão", "Geometria"]
+    for i in range(int(profile["services"])):
+        created = _timestamp(rng, profile)
+        yield {
+            "id": f"service-{i:05d}",
+            "name": f"{rng.choice(names)} {i + 1}",
+            "description": "Serviço automotivo",
+            "price": _price(rng.randrange(60, 600) + 0.9),
+            "duration": f"{rng.choice((30, 45, 60, 90, 120))} min",
+            "image_url": f"http://140.238.187.229/bkautocenter/img/services/service_{i:05d}.jpg",
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def gen_orders(rng, profile):
+    tires = max(1, int(profile["tires"]))
+    statuses = list(profile["order_status_weights"].items())
+    for i in range(int(profile["orders"])):
+        created = _timestamp(rng, profile)
+        items = []
+        for _ in range(rng.randrange(1, 4)):
+            quantity = rng.choice((1, 2, 4))
+            unit_price = float(rng.randrange(250, 1500)) + 0.9
+            items.append({
+                "id": f"tire-{rng.randrange(tires):07d}",
+                "title": "Pneu",
+                "description": None,
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "total_price": unit_price * quantity,
+                "picture_url": None,
+            })
+        status = _weighted(rng, statuses)
+        ref = f"BKAC-SYN-{i:08d}"
+        yield {
+            "_id": ref,
+            "external_reference": ref,
+            "payment_status": status,
+            "items": items,
+            "total_amount": round(sum(it["total_price"] for it in items), 2),
+            "currency": "BRL",
+            "payer": None,
+            "created_at": created,
+            "updated_at": created,
+            "payment_date": created + timedelta(minutes=rng.randrange(1, 120)) if status == "approved" else None,
+        }
+
+
+def gen_produtos(rng, profile):
+    for i in range(int(profile["produtos"])):
+        category = rng.choice(("bolos", "doces"))
+        created = _timestamp(rng, profile)
+        yield {
+            "_id": _oid(20, i),
+            "name": f"{'Bolo' if category == 'bolos' else 'Doce'} {i + 1}",
+            "description": "Produto artesanal",
+            "price": round(rng.uniform(5, 150), 2),
+            "category": category,
+            "image_url": f"/uploads/produto_{i:05d}.jpg",
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+# nome -> (banco, coleção, gerador); stats_access é gravado nas partições
+# mensais stats_access_AAAA_MM (access_partitions.py)
+DATASETS = {
+    "estados": ("gpac", "estados", gen_estados),
+    "municipios": ("gpac", "municipios", gen_municipios),
+    "bairros": ("gpac", "bairros", gen_bairros),
+    "stats_access": ("equora", "stats_access", gen_stats_access),
+    "pacientes": ("gpac", "pacientes", gen_pacientes),
+    "colaboradores": ("gpac", "colaboradores", gen_colaboradores),
+    "agendamentos": ("gpac", "agendamentos", gen_agendamentos),
+    "equipes": ("gpac", "equipes", gen_equipes),
+    "tires": ("bkautocenter", "tires", gen_tires),
+    "services": ("bkautocenter", "services", gen_services),
+    "orders": ("bkautocenter", "orders", gen_orders),
+    "produtos": ("aguanaboca", "produtos", gen_produtos),
+}
+
+
+def dataset_size(name, profile):
+    generator = DATASETS[name][2]
+    if generator in (gen_estados, gen_municipios):
+        return len(ESTADOS) if generator is gen_estados else len(MUNICIPIOS)
+    if generator is gen_bairros:
+        return sum(len(b) for b in BAIRROS.values())
+    return int(profile[name])
+
+
+def generate(name, profile, seed=42):
+    """Iterador de documentos do dataset `name` (determinístico por seed)."""
+    rng = random.Random(f"{seed}:{name}")
+    return DATASETS[name][2](rng, profile)
+
+
+def make_profile(overrides=None):
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    profile.update(overrides or {})
+    return profile
+
+
+# -------------------------------------------------------------------
+# Destinos: MongoDB (insert_many em lotes) ou NDJSON
+# -------------------------------------------------------------------
+async def load(names, profile, seed=42, batch_size=MANAGE_BATCH_SIZE, concurrency=MANAGE_CONCURRENCY,
+               target=None, progress=None):
+    """Insere os datasets no cliente `target` (padrão: client de db.py)."""
+    target = target or client
+    for name in names:
+        db_name, coll_name, _ = DATASETS[name]
+        collection = target[db_name][coll_name]
+        partitioned = (db_name, coll_name) == ("equora", access_partitions.LEGACY)
+        task = progress.add_task(f"{db_name}.{coll_name}", total=dataset_size(name, profile)) if progress else None
+
+        async def worker(batch, collection=collection, task=task, partitioned=partitioned):
+            if partitioned:
+                for partition, docs in access_partitions.split(batch).items():
+                    await access_partitions.insert_many(collection.database, partition, docs)
+            else:
+                await collection.insert_many(batch, ordered=False)
+            if progress:
+                progress.advance(task, len(batch))
+
+        await run_bounded(chunked(generate(name, profile, seed), batch_size), worker, concurrency)
+
+
+def dump(names, profile, out_dir: Path, seed=42, progress=None):
+    """Grava cada dataset em <out_dir>/<banco>.<coleção>.ndjson."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        db_name, coll_name, _ = DATASETS[name]
+        task = progress.add_task(f"{db_name}.{coll_name}", total=dataset_size(name, profile)) if progress else None
+        with open(out_dir / f"{db_name}.{coll_name}.ndjson", "w", encoding="utf-8") as f:
+            for batch in chunked(generate(name, profile, seed), MANAGE_BATCH_SIZE):
+                f.write("".join(json_util.dumps(doc) + "\n" for doc in batch))
+                if progress:
+                    progress.advance(task, len(batch))
+
+
+def _parse_override(text):
+    key, _, raw = text.partition("=")
+    if key not in DEFAULT_PROFILE:
+        raise argparse.ArgumentTypeError(f"Chave desconhecida: {key}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key, value
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="synthetic", description="Gerador de dados sintéticos")
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"Datasets a gerar: {', '.join(DATASETS)}")
+    parser.add_argument("--all", action="store_true", help="Gera todos os datasets")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--set", dest="overrides", action="append", type=_parse_override, default=[],
+                        help="Sobrescreve DEFAULT_PROFILE (ex.: --set pacientes=500000)")
+    parser.add_argument("--out", default=None, help="Diretório para NDJSON (se omitido, grava no MongoDB)")
+    parser.add_argument("--batch-size", type=int, default=MANAGE_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=MANAGE_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    names = list(DATASETS) if args.all else args.datasets
+    if not names:
+        parser.error("informe ao menos um dataset ou --all")
+    unknown = set(names) - set(DATASETS)
+    if unknown:
+        parser.error(f"datasets desconhecidos: {', '.join(sorted(unknown))}")
+    profile = make_profile(dict(args.overrides))
+
+    with Progress() as progress:
+        if args.out:
+            dump(names, profile, Path(args.out), args.seed, progress)
+        else:
+            try:
+                asyncio.run(load(names, profile, args.seed, args.batch_size, args.concurrency, progress=progress))
+            finally:
+                client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())